@@ -27,14 +27,15 @@ const Dashboard = () => {
   const [chartData, setChartData] = useState([])
 
   useEffect(() => {
-    // Simulate fetching dashboard data
-    setStats({
-      totalCandidates: 1247,
-      activeChecks: 23,
-      completedChecks: 892,
-      pendingChecks: 45
-    })
+    fetch('/api/dashboard/stats')
+      .then((response) => response.json())
+      .then((data) => {
+        setStats(data.stats)
+        setChartData(data.chartData)
+      })
+      .catch((error) => console.error('Failed to load dashboard stats', error))
 
+    // Simulate fetching recent activity
     setRecentActivity([
       { id: 1, type: 'check_completed', candidate: 'John Smith', time: '2 minutes ago' },
       { id: 2, type: 'check_started', candidate: 'Sarah Johnson', time: '15 minutes ago' },
@@ -42,15 +43,6 @@ const Dashboard = () => {
       { id: 4, type: 'verification_failed', candidate: 'Lisa Wilson', time: '2 hours ago' },
       { id: 5, type: 'report_generated', candidate: 'Tom Brown', time: '3 hours ago' }
     ])
-
-    setChartData([
-      { month: 'Jan', checks: 65, completed: 58 },
-      { month: 'Feb', checks: 78, completed: 72 },
-      { month: 'Mar', checks: 92, completed: 85 },
-      { month: 'Apr', checks: 87, completed: 81 },
-      { month: 'May', checks: 105, completed: 98 },
-      { month: 'Jun', checks: 118, completed: 112 }
-    ])
   }, [])
 
   const statCards = [
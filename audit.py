@@ -0,0 +1,39 @@
+from datetime import datetime
+from itertools import islice
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.services.audit_store import iter_audit_logs
+from src.services.db_routing import read_only
+from src.services.serialization import stream_json_array
+
+audit_bp = Blueprint('audit', __name__)
+
+@audit_bp.route('/audit-logs', methods=['GET'])
+@read_only
+def query_audit_logs():
+    """Stream audit entries in a time range from hot partitions and the archive, oldest first"""
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO datetimes'}), 400
+
+    if start is None and not (request.args.get('user_id') or request.args.get('resource_type')):
+        return jsonify({'error': 'start, user_id or resource_type is required'}), 400
+
+    rows = iter_audit_logs(
+        start=start,
+        end=end,
+        user_id=request.args.get('user_id', type=int),
+        resource_type=request.args.get('resource_type'),
+        resource_id=request.args.get('resource_id', type=int),
+        action=request.args.get('action')
+    )
+
+    limit = request.args.get('limit', type=int)
+    if limit:
+        rows = islice(rows, limit)
+
+    return Response(
+        stream_with_context(stream_json_array(rows, lambda row: row)),
+        mimetype='application/json'
+    )
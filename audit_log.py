@@ -0,0 +1,408 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from flask import request
+from src.models.user import db
+from src.services.audit_store import write_entries
+
+logger = logging.getLogger(__name__)
+
+class AuditSpool:
+    """
+    Append-only spool of audit entries not yet written to the database
+
+    Entries go to the process's active segment ('.log'). When the writer takes
+    the matching batch it seals the segment already claimed by its own process
+    ('.sealed.<owner>.claimed'), so no other process replays a batch that is
+    still being written, and deletes it once the batch is committed. A failed
+    write releases the segment ('.sealed'), and recover() releases claims of
+    dead processes; sealed segments, including overflow, are claimed and
+    replayed by any process, so entries are written at least once.
+
+    Segment names carry their owner as <host>_<pid>. The directory may be
+    shared by other hosts or containers, whose pids mean nothing here, so
+    recover() only touches segments of this host.
+    """
+
+    def __init__(self, directory, fsync=False):
+        self.directory = directory
+        self.fsync = fsync
+        self._sequence = 0
+        self._file = None
+        self._path = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _next_path(self, suffix):
+        self._sequence += 1
+        return os.path.join(self.directory, f'audit-{_owner()}-{time.time_ns()}-{self._sequence}{suffix}')
+
+    def append(self, entry):
+        if self._file is None:
+            self._path = self._next_path('.log')
+            self._file = open(self._path, 'a', encoding='utf-8')
+
+        self._file.write(json.dumps(entry, default=_encode_value) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def seal(self):
+        """
+        Close the active segment and return it claimed by this process, or None if it is empty
+
+        Raises:
+            OSError: The segment could not be claimed; the next entry starts a new segment regardless
+        """
+        if self._file is None:
+            return None
+
+        self._file.close()
+        path, self._file, self._path = self._path, None, None
+        claimed_path = path[:-len('.log')] + f'.sealed.{_owner()}.claimed'
+        os.replace(path, claimed_path)
+        return claimed_path
+
+    def write_sealed(self, entries):
+        """Write entries straight to a sealed segment, for entries that bypass the buffer"""
+        path = self._next_path('.sealed')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as spool_file:
+            for entry in entries:
+                spool_file.write(json.dumps(entry, default=_encode_value) + '\n')
+            spool_file.flush()
+            os.fsync(spool_file.fileno())
+        os.replace(temp_path, path)
+        return path
+
+    def recover(self):
+        """Return segments of processes of this host that are gone to the sealed state, so they get replayed"""
+        for path in glob.glob(os.path.join(self.directory, 'audit-*.log')):
+            if _local_owner_gone(os.path.basename(path).split('-')[1]):
+                self._rename(path, path[:-len('.log')] + '.sealed')
+
+        for path in glob.glob(os.path.join(self.directory, 'audit-*.claimed')):
+            if _local_owner_gone(path.rsplit('.', 2)[1]):
+                self.release(path)
+
+    def claim_sealed(self, max_entries):
+        """
+        Claim sealed segments for replay, so each is replayed by one process only
+
+        Returns:
+            tuple: (claimed paths, their entries), stopping once max_entries are read
+        """
+        claimed = []
+        entries = []
+        for path in sorted(glob.glob(os.path.join(self.directory, 'audit-*.sealed'))):
+            claimed_path = f'{path}.{_owner()}.claimed'
+            if not self._rename(path, claimed_path):
+                continue
+            claimed.append(claimed_path)
+            entries.extend(self.read(claimed_path))
+            if len(entries) >= max_entries:
+                break
+        return claimed, entries
+
+    def release(self, claimed_path):
+        """Return a claimed segment for a later retry"""
+        self._rename(claimed_path, claimed_path.rsplit('.', 2)[0])
+
+    def read(self, path):
+        entries = []
+        with open(path, encoding='utf-8') as spool_file:
+            for line in spool_file:
+                try:
+                    entries.append(_decode_entry(json.loads(line)))
+                except ValueError:
+                    # A crash mid-write leaves at most one partial line at the end
+                    logger.warning('Skipping corrupt audit spool line in %s', path)
+        return entries
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _rename(self, source, target):
+        # Renames are atomic, so when processes race for a segment only one wins
+        try:
+            os.replace(source, target)
+        except FileNotFoundError:
+            return False
+        return True
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _decode_entry(entry):
+    if entry.get('timestamp'):
+        entry['timestamp'] = datetime.fromisoformat(entry['timestamp'])
+    return entry
+
+# Host part of segment owners, without the separators used in segment names
+_HOST = re.sub(r'[^A-Za-z0-9]+', '', socket.gethostname()) or 'localhost'
+
+def _owner():
+    return f'{_HOST}_{os.getpid()}'
+
+def _local_owner_gone(owner):
+    # Segments written before owners carried a host name have a bare pid
+    host, _, pid = owner.rpartition('_')
+    return host in ('', _HOST) and not _process_alive(int(pid))
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class AuditWriter:
+    """
+    Buffers audit entries in memory and writes them with bulk inserts from a background thread
+
+    A batch is flushed when batch_size entries are buffered or flush_interval
+    seconds have passed. Callers block while max_queue entries are buffered or
+    being written; after put_timeout they spool the entry to disk instead and
+    return, so a slow database never loses entries or stalls requests for long.
+    """
+
+    def __init__(self, app=None, batch_size=None, flush_interval=None, max_queue=None, put_timeout=2.0, spool_dir=None):
+        self.batch_size = batch_size or int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+        self.flush_interval = flush_interval or float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+        self.max_queue = max_queue or int(os.getenv('AUDIT_MAX_QUEUE', '10000'))
+        self.put_timeout = put_timeout
+        self.spool_dir = spool_dir or os.getenv('AUDIT_SPOOL_DIR', os.path.join(os.getcwd(), 'audit_spool'))
+        self.fsync = os.getenv('AUDIT_SPOOL_FSYNC', 'false').lower() in ('1', 'true', 'yes')
+
+        self.app = None
+        self._pid = None
+        self._thread = None
+        self._stopping = False
+        self.stats = {'recorded': 0, 'written': 0, 'overflowed': 0, 'replayed': 0, 'write_errors': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # Started on first use and again after a fork, since threads do not survive fork
+        if self._pid == os.getpid():
+            return
+
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._buffer = []
+        self._in_flight = 0
+        self._stopping = False
+        self.spool = AuditSpool(self.spool_dir, self.fsync)
+        self.spool.recover()
+
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, action, resource_type, resource_id=None, user_id=None, details=None, ip_address=None, user_agent=None):
+        """
+        Queue an audit entry
+
+        Args:
+            action (str): What happened, e.g. 'workflow_started'
+            resource_type (str): 'candidate', 'background_check', 'report', ...
+            resource_id (int): ID of the affected resource (optional)
+            user_id (int): Acting user (optional)
+            details (dict or str): Extra information, dicts are stored as JSON (optional)
+            ip_address (str): Client address (optional)
+            user_agent (str): Client user agent (optional)
+        """
+        with _start_lock:
+            self._ensure_started()
+
+        entry = {
+            'user_id': user_id,
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'details': json.dumps(details, default=str) if isinstance(details, dict) else details,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'timestamp': datetime.utcnow()
+        }
+
+        with self._lock:
+            has_room = self._not_full.wait_for(
+                lambda: len(self._buffer) + self._in_flight < self.max_queue,
+                timeout=self.put_timeout
+            )
+            self.stats['recorded'] += 1
+
+            if not has_room:
+                self.stats['overflowed'] += 1
+                self.spool.write_sealed([entry])
+                return
+
+            self.spool.append(entry)
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.batch_size:
+                self._ready.notify()
+
+    def flush(self, timeout=10):
+        """Wait until everything buffered so far has been written (or the timeout passes)"""
+        if self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._ready.notify()
+            self._not_full.wait_for(lambda: not self._buffer and not self._in_flight, timeout=max(0.0, deadline - time.monotonic()))
+
+    def close(self):
+        """Flush and stop the writer thread"""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        with self._lock:
+            self._stopping = True
+            self._ready.notify()
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        while True:
+            try:
+                stopping = self._write_batch()
+                self._replay(stopping)
+            except Exception:
+                # The thread must outlive any error: without it record() waits out put_timeout for every entry
+                logger.exception('Audit writer failed, retrying')
+                stopping = self._stopping
+                time.sleep(self.flush_interval)
+
+            if stopping:
+                return
+
+    def _write_batch(self):
+        """Write the buffered entries, returning whether the writer is stopping"""
+        with self._lock:
+            self._ready.wait_for(
+                lambda: len(self._buffer) >= self.batch_size or self._stopping,
+                timeout=self.flush_interval
+            )
+            entries, self._buffer = self._buffer, []
+            self._in_flight = len(entries)
+            stopping = self._stopping
+
+            claimed_path = None
+            if entries:
+                try:
+                    claimed_path = self.spool.seal()
+                except OSError:
+                    # E.g. the segment was taken by another process; the entries are written from memory
+                    logger.exception('Failed to seal the audit spool segment of %d entries', len(entries))
+
+        try:
+            if entries:
+                self._write_segment(claimed_path, entries)
+        finally:
+            with self._lock:
+                self._in_flight = 0
+                self._not_full.notify_all()
+
+        return stopping
+
+    def _write_segment(self, claimed_path, entries):
+        try:
+            self._write_entries(entries)
+        except Exception:
+            # Released to the sealed state, so a later replay by any process writes it
+            self.stats['write_errors'] += 1
+            if claimed_path is None:
+                claimed_path = self.spool.write_sealed(entries)
+            else:
+                self.spool.release(claimed_path)
+            logger.exception('Failed to write %d audit entries, kept in %s', len(entries), claimed_path)
+            time.sleep(self.flush_interval)
+            return
+
+        self.stats['written'] += len(entries)
+        if claimed_path is not None:
+            self.spool.discard(claimed_path)
+
+    def _replay(self, stopping):
+        # Bounded by the flush interval so replaying a backlog never starves new batches
+        deadline = time.monotonic() + self.flush_interval
+        while stopping or time.monotonic() < deadline:
+            claimed, entries = self.spool.claim_sealed(self.batch_size)
+            if not claimed:
+                return
+
+            try:
+                if entries:
+                    self._write_entries(entries)
+            except Exception:
+                self.stats['write_errors'] += 1
+                logger.exception('Failed to replay %d audit spool segments', len(claimed))
+                for claimed_path in claimed:
+                    self.spool.release(claimed_path)
+                return
+
+            self.stats['replayed'] += len(entries)
+            for claimed_path in claimed:
+                self.spool.discard(claimed_path)
+
+    def _write_entries(self, entries):
+        """Insert entries into their monthly partitions with one multi-row INSERT per batch"""
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                write_entries(connection, entries, self.batch_size)
+
+_start_lock = threading.Lock()
+
+# Shared by every request in the process
+audit_writer = AuditWriter()
+
+def record_audit(action, resource_type, resource_id=None, **kwargs):
+    """Queue an audit entry on the shared writer"""
+    audit_writer.record(action, resource_type, resource_id, **kwargs)
+
+def audited(action, resource_type, resource_id_arg=None):
+    """
+    Record an audit entry for every successful call of a view
+
+    Args:
+        action (str): Audit action name
+        resource_type (str): Audited resource type
+        resource_id_arg (str): View argument holding the resource ID (optional)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = view(*args, **kwargs)
+
+            status_code = response[1] if isinstance(response, tuple) else getattr(response, 'status_code', 200)
+            if status_code < 400:
+                record_audit(
+                    action,
+                    resource_type,
+                    kwargs.get(resource_id_arg) if resource_id_arg else None,
+                    ip_address=request.remote_addr,
+                    user_agent=request.headers.get('User-Agent')
+                )
+
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,716 @@
+import fcntl
+import glob
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, func, inspect, literal, select
+from src.models.user import db
+from src.models.report import AuditLog
+
+PARTITION_PREFIX = 'audit_logs_'
+PARTITION_PATTERN = re.compile(r'^audit_logs_(\d{4})(\d{2})$')
+ARCHIVE_FILE_PATTERN = re.compile(r'^audit_logs_(\d{4})(\d{2})\.v(\d+)\.jsonl\.gz$')
+ARCHIVE_FORMAT = 'audit-columnar-v1'
+
+# Low-cardinality string columns are stored as a value dictionary plus codes
+DICTIONARY_COLUMNS = ('action', 'resource_type', 'ip_address', 'user_agent')
+
+# Partition tables live outside db.metadata so db.create_all() never creates them
+partition_metadata = MetaData()
+_partition_tables = {}
+_known_partitions = set()
+
+# Next audit entry id, shared by partitions and the late table so an id identifies one entry everywhere
+id_sequence = Table(
+    'audit_log_id_sequence',
+    partition_metadata,
+    Column('name', String(50), primary_key=True),
+    Column('next_id', Integer, nullable=False)
+)
+ID_SEQUENCE_NAME = 'audit_logs'
+
+def month_key(timestamp):
+    """(year, month) of a datetime"""
+    return (timestamp.year, timestamp.month)
+
+def hot_cutoff(now=None, keep_months=None):
+    """Oldest month kept in partition tables; older months belong to the archive"""
+    keep_months = keep_months or int(os.getenv('AUDIT_HOT_MONTHS', '3'))
+    return _shift_month(month_key(now or datetime.utcnow()), -(keep_months - 1))
+
+def partition_name(month):
+    year, month_number = month
+    return f'{PARTITION_PREFIX}{year:04d}{month_number:02d}'
+
+def _audit_table(name):
+    table = _partition_tables.get(name)
+    if table is None:
+        # Same columns as AuditLog, without the foreign key so partitions can be archived and dropped on their own
+        table = Table(
+            name,
+            partition_metadata,
+            # Ids are assigned by allocate_ids, never by the table
+            *[
+                Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable, autoincrement=False)
+                for column in AuditLog.__table__.columns
+            ]
+        )
+        Index(f'ix_{name}_timestamp_id', table.c.timestamp, table.c.id)
+        Index(f'ix_{name}_user_id_timestamp', table.c.user_id, table.c.timestamp)
+        Index(f'ix_{name}_resource_timestamp', table.c.resource_type, table.c.resource_id, table.c.timestamp)
+        _partition_tables[name] = table
+    return table
+
+def partition_table(month):
+    """Table of one month of audit entries, indexed for compliance queries"""
+    return _audit_table(partition_name(month))
+
+def late_table():
+    """Entries that arrive for a month already outside the hot window, merged into the archive by the next run"""
+    return _audit_table(f'{PARTITION_PREFIX}late')
+
+def hot_partitions(connection):
+    """Months that have a partition table in the database, oldest first"""
+    months = []
+    for name in inspect(connection).get_table_names():
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append((int(match.group(1)), int(match.group(2))))
+    return sorted(months)
+
+def _ensure_table(connection, table):
+    if table.name not in _known_partitions:
+        table.create(connection, checkfirst=True)
+        _known_partitions.add(table.name)
+
+def allocate_ids(connection, count):
+    """
+    Reserve count consecutive audit entry ids
+
+    The sequence row stays locked until the transaction ends, so concurrent
+    writers take turns; an aborted transaction gives its ids back.
+
+    Args:
+        connection: SQLAlchemy connection inside a transaction
+        count (int): Number of ids
+
+    Returns:
+        range: The reserved ids
+    """
+    if not count:
+        return range(0)
+
+    _ensure_table(connection, id_sequence)
+    row = id_sequence.c.name == ID_SEQUENCE_NAME
+    if not connection.execute(id_sequence.update().where(row).values(next_id=id_sequence.c.next_id + count)).rowcount:
+        _seed_id_sequence(connection, count)
+    next_id = connection.execute(select(id_sequence.c.next_id).where(row)).scalar_one()
+    return range(next_id - count, next_id)
+
+def _seed_id_sequence(connection, reserved=0):
+    # Start above every stored id. A concurrent seeder makes one insert fail,
+    # and the audit writer retries that batch from its spool.
+    tables = set(inspect(connection).get_table_names())
+    audit_tables = [_audit_table(name) for name in tables if PARTITION_PATTERN.match(name) or name == late_table().name]
+    if AuditLog.__tablename__ in tables:
+        audit_tables.append(AuditLog.__table__)
+
+    last_id = max([connection.execute(select(func.max(table.c.id))).scalar() or 0 for table in audit_tables] or [0])
+    connection.execute(id_sequence.insert().values(name=ID_SEQUENCE_NAME, next_id=last_id + 1 + reserved))
+
+def write_entries(connection, entries, batch_size=500, cutoff=None):
+    """
+    Insert audit entries into the partitions of their months
+
+    Entries older than the hot window go to the late table instead, so a
+    partition is never recreated after it has been archived. Entries without
+    an id get one from allocate_ids; the dicts passed in are not changed.
+
+    Args:
+        connection: SQLAlchemy connection inside a transaction
+        entries (list): Dicts of AuditLog column values, with a timestamp
+        batch_size (int): Rows per multi-row INSERT
+        cutoff (tuple): Oldest hot (year, month) (defaults to hot_cutoff())
+    """
+    cutoff = cutoff or hot_cutoff()
+    new_ids = iter(allocate_ids(connection, sum(1 for entry in entries if entry.get('id') is None)))
+    by_table = {}
+    for entry in entries:
+        entry = dict(entry)
+        if entry.get('id') is None:
+            entry['id'] = next(new_ids)
+        if entry.get('timestamp') is None:
+            entry['timestamp'] = datetime.utcnow()
+        month = month_key(entry['timestamp'])
+        table = partition_table(month) if month >= cutoff else late_table()
+        by_table.setdefault(table, []).append(entry)
+
+    for table, table_entries in by_table.items():
+        _ensure_table(connection, table)
+        for start in range(0, len(table_entries), batch_size):
+            connection.execute(table.insert(), table_entries[start:start + batch_size])
+
+def migrate_legacy_audit_logs(connection, chunk_size=5000):
+    """
+    Move rows from the unpartitioned audit_logs table into monthly partitions, keeping their ids
+
+    MySQL commits DDL implicitly, so every table the rows can go to is
+    created before the first row is copied. The copy and the delete of the
+    legacy rows then share one transaction: a failed run copies nothing and
+    running it again copies every row exactly once.
+    """
+    legacy = AuditLog.__table__
+    cutoff = hot_cutoff()
+    first_timestamp, last_timestamp = connection.execute(
+        select(func.min(legacy.c.timestamp), func.max(legacy.c.timestamp))
+    ).one()
+
+    _ensure_table(connection, id_sequence)
+    _ensure_table(connection, late_table())
+    # Entries without a timestamp are stamped with the current month
+    month = max(month_key(first_timestamp), cutoff) if first_timestamp else cutoff
+    last_month = max(month_key(last_timestamp), month_key(datetime.utcnow())) if last_timestamp else month_key(datetime.utcnow())
+    while month <= last_month:
+        _ensure_table(connection, partition_table(month))
+        month = _shift_month(month, 1)
+
+    # New entries get ids above every legacy id
+    if connection.execute(select(id_sequence.c.name).where(id_sequence.c.name == ID_SEQUENCE_NAME)).first() is None:
+        _seed_id_sequence(connection)
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(legacy).where(legacy.c.id > last_id).order_by(legacy.c.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        last_id = rows[-1].id
+        write_entries(connection, [row._asdict() for row in rows], cutoff=cutoff)
+
+    connection.execute(legacy.delete())
+
+class AuditArchive:
+    """
+    Compressed columnar files of archived audit partitions, one per month
+
+    Each file is gzip-compressed JSON lines: a header line, then row groups of
+    up to row_group_size rows stored column by column, each with its min/max
+    timestamp so readers skip groups outside a range. manifest.json records
+    the current file of each month with row counts and min/max statistics.
+    """
+
+    def __init__(self, directory=None, row_group_size=50000):
+        self.directory = directory or os.getenv('AUDIT_ARCHIVE_DIR', os.path.join(os.getcwd(), 'audit_archive'))
+        self.row_group_size = row_group_size
+        self.manifest_path = os.path.join(self.directory, 'manifest.json')
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return {}
+
+    def archived_months(self):
+        return sorted(_parse_month_label(label) for label in self.manifest())
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock held while archiving, so concurrent archivers do not interleave"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'manifest.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def next_version(self, month):
+        return self.manifest().get(_month_label(month), {}).get('version', 0) + 1
+
+    def archive_path(self, month, version):
+        return os.path.join(self.directory, f'{partition_name(month)}.v{version}.jsonl.gz')
+
+    def ids_path(self, month, version):
+        return os.path.join(self.directory, f'{partition_name(month)}.v{version}.ids.gz')
+
+    def write(self, month, version, rows):
+        """
+        Write rows ordered by timestamp to a new archive file for a month
+
+        Rows are consumed one row group at a time, so a month never has to
+        fit in memory.
+
+        Args:
+            month (tuple): (year, month)
+            version (int): File version, from next_version()
+            rows (iterable): Dicts of AuditLog column values, ordered by timestamp
+
+        Returns:
+            dict: Manifest entry for the file
+        """
+        path = self.archive_path(month, version)
+        temp_path = f'{path}.tmp'
+        stats = _ArchiveStats()
+
+        with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=6) as archive_file:
+            archive_file.write(json.dumps({'format': ARCHIVE_FORMAT, 'month': _month_label(month)}) + '\n')
+            for group in _chunks(rows, self.row_group_size):
+                for row in group:
+                    stats.add(row)
+                archive_file.write(json.dumps(self._encode_group(group), separators=(',', ':')) + '\n')
+
+        _fsync_and_replace(temp_path, path)
+        return stats.entry(path, version)
+
+    def id_log(self, month, version):
+        """ArchivedIds recording the database rows written to a month's new archive file"""
+        return ArchivedIds(self.ids_path(month, version))
+
+    def read_ids(self, month, version):
+        """(table name, ids) chunks of the rows archived in a file version"""
+        with gzip.open(self.ids_path(month, version), 'rt', encoding='utf-8') as ids_file:
+            for line in ids_file:
+                chunk = json.loads(line)
+                yield chunk['table'], chunk['ids']
+
+    def commit(self, month, entry):
+        """Point the manifest at a month's new file and remove the files it replaces"""
+        manifest = self.manifest()
+        manifest[_month_label(month)] = entry
+        temp_path = f'{self.manifest_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+        # Id logs are only needed until the manifest points at their file
+        for path in glob.glob(os.path.join(self.directory, f'{partition_name(month)}.v*.ids.gz*')):
+            os.remove(path)
+        for path in glob.glob(os.path.join(self.directory, f'{partition_name(month)}.v*.jsonl.gz*')):
+            if os.path.basename(path) != entry['file']:
+                os.remove(path)
+
+    def discard(self, month, version):
+        """Remove an unreferenced file version and its id log"""
+        for path in (self.archive_path(month, version), self.ids_path(month, version)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def unreferenced_files(self):
+        """(month, version, path) of archive files the manifest does not point at"""
+        referenced = {entry['file'] for entry in self.manifest().values()}
+        files = []
+        for path in glob.glob(os.path.join(self.directory, f'{PARTITION_PREFIX}*.v*.gz*')):
+            name = os.path.basename(path)
+            match = ARCHIVE_FILE_PATTERN.match(name)
+            if name.endswith('.tmp'):
+                # Temporary file of an interrupted write
+                os.remove(path)
+            elif match is not None and name not in referenced:
+                files.append(((int(match.group(1)), int(match.group(2))), int(match.group(3)), path))
+        return files
+
+    def entry_for(self, month, version):
+        """Manifest entry of an existing file, computed by streaming its rows"""
+        stats = _ArchiveStats()
+        path = self.archive_path(month, version)
+        for row in self.read_file(path):
+            stats.add(row)
+        return stats.entry(path, version)
+
+    def read(self, month, start=None, end=None):
+        """
+        Rows of an archived month in timestamp order, with ISO timestamps
+
+        Args:
+            month (tuple): (year, month)
+            start (datetime): Inclusive lower timestamp bound (optional)
+            end (datetime): Exclusive upper timestamp bound (optional)
+        """
+        entry = self.manifest().get(_month_label(month))
+        if entry is None:
+            return iter(())
+        return self.read_file(os.path.join(self.directory, entry['file']), start, end)
+
+    def read_file(self, path, start=None, end=None):
+        start_text = _format_timestamp(start) if start else None
+        end_text = _format_timestamp(end) if end else None
+
+        with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+            archive_file.readline()
+            for line in archive_file:
+                group = json.loads(line)
+                if (start_text and group['max_timestamp'] < start_text) or (end_text and group['min_timestamp'] >= end_text):
+                    continue
+
+                columns = {name: self._decode_column(values) for name, values in group['columns'].items()}
+                names = list(columns)
+                for values in zip(*columns.values()):
+                    row = dict(zip(names, values))
+                    if (start_text and row['timestamp'] < start_text) or (end_text and row['timestamp'] >= end_text):
+                        continue
+                    yield row
+
+    def _encode_group(self, rows):
+        columns = {}
+        for column in AuditLog.__table__.columns:
+            values = [row[column.name] for row in rows]
+            if column.name == 'timestamp':
+                values = [_format_timestamp(value) for value in values]
+            if column.name in DICTIONARY_COLUMNS:
+                dictionary = {}
+                codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+                values = {'dictionary': list(dictionary), 'codes': codes}
+            columns[column.name] = values
+
+        return {
+            'rows': len(rows),
+            'min_timestamp': min(columns['timestamp']),
+            'max_timestamp': max(columns['timestamp']),
+            'columns': columns
+        }
+
+    def _decode_column(self, values):
+        if isinstance(values, dict):
+            dictionary = values['dictionary']
+            return [dictionary[code] for code in values['codes']]
+        return values
+
+class ArchivedIds:
+    """
+    Ids of the database rows written to an archive file, kept next to it
+
+    The archiver deletes exactly these ids once the file is complete. The
+    log is renamed into place only after the archive file, so an archive
+    file without its log was never followed by a delete.
+    """
+
+    def __init__(self, path, chunk_size=5000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._temp_path = f'{path}.tmp'
+        self._file = gzip.open(self._temp_path, 'wt', encoding='utf-8', compresslevel=1)
+        self._pending = {}
+
+    def track(self, table_name, rows):
+        """Pass rows through, recording their ids under the table name"""
+        for row in rows:
+            pending = self._pending.setdefault(table_name, [])
+            pending.append(row['id'])
+            if len(pending) >= self.chunk_size:
+                self._write(table_name)
+            yield row
+
+    def close(self):
+        """Make the log durable and visible; call after the archive file is in place"""
+        for table_name in list(self._pending):
+            self._write(table_name)
+        self._file.close()
+        _fsync_and_replace(self._temp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._temp_path)
+
+    def _write(self, table_name):
+        ids = self._pending.pop(table_name)
+        if ids:
+            self._file.write(json.dumps({'table': table_name, 'ids': ids}, separators=(',', ':')) + '\n')
+
+class _ArchiveStats:
+    """Row count and min/max statistics of an archive file, accumulated row by row"""
+
+    def __init__(self):
+        self.rows = 0
+        self.min_timestamp = self.max_timestamp = None
+        self.min_user_id = self.max_user_id = None
+        self.resource_types = set()
+
+    def add(self, row):
+        timestamp = _format_timestamp(row['timestamp'])
+        self.rows += 1
+        self.min_timestamp = timestamp if self.min_timestamp is None else min(self.min_timestamp, timestamp)
+        self.max_timestamp = timestamp if self.max_timestamp is None else max(self.max_timestamp, timestamp)
+        if row['user_id'] is not None:
+            self.min_user_id = row['user_id'] if self.min_user_id is None else min(self.min_user_id, row['user_id'])
+            self.max_user_id = row['user_id'] if self.max_user_id is None else max(self.max_user_id, row['user_id'])
+        self.resource_types.add(row['resource_type'])
+
+    def entry(self, path, version):
+        checksum = hashlib.sha256()
+        with open(path, 'rb') as archive_file:
+            for block in iter(lambda: archive_file.read(1 << 20), b''):
+                checksum.update(block)
+
+        return {
+            'version': version,
+            'file': os.path.basename(path),
+            'sha256': checksum.hexdigest(),
+            'rows': self.rows,
+            'min_timestamp': self.min_timestamp,
+            'max_timestamp': self.max_timestamp,
+            'min_user_id': self.min_user_id,
+            'max_user_id': self.max_user_id,
+            'resource_types': sorted(self.resource_types)
+        }
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _fsync_and_replace(temp_path, path):
+    with open(temp_path, 'rb') as written_file:
+        os.fsync(written_file.fileno())
+    os.replace(temp_path, path)
+
+def _month_label(month):
+    return f'{month[0]:04d}-{month[1]:02d}'
+
+def _parse_month_label(label):
+    year, month = label.split('-')
+    return (int(year), int(month))
+
+def _format_timestamp(value):
+    # Fixed width, so archived timestamps compare correctly as strings
+    if isinstance(value, str):
+        return value
+    return value.isoformat(timespec='microseconds') if value else None
+
+def _shift_month(month, months):
+    index = month[0] * 12 + month[1] - 1 + months
+    return (index // 12, index % 12 + 1)
+
+def _month_range(month):
+    """[start, end) datetimes of a month"""
+    return datetime(month[0], month[1], 1), datetime(*_shift_month(month, 1), 1)
+
+def archive_partitions(keep_months=None, archive=None, engine=None, now=None):
+    """
+    Move months older than the hot window into the compressed archive
+
+    For each month the archiver streams the previous archive file (if any),
+    the partition rows and the month's late rows, each already ordered by
+    timestamp, into a new file, recording the id of every database row it
+    writes. It then deletes exactly those ids in one transaction, points the
+    manifest at the new file and drops the partition once it is empty. Rows
+    committed while the month was being read are not in the file, so they
+    stay in the database for the next run. A file left unreferenced by an
+    interrupted run is adopted if its rows were already deleted and
+    discarded otherwise, so no row is lost or counted twice.
+
+    Args:
+        keep_months (int): Months kept hot, including the current one (default AUDIT_HOT_MONTHS or 3)
+        archive (AuditArchive): Archive to write to (optional)
+        engine: SQLAlchemy engine (defaults to db.engine of the current app)
+        now (datetime): Reference time (optional)
+
+    Returns:
+        list: (year, month) of the months archived by this run
+    """
+    archive = archive or AuditArchive()
+    engine = engine or db.engine
+    cutoff = hot_cutoff(now, keep_months)
+    late = late_table()
+
+    archived = []
+    with archive.lock():
+        with engine.begin() as connection:
+            _ensure_table(connection, late)
+            hot = set(hot_partitions(connection))
+            first_late, last_late = connection.execute(select(func.min(late.c.timestamp), func.max(late.c.timestamp))).one()
+
+        late_months = set()
+        if first_late is not None:
+            month = month_key(first_late)
+            while month <= month_key(last_late):
+                late_months.add(month)
+                month = _shift_month(month, 1)
+
+        _recover_interrupted(archive, engine)
+
+        for month in sorted(month for month in hot | late_months if month < cutoff):
+            if _archive_month(archive, engine, month, hot):
+                archived.append(month)
+
+    return archived
+
+def _archive_month(archive, engine, month, hot):
+    table = partition_table(month)
+    late = late_table()
+    month_start, month_end = _month_range(month)
+
+    if month not in hot:
+        with engine.connect() as connection:
+            late_filter = (late.c.timestamp >= month_start) & (late.c.timestamp < month_end)
+            if connection.execute(select(late.c.id).where(late_filter).limit(1)).first() is None:
+                return False
+
+    version = archive.next_version(month)
+    id_log = archive.id_log(month, version)
+    try:
+        sources = [archive.read(month)]
+        if month in hot:
+            sources.append(id_log.track(table.name, _streamed_rows(engine, table, None, None, {})))
+        sources.append(id_log.track(late.name, _streamed_rows(engine, late, month_start, month_end, {})))
+        entry = archive.write(month, version, heapq.merge(*sources, key=lambda row: row['timestamp']))
+    except BaseException:
+        id_log.abort()
+        archive.discard(month, version)
+        raise
+    id_log.close()
+
+    with engine.begin() as connection:
+        _delete_archived(connection, archive, month, version)
+
+    archive.commit(month, entry)
+
+    if month in hot:
+        with engine.begin() as connection:
+            if connection.execute(select(func.count()).select_from(table)).scalar() == 0:
+                table.drop(connection)
+                _known_partitions.discard(table.name)
+
+    return True
+
+def _delete_archived(connection, archive, month, version):
+    for table_name, ids in archive.read_ids(month, version):
+        table = _audit_table(table_name)
+        connection.execute(table.delete().where(table.c.id.in_(ids)))
+
+def _archived_rows_remain(connection, archive, month, version):
+    # The delete runs in one transaction, so the first id of each table tells whether it happened
+    tables = set(inspect(connection).get_table_names())
+    checked = set()
+    for table_name, ids in archive.read_ids(month, version):
+        if table_name in checked or table_name not in tables:
+            continue
+        checked.add(table_name)
+        table = _audit_table(table_name)
+        if connection.execute(select(table.c.id).where(table.c.id == ids[0])).first():
+            return True
+    return False
+
+def _recover_interrupted(archive, engine):
+    manifest = archive.manifest()
+    with engine.begin() as connection:
+        for month, version, path in archive.unreferenced_files():
+            current_version = manifest.get(_month_label(month), {}).get('version', 0)
+            interrupted_before_delete = (
+                version <= current_version
+                or not os.path.exists(archive.ids_path(month, version))
+                or _archived_rows_remain(connection, archive, month, version)
+            )
+
+            if interrupted_before_delete:
+                # The rows are still in the database, the month is archived again
+                archive.discard(month, version)
+                continue
+
+            # Stopped after the archived rows were deleted, the file is the month's archive
+            archive.commit(month, archive.entry_for(month, version))
+
+def iter_audit_logs(start=None, end=None, user_id=None, resource_type=None, resource_id=None, action=None, archive=None):
+    """
+    Audit entries in a time range across hot partitions, late rows and the archive
+
+    Args:
+        start (datetime): Inclusive lower timestamp bound (optional)
+        end (datetime): Exclusive upper timestamp bound (optional)
+        user_id (int): Only entries of this user (optional)
+        resource_type (str): Only entries for this resource type (optional)
+        resource_id (int): Only entries for this resource ID (optional)
+        action (str): Only entries with this action (optional)
+        archive (AuditArchive): Archive to read (optional)
+
+    Yields:
+        dict: Entries shaped like AuditLog.to_dict() ordered by timestamp, with
+            microsecond ISO timestamps. IDs are unique across partitions, late rows and the archive.
+    """
+    archive = archive or AuditArchive()
+    manifest = archive.manifest()
+    filters = {'user_id': user_id, 'resource_type': resource_type, 'resource_id': resource_id, 'action': action}
+    filters = {name: value for name, value in filters.items() if value is not None}
+
+    # Route like any SELECT, so read_only requests read partitions from a replica
+    engine = db.session.get_bind(clause=select(literal(1)))
+    with engine.connect() as connection:
+        tables = set(inspect(connection).get_table_names())
+        hot = set(hot_partitions(connection))
+
+    months = sorted(hot | set(archive.archived_months()))
+    if start:
+        months = [month for month in months if month >= month_key(start)]
+    if end:
+        months = [month for month in months if month <= month_key(end)]
+
+    def partitioned_rows():
+        for month in months:
+            sources = []
+
+            entry = manifest.get(_month_label(month))
+            if entry and _archive_may_match(entry, start, end, filters):
+                sources.append(
+                    row for row in archive.read(month, start, end)
+                    if all(row[name] == value for name, value in filters.items())
+                )
+
+            if month in hot:
+                sources.append(_streamed_rows(engine, partition_table(month), start, end, filters))
+
+            # A month stays in its partition until its archived rows are deleted, so sources never overlap
+            yield from heapq.merge(*sources, key=lambda row: row['timestamp'])
+
+    sources = [partitioned_rows()]
+    if late_table().name in tables:
+        sources.append(_streamed_rows(engine, late_table(), start, end, filters))
+
+    yield from heapq.merge(*sources, key=lambda row: row['timestamp'])
+
+def _archive_may_match(entry, start, end, filters):
+    if not entry['rows']:
+        return False
+    if start and entry['max_timestamp'] < _format_timestamp(start):
+        return False
+    if end and entry['min_timestamp'] >= _format_timestamp(end):
+        return False
+    if 'resource_type' in filters and filters['resource_type'] not in entry['resource_types']:
+        return False
+    if 'user_id' in filters:
+        if entry['min_user_id'] is None or not entry['min_user_id'] <= filters['user_id'] <= entry['max_user_id']:
+            return False
+    return True
+
+def _streamed_rows(engine, table, start, end, filters):
+    # One connection per stream: server-side cursors cannot share a connection,
+    # and partition and late table streams are read side by side
+    with engine.connect() as connection:
+        yield from _table_rows(connection, table, start, end, filters)
+
+def _table_rows(connection, table, start, end, filters):
+    query = select(table).order_by(table.c.timestamp, table.c.id)
+    if start:
+        query = query.where(table.c.timestamp >= start)
+    if end:
+        query = query.where(table.c.timestamp < end)
+    for name, value in filters.items():
+        query = query.where(table.c[name] == value)
+
+    for row in connection.execute(query.execution_options(yield_per=1000)):
+        values = row._asdict()
+        values['timestamp'] = _format_timestamp(values['timestamp'])
+        yield values
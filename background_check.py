@@ -9,7 +9,8 @@ class BackgroundCheck(db.Model):
     candidate_id = db.Column(db.Integer, db.ForeignKey('candidates.id'), nullable=False)
     requester_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     check_type = db.Column(db.String(100), nullable=False)  # 'standard', 'comprehensive', 'basic'
-    status = db.Column(db.String(50), default='pending')  # 'pending', 'in_progress', 'completed', 'failed'
+    # active_history loads the previous status on assignment so dashboard stats see every transition
+    status = db.column_property(db.Column(db.String(50), default='pending'), active_history=True)  # 'pending', 'in_progress', 'completed', 'failed'
     priority = db.Column(db.String(20), default='normal')  # 'low', 'normal', 'high', 'urgent'
     consent_given = db.Column(db.Boolean, default=False)
     consent_date = db.Column(db.DateTime, nullable=True)
@@ -24,6 +25,13 @@ class BackgroundCheck(db.Model):
     criminal_checks = db.relationship('CriminalCheck', backref='background_check', lazy=True, cascade='all, delete-orphan')
     credit_checks = db.relationship('CreditCheck', backref='background_check', lazy=True, cascade='all, delete-orphan')
     
+    # Keyset pagination indexes: (created_at, id) ordering, optionally behind an equality filter
+    __table_args__ = (
+        db.Index('ix_background_checks_created_at_id', 'created_at', 'id'),
+        db.Index('ix_background_checks_status_created_at_id', 'status', 'created_at', 'id'),
+        db.Index('ix_background_checks_priority_created_at_id', 'priority', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<BackgroundCheck {self.id} - {self.status}>'
     
@@ -58,6 +66,13 @@ class VerificationResult(db.Model):
     verification_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Results of a check, grouped by type and status for workflow status
+        db.Index('ix_verification_results_bg_type_status', 'background_check_id', 'verification_type', 'status'),
+        # Verification history of a single record, newest first
+        db.Index('ix_verification_results_type_record_created_at', 'verification_type', 'record_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<VerificationResult {self.verification_type} - {self.status}>'
     
@@ -89,6 +104,16 @@ class CriminalCheck(db.Model):
     record_details = db.Column(db.Text, nullable=True)
     search_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    batch_token = db.Column(db.String(32), nullable=True)  # Set by bulk inserts, which read their rows' IDs back by it
+    
+    __table_args__ = (
+        # Covers the status/result aggregate of get_criminal_check_status
+        db.Index('ix_criminal_checks_bg_status_result', 'background_check_id', 'status', 'result', 'records_found'),
+        # Criminal checks of a background check in creation order
+        db.Index('ix_criminal_checks_bg_created_at', 'background_check_id', 'created_at'),
+        # Rows of one bulk insert
+        db.Index('ix_criminal_checks_batch_token', 'batch_token'),
+    )
     
     def __repr__(self):
         return f'<CriminalCheck {self.jurisdiction} - {self.status}>'
@@ -123,6 +148,10 @@ class CreditCheck(db.Model):
     report_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_credit_checks_background_check_id', 'background_check_id'),
+    )
+    
     def __repr__(self):
         return f'<CreditCheck {self.credit_score} - {self.status}>'
     
@@ -0,0 +1,177 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from sqlalchemy import func, select, text
+from src.models.user import User, db
+from src.models.candidate import Candidate, EducationRecord, EmploymentRecord
+from src.models.background_check import BackgroundCheck, VerificationResult, CriminalCheck, CreditCheck
+from src.models.report import Report
+from src.migrations import upgrade
+
+INDEXED_MODELS = [Candidate, EducationRecord, EmploymentRecord, BackgroundCheck, VerificationResult, CriminalCheck, CreditCheck, Report]
+
+def create_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def create_unindexed_schema(connection):
+    """Create the tables as an older db.create_all() would have, without secondary indexes"""
+    db.metadata.create_all(connection)
+    for model in INDEXED_MODELS:
+        for index in model.__table__.indexes:
+            index.drop(connection)
+
+def seed(connection, checks):
+    """Insert `checks` background checks with their candidates, records and results"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+
+    connection.execute(User.__table__.insert(), [{'id': 1, 'username': 'benchmark', 'email': 'benchmark@example.com'}])
+
+    candidates, education, employment, background_checks = [], [], [], []
+    verifications, criminal, credit, reports = [], [], [], []
+
+    for i in range(1, checks + 1):
+        created_at = start + timedelta(minutes=i)
+        candidates.append({'id': i, 'first_name': 'First', 'last_name': f'Last{i}', 'email': f'candidate{i}@example.com', 'created_at': created_at})
+        education.append({'id': i, 'candidate_id': i, 'institution_name': 'Stanford University', 'created_at': created_at})
+        employment.append({'id': i, 'candidate_id': i, 'company_name': 'Google', 'job_title': 'Engineer', 'start_date': start.date(), 'created_at': created_at})
+        background_checks.append({
+            'id': i,
+            'candidate_id': i,
+            'requester_id': 1,
+            'check_type': 'comprehensive',
+            'status': rng.choice(['pending', 'in_progress', 'completed', 'failed']),
+            'priority': rng.choice(['low', 'normal', 'high', 'urgent']),
+            'created_at': created_at
+        })
+
+        for verification_type in ('education', 'employment'):
+            verifications.append({
+                'background_check_id': i,
+                'verification_type': verification_type,
+                'record_id': i,
+                'status': rng.choice(['verified', 'failed', 'pending']),
+                'created_at': created_at
+            })
+
+        for jurisdiction, check_type in (('Cook County', 'county'), ('Illinois', 'state'), ('Federal', 'federal'), ('National', 'sex_offender')):
+            criminal.append({
+                'background_check_id': i,
+                'jurisdiction': jurisdiction,
+                'check_type': check_type,
+                'status': 'completed',
+                'result': rng.choice(['clear', 'clear', 'clear', 'records_found']),
+                'records_found': rng.random() < 0.1,
+                'created_at': created_at
+            })
+
+        credit.append({'background_check_id': i, 'status': 'completed', 'created_at': created_at})
+        reports.append({'background_check_id': i, 'report_type': 'comprehensive', 'created_at': created_at})
+
+    for model, rows in (
+        (Candidate, candidates), (EducationRecord, education), (EmploymentRecord, employment),
+        (BackgroundCheck, background_checks), (VerificationResult, verifications),
+        (CriminalCheck, criminal), (CreditCheck, credit), (Report, reports)
+    ):
+        connection.execute(model.__table__.insert(), rows)
+
+def hot_queries(checks):
+    """The filters the services run per request, for an ID in the middle of the data"""
+    target = checks // 2
+    return [
+        ('verification results of a check', select(VerificationResult).where(
+            VerificationResult.background_check_id == target
+        )),
+        ('verification status counts', select(
+            VerificationResult.verification_type, VerificationResult.status, func.count(VerificationResult.id)
+        ).where(
+            VerificationResult.background_check_id == target
+        ).group_by(VerificationResult.verification_type, VerificationResult.status)),
+        ('employment verification history', select(VerificationResult).where(
+            VerificationResult.verification_type == 'employment',
+            VerificationResult.record_id == target
+        ).order_by(VerificationResult.created_at.desc())),
+        ('criminal check status aggregate', select(
+            CriminalCheck.status, CriminalCheck.result, CriminalCheck.records_found, func.count(CriminalCheck.id)
+        ).where(
+            CriminalCheck.background_check_id == target
+        ).group_by(CriminalCheck.status, CriminalCheck.result, CriminalCheck.records_found)),
+        ('criminal checks page', select(CriminalCheck).where(
+            CriminalCheck.background_check_id == target
+        ).order_by(CriminalCheck.id).limit(50)),
+        ('credit checks of a check', select(CreditCheck).where(CreditCheck.background_check_id == target)),
+        ('education records of a candidate', select(EducationRecord).where(EducationRecord.candidate_id == target)),
+        ('employment records of a candidate', select(EmploymentRecord).where(EmploymentRecord.candidate_id == target)),
+        ('latest reports of a check', select(Report).where(
+            Report.background_check_id == target
+        ).order_by(Report.created_at.desc())),
+        ('background checks by status', select(BackgroundCheck).where(
+            BackgroundCheck.status == 'pending'
+        ).order_by(BackgroundCheck.created_at.desc(), BackgroundCheck.id.desc()).limit(50))
+    ]
+
+def measure(connection, queries, repeat):
+    """Return {name: (query plan, mean milliseconds)}"""
+    results = {}
+    for name, statement in queries:
+        sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+        plan = [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(text(sql)).fetchall()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+        results[name] = (plan, elapsed_ms)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Show query plans of the hot query paths before and after the index migrations')
+    parser.add_argument('--checks', type=int, default=20000, help='Number of background checks to generate')
+    parser.add_argument('--repeat', type=int, default=20, help='Executions per query when timing')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(os.path.join(directory, 'benchmark.db'))
+
+        with app.app_context():
+            with db.engine.begin() as connection:
+                create_unindexed_schema(connection)
+                seed(connection, args.checks)
+
+            queries = hot_queries(args.checks)
+            with db.engine.connect() as connection:
+                before = measure(connection, queries, args.repeat)
+
+            applied = upgrade(db.engine)
+            with db.engine.begin() as connection:
+                connection.execute(text('ANALYZE'))
+
+            with db.engine.connect() as connection:
+                after = measure(connection, queries, args.repeat)
+
+            db.engine.dispose()
+
+    print(f"Applied migrations: {', '.join(applied) or 'none'}")
+    print(f'{args.checks} background checks, mean of {args.repeat} runs\n')
+    for name, _ in queries:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        print(name)
+        print(f'  before ({ms_before:.3f} ms): {"; ".join(plan_before)}')
+        print(f'  after  ({ms_after:.3f} ms): {"; ".join(plan_after)}')
+
+if __name__ == '__main__':
+    main()
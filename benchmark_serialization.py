@@ -0,0 +1,115 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import Flask
+from src.models.user import User, db
+from src.models.candidate import Candidate, EmploymentRecord
+from src.models.background_check import BackgroundCheck
+from src.services.serialization import dumps, get_serializer
+
+def create_app(database_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+def seed(connection, count):
+    start = datetime(2024, 1, 1)
+    connection.execute(User.__table__.insert(), [{'id': 1, 'username': 'benchmark', 'email': 'benchmark@example.com'}])
+    connection.execute(Candidate.__table__.insert(), [
+        {
+            'id': i,
+            'first_name': 'First',
+            'last_name': f'Last{i}',
+            'email': f'candidate{i}@example.com',
+            'date_of_birth': (start - timedelta(days=10000 + i)).date(),
+            'address_line1': f'{i} Main Street',
+            'city': 'Springfield',
+            'state': 'IL',
+            'created_at': start + timedelta(seconds=i),
+            'updated_at': start + timedelta(seconds=i)
+        }
+        for i in range(1, count + 1)
+    ])
+    connection.execute(BackgroundCheck.__table__.insert(), [
+        {
+            'id': i,
+            'candidate_id': i,
+            'requester_id': 1,
+            'check_type': 'standard',
+            'status': 'completed',
+            'consent_given': True,
+            'consent_date': start,
+            'created_at': start + timedelta(seconds=i)
+        }
+        for i in range(1, count + 1)
+    ])
+    connection.execute(EmploymentRecord.__table__.insert(), [
+        {
+            'candidate_id': i,
+            'company_name': 'Google',
+            'job_title': 'Engineer',
+            'salary': Decimal('0.00') if i % 10 == 0 else Decimal('123456.78'),
+            'created_at': start + timedelta(seconds=i)
+        }
+        for i in range(1, count + 1)
+    ])
+
+def measure(fn):
+    """Return (result, seconds, peak traced bytes)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare to_dict() serialization with the column-projected serializers')
+    parser.add_argument('--rows', type=int, default=20000, help='Rows per model')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(os.path.join(directory, 'benchmark.db'))
+
+        with app.app_context():
+            db.create_all()
+            with db.engine.begin() as connection:
+                seed(connection, args.rows)
+
+            print(f'{args.rows} rows per model')
+            for model in (Candidate, BackgroundCheck, EmploymentRecord):
+                serializer = get_serializer(model)
+
+                def orm_path():
+                    db.session.expunge_all()
+                    return json.dumps([row.to_dict() for row in model.query.order_by(model.id).all()]).encode('utf-8')
+
+                def projected_path():
+                    return dumps(serializer.encode_all(serializer.select(model.query).order_by(model.id).all()))
+
+                orm_body, orm_seconds, orm_peak = measure(orm_path)
+                projected_body, projected_seconds, projected_peak = measure(projected_path)
+
+                assert json.loads(orm_body) == json.loads(projected_body), f'{model.__name__} output differs from to_dict()'
+
+                print(f'{model.__name__}')
+                print(f'  to_dict + json: {orm_seconds * 1000:8.1f} ms, peak {orm_peak / 1024 / 1024:6.1f} MiB')
+                print(f'  projected:      {projected_seconds * 1000:8.1f} ms, peak {projected_peak / 1024 / 1024:6.1f} MiB')
+
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    main()
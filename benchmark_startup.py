@@ -0,0 +1,118 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+# Modules the app should not need until a request uses them
+HEAVY_MODULES = ('numpy', 'reportlab', 'requests')
+
+UPGRADE_SCRIPT = '''
+from src.main import app
+from src.migrations import upgrade
+with app.app_context():
+    upgrade()
+'''
+
+MEASURE_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - started,
+    'first_request_s': served - imported,
+    'status': response.status_code,
+    'modules': len(sys.modules),
+    'heavy_modules': [name for name in %r if name in sys.modules]
+}))
+''' % (HEAVY_MODULES,)
+
+def run_python(code, env, *args):
+    return subprocess.run(
+        [sys.executable, '-c', code, *args],
+        env=env, check=True, capture_output=True, text=True
+    )
+
+def measure(env, path):
+    """One cold start in a fresh interpreter"""
+    started = time.perf_counter()
+    result = run_python(MEASURE_SCRIPT, env, path)
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['process_s'] = time.perf_counter() - started
+    return sample
+
+def slowest_imports(env, limit):
+    """Modules with the highest cumulative import time, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.main'],
+        env=env, check=True, capture_output=True, text=True
+    )
+
+    timings = []
+    for line in result.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <module>", after one header line
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        timings.append((int(cumulative), module.strip()))
+
+    return sorted(timings, reverse=True)[:limit]
+
+def summarize(samples, key):
+    values = [sample[key] * 1000 for sample in samples]
+    return {'median_ms': statistics.median(values), 'min_ms': min(values), 'max_ms': max(values)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure app import time and time to first request')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts to measure')
+    parser.add_argument('--path', default='/api/verification/cache/stats', help='Path of the first request')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(filter(None, [sys.path[0], os.environ.get('PYTHONPATH')])),
+            FLASK_SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'startup.db')}",
+            AUDIT_SPOOL_DIR=os.path.join(directory, 'audit_spool')
+        )
+        run_python(UPGRADE_SCRIPT, env)
+
+        samples = [measure(env, args.path) for _ in range(args.runs)]
+        summary = {
+            'runs': args.runs,
+            'path': args.path,
+            'status': samples[-1]['status'],
+            'modules': samples[-1]['modules'],
+            'heavy_modules': samples[-1]['heavy_modules'],
+            'import': summarize(samples, 'import_s'),
+            'first_request': summarize(samples, 'first_request_s'),
+            'process': summarize(samples, 'process_s'),
+            'slowest_imports': [{'module': module, 'cumulative_ms': us / 1000} for us, module in slowest_imports(env, args.top)]
+        }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{args.runs} cold starts, first request GET {args.path} -> {summary['status']}")
+    for label, key in (('import src.main', 'import'), ('first request', 'first_request'), ('whole process', 'process')):
+        timing = summary[key]
+        print(f"  {label:16} median {timing['median_ms']:8.1f} ms  (min {timing['min_ms']:.1f}, max {timing['max_ms']:.1f})")
+    print(f"  modules loaded: {summary['modules']}, heavy modules loaded: {', '.join(summary['heavy_modules']) or 'none'}")
+    print('Slowest imports (cumulative)')
+    for timing in summary['slowest_imports']:
+        print(f"  {timing['cumulative_ms']:8.1f} ms  {timing['module']}")
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,11 @@ class Candidate(db.Model):
     education_records = db.relationship('EducationRecord', backref='candidate', lazy=True, cascade='all, delete-orphan')
     employment_records = db.relationship('EmploymentRecord', backref='candidate', lazy=True, cascade='all, delete-orphan')
     
+    # Keyset pagination index for (created_at, id) ordering
+    __table_args__ = (
+        db.Index('ix_candidates_created_at_id', 'created_at', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Candidate {self.first_name} {self.last_name}>'
     
@@ -64,6 +69,10 @@ class EducationRecord(db.Model):
     verification_notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_education_records_candidate_id', 'candidate_id'),
+    )
+    
     def __repr__(self):
         return f'<EducationRecord {self.institution_name} - {self.degree_type}>'
     
@@ -101,6 +110,10 @@ class EmploymentRecord(db.Model):
     verification_notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_employment_records_candidate_id', 'candidate_id'),
+    )
+    
     def __repr__(self):
         return f'<EmploymentRecord {self.company_name} - {self.job_title}>'
     
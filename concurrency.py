@@ -0,0 +1,49 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from src.models.user import db
+from src.services.profiler import attach_run, current_run
+
+# Marks AppContextExecutor threads, whose tasks already hold a session of their own
+_pool_thread = threading.local()
+
+class AppContextExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks each run inside their own Flask application context"""
+
+    def __init__(self, max_workers=None, app=None, thread_name_prefix=''):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        # Capture the real app object so worker threads can push their own context
+        self.app = app or current_app._get_current_object()
+
+    def submit(self, fn, *args, **kwargs):
+        # Statements of the task count towards the submitter's profile run, if it is profiled
+        return super().submit(self._run_in_app_context, current_run(), fn, *args, **kwargs)
+
+    def _run_in_app_context(self, profile_run, fn, *args, **kwargs):
+        """Run a task with a dedicated app context, and therefore a dedicated DB session"""
+        _pool_thread.active = True
+        with self.app.app_context(), attach_run(profile_run):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                db.session.remove()
+
+def in_pool_thread():
+    """
+    Whether the caller runs as an AppContextExecutor task
+
+    Nested pools multiply the connections held at once: the outer task keeps
+    its connection while inner tasks wait for theirs. Fan-out code should run
+    inline when this is true.
+    """
+    return getattr(_pool_thread, 'active', False)
+
+def get_pool_size(env_var, default):
+    """Read a worker pool size from the environment, falling back to a default"""
+    try:
+        size = int(os.getenv(env_var, default))
+    except ValueError:
+        size = default
+
+    return max(1, size)
@@ -0,0 +1,199 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta
+from flask import has_app_context
+from sqlalchemy import func, select
+from src.models.user import db
+from src.models.report import Configuration
+
+logger = logging.getLogger(__name__)
+
+class ConfigService:
+    """
+    In-process snapshot of Configuration rows with typed values
+
+    Settings are declared with a default whose type decides how the stored
+    text is parsed: dicts and lists are JSON (dicts are deep-merged over the
+    default, so a row may override a single nested value), bools accept
+    true/false/1/0, ints and floats are cast, strings are used as is. Rows
+    that fail to parse are logged and the default is kept.
+
+    refresh() probes max(updated_at) and the row count, at most once per
+    refresh_interval seconds, and reloads only when they changed. Subscribers
+    of a changed key are called with its new value. updated_at has one-second
+    resolution, so while the newest row is less than settle_seconds old the
+    probe result is not trusted and the next refresh reloads anyway; a second
+    write in the same second is therefore picked up one refresh later, as long
+    as the clocks of the writing hosts are within settle_seconds.
+    """
+
+    def __init__(self, refresh_interval=None, settle_seconds=5):
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv('CONFIG_REFRESH_INTERVAL', '30'))
+        self.settle_seconds = settle_seconds
+        self._defaults = {}
+        self._rows = {}
+        self._snapshot = {}
+        self._version = None
+        self._checked_at = None
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def setting(self, key, default):
+        """
+        Declare a setting (once) and return its current value
+
+        Args:
+            key (str): Configuration key, e.g. 'workflow.step_times'
+            default: Value used when no row exists, also fixes the setting's type
+
+        Returns:
+            A copy of the current value, safe to mutate
+        """
+        with self._lock:
+            if key not in self._defaults:
+                self._defaults[key] = default
+                self._snapshot[key] = self._parse(key, self._rows.get(key))
+            return copy.deepcopy(self._snapshot[key])
+
+    def get(self, key):
+        """Current value of a declared setting"""
+        return copy.deepcopy(self._snapshot[key])
+
+    def subscribe(self, key, callback):
+        """
+        Call callback(value) whenever the value of a setting changes
+
+        Bound methods are held weakly, so subscribing a service instance does
+        not keep it alive. References of collected instances are dropped on
+        the next subscribe to the same key, so services built per job do not
+        accumulate.
+        """
+        reference = weakref.WeakMethod(callback) if hasattr(callback, '__self__') else (lambda: callback)
+        with self._lock:
+            live = [existing for existing in self._subscribers.get(key, ()) if existing() is not None]
+            live.append(reference)
+            self._subscribers[key] = live
+
+    def refresh(self, force=False):
+        """
+        Reload the snapshot if Configuration rows changed
+
+        Cheap enough for every request: returns at once when the last probe is
+        recent or another thread is already refreshing.
+
+        Returns:
+            list: Keys whose value changed
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return []
+        if not self._refresh_lock.acquire(blocking=force):
+            return []
+
+        try:
+            self._checked_at = now
+            version = tuple(db.session.execute(
+                select(func.max(Configuration.updated_at), func.count(Configuration.id))
+            ).one())
+            if version == self._version and not force:
+                return []
+
+            rows = {
+                key: value for key, value, is_encrypted in
+                db.session.execute(select(Configuration.key, Configuration.value, Configuration.is_encrypted))
+                if not is_encrypted
+            }
+            changed = self._apply(rows)
+            newest = version[0]
+            settling = newest is not None and newest >= datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+            # A later write in the same second as the newest row would not change the probe
+            self._version = None if settling else version
+        except Exception:
+            logger.exception('Failed to refresh configuration')
+            return []
+        finally:
+            self._refresh_lock.release()
+
+        self._notify(changed)
+        return changed
+
+    def init_app(self, app):
+        """Refresh the snapshot before each request; the first request loads it"""
+        @app.before_request
+        def refresh_configuration():
+            self.refresh()
+
+    def _apply(self, rows):
+        with self._lock:
+            snapshot = {key: self._parse(key, rows.get(key)) for key in self._defaults}
+            changed = [key for key in self._defaults if snapshot[key] != self._snapshot.get(key)]
+            self._rows = rows
+            self._snapshot = snapshot
+        return changed
+
+    def _notify(self, keys):
+        for key in keys:
+            with self._lock:
+                references = list(self._subscribers.get(key, ()))
+                # Drop callbacks of collected subscribers
+                self._subscribers[key] = [reference for reference in references if reference() is not None]
+
+            for reference in references:
+                callback = reference()
+                if callback is None:
+                    continue
+                try:
+                    callback(self.get(key))
+                except Exception:
+                    logger.exception('Configuration subscriber for %s failed', key)
+
+    def _parse(self, key, text):
+        default = self._defaults[key]
+        if text is None:
+            return copy.deepcopy(default)
+
+        try:
+            if isinstance(default, bool):
+                if text.strip().lower() not in ('1', '0', 'true', 'false', 'yes', 'no'):
+                    raise ValueError(text)
+                return text.strip().lower() in ('1', 'true', 'yes')
+            if isinstance(default, (int, float)):
+                return type(default)(text)
+            if isinstance(default, dict):
+                value = json.loads(text)
+                if not isinstance(value, dict):
+                    raise ValueError('expected a JSON object')
+                return _deep_merge(default, value)
+            if isinstance(default, list):
+                value = json.loads(text)
+                if not isinstance(value, list):
+                    raise ValueError('expected a JSON array')
+                return value
+            return text
+        except ValueError:
+            logger.warning('Invalid value for configuration %s, using the default', key)
+            return copy.deepcopy(default)
+
+def _deep_merge(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+# Shared by every service instance in the process
+config_service = ConfigService()
+
+def refresh_configuration():
+    """Refresh the shared snapshot when called inside an app context, e.g. from worker loops"""
+    if has_app_context():
+        return config_service.refresh()
+    return []
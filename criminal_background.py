@@ -1,31 +1,58 @@
-import requests
-import time
+import uuid
 from datetime import datetime
+from sqlalchemy import case, func, insert, select, update
 from src.models.user import db
 from src.models.background_check import CriminalCheck, BackgroundCheck
+from src.services.rate_limiter import rate_limiters
+from src.services.config_service import config_service
+from src.services.event_bus import publish_workflow_event
+from src.services.metrics import record_criminal_check_outcome, time_provider_request
+from src.services.serialization import get_serializer
 
 class CriminalBackgroundService:
     """Service for conducting criminal background checks"""
     
     def __init__(self):
-        self.verification_sources = {
+        self.verification_sources = config_service.setting('criminal.verification_sources', {
             'county_courts': {
                 'enabled': True,
-                'coverage': 'local'
+                'coverage': 'local',
+                'rate_limit': {'rate': 2, 'burst': 5, 'max_concurrency': 2}
             },
             'state_repositories': {
                 'enabled': True,
-                'coverage': 'state'
+                'coverage': 'state',
+                'rate_limit': {'rate': 2, 'burst': 5, 'max_concurrency': 2}
             },
             'federal_databases': {
                 'enabled': True,
-                'coverage': 'federal'
+                'coverage': 'federal',
+                'rate_limit': {'rate': 1, 'burst': 2, 'max_concurrency': 1}
             },
             'sex_offender_registry': {
                 'enabled': True,
-                'coverage': 'national'
+                'coverage': 'national',
+                'rate_limit': {'rate': 5, 'burst': 10, 'max_concurrency': 4}
             }
+        })
+        config_service.subscribe('criminal.verification_sources', self._apply_verification_sources)
+        
+        # Verification source queried by each check type
+        self.check_type_sources = {
+            'county': 'county_courts',
+            'state': 'state_repositories',
+            'federal': 'federal_databases',
+            'sex_offender': 'sex_offender_registry'
         }
+        rate_limiters.configure_sources(self.verification_sources)
+        
+        # Number of finished checks written per bulk UPDATE during a fan-out
+        self.result_batch_size = 10
+    
+    def _apply_verification_sources(self, verification_sources):
+        """Take verification source settings changed in Configuration"""
+        self.verification_sources = verification_sources
+        rate_limiters.configure_sources(verification_sources)
     
     def conduct_criminal_check(self, background_check_id, jurisdictions=None):
         """
@@ -48,21 +75,15 @@ class CriminalBackgroundService:
         if not jurisdictions:
             jurisdictions = self._determine_jurisdictions(candidate)
         
-        results = []
+        # dict.fromkeys drops repeated jurisdictions while keeping their order
+        planned_checks = list(dict.fromkeys(
+            (jurisdiction, check_type)
+            for jurisdiction in jurisdictions
+            for check_type in ['county', 'state', 'federal', 'sex_offender']
+            if self._should_run_check(jurisdiction, check_type)
+        ))
         
-        for jurisdiction in jurisdictions:
-            for check_type in ['county', 'state', 'federal', 'sex_offender']:
-                if self._should_run_check(jurisdiction, check_type):
-                    result = self._run_criminal_check(
-                        background_check_id, 
-                        jurisdiction, 
-                        check_type, 
-                        candidate
-                    )
-                    results.append(result)
-                    
-                    # Add delay between checks
-                    time.sleep(0.5)
+        results = self._run_criminal_checks_batch(background_check_id, planned_checks, candidate)
         
         return {
             'background_check_id': background_check_id,
@@ -129,8 +150,10 @@ class CriminalBackgroundService:
         db.session.commit()
         
         try:
-            # Simulate criminal check process
-            check_result = self._simulate_criminal_search(candidate, jurisdiction, check_type)
+            # Simulate criminal check process, throttled by the source's rate limit
+            source = self.check_type_sources.get(check_type)
+            with rate_limiters.limit(source), time_provider_request(source):
+                check_result = self._simulate_criminal_search(candidate, jurisdiction, check_type)
             
             # Update criminal check record
             criminal_check.status = 'completed'
@@ -140,6 +163,7 @@ class CriminalBackgroundService:
             criminal_check.search_date = datetime.utcnow()
             
             db.session.commit()
+            self._publish_check_updates(background_check_id, [criminal_check.to_dict()])
             
             return criminal_check.to_dict()
             
@@ -147,8 +171,145 @@ class CriminalBackgroundService:
             criminal_check.status = 'failed'
             criminal_check.record_details = f'Check failed: {str(e)}'
             db.session.commit()
+            self._publish_check_updates(background_check_id, [criminal_check.to_dict()])
             return {'error': str(e)}
     
+    def _run_criminal_checks_batch(self, background_check_id, planned_checks, candidate):
+        """
+        Run several criminal checks, persisting them with bulk statements
+        
+        All pending rows are inserted in one statement and their IDs read back
+        by the batch's token, and finished checks are written back in bulk
+        updates of up to result_batch_size rows.
+        
+        Args:
+            background_check_id (int): Background check ID
+            planned_checks (list): (jurisdiction, check_type) tuples to run
+            candidate: Candidate object
+            
+        Returns:
+            list: Criminal check results in the order of planned_checks
+        """
+        if not planned_checks:
+            return []
+        
+        # MySQL has no INSERT ... RETURNING, so the rows are found again by a token
+        # unique to this batch; concurrent batches for the same check never mix up rows
+        batch_token = uuid.uuid4().hex
+        db.session.execute(insert(CriminalCheck.__table__), [
+            {
+                'background_check_id': background_check_id,
+                'jurisdiction': jurisdiction,
+                'check_type': check_type,
+                'status': 'pending',
+                'records_found': False,
+                'created_at': datetime.utcnow(),
+                'batch_token': batch_token
+            }
+            for jurisdiction, check_type in planned_checks
+        ])
+        check_ids = {
+            (jurisdiction, check_type): check_id
+            for check_id, jurisdiction, check_type in db.session.execute(
+                select(CriminalCheck.id, CriminalCheck.jurisdiction, CriminalCheck.check_type)
+                .where(CriminalCheck.batch_token == batch_token)
+            )
+        }
+        db.session.commit()
+        
+        check_keys = {check_id: key for key, check_id in check_ids.items()}
+        
+        errors = {}
+        pending_updates = []
+        
+        for jurisdiction, check_type in planned_checks:
+            check_id = check_ids[(jurisdiction, check_type)]
+            
+            try:
+                source = self.check_type_sources.get(check_type)
+                with rate_limiters.limit(source), time_provider_request(source):
+                    check_result = self._simulate_criminal_search(candidate, jurisdiction, check_type)
+                
+                pending_updates.append({
+                    'id': check_id,
+                    'status': 'completed',
+                    'result': check_result['result'],
+                    'records_found': check_result['records_found'],
+                    'record_details': check_result['details'],
+                    'search_date': datetime.utcnow()
+                })
+            
+            except Exception as e:
+                errors[check_id] = str(e)
+                pending_updates.append({
+                    'id': check_id,
+                    'status': 'failed',
+                    'result': None,
+                    'records_found': False,
+                    'record_details': f'Check failed: {str(e)}',
+                    'search_date': None
+                })
+            
+            if len(pending_updates) >= self.result_batch_size:
+                self._apply_check_updates(pending_updates)
+                self._publish_check_updates(background_check_id, pending_updates, check_keys)
+                pending_updates = []
+        
+        self._apply_check_updates(pending_updates)
+        self._publish_check_updates(background_check_id, pending_updates, check_keys)
+        
+        criminal_checks = {
+            check.id: check
+            for check in CriminalCheck.query.filter(CriminalCheck.id.in_(check_ids.values())).all()
+        }
+        
+        results = []
+        for key in planned_checks:
+            check_id = check_ids[key]
+            results.append({'error': errors[check_id]} if check_id in errors else criminal_checks[check_id].to_dict())
+        
+        return results
+    
+    def _apply_check_updates(self, updates):
+        """Write finished checks back with a single UPDATE ... CASE statement"""
+        if not updates:
+            return
+        
+        values = {
+            column: case({u['id']: u[column] for u in updates}, value=CriminalCheck.id)
+            for column in ['status', 'result', 'records_found', 'record_details', 'search_date']
+        }
+        
+        db.session.execute(
+            update(CriminalCheck.__table__)
+            .where(CriminalCheck.id.in_([u['id'] for u in updates]))
+            .values(**values)
+        )
+        db.session.commit()
+    
+    def _publish_check_updates(self, background_check_id, updates, check_keys=None):
+        """Publish committed criminal check results to the background check's progress stream"""
+        if not updates:
+            return
+        
+        checks = []
+        for update_values in updates:
+            jurisdiction, check_type = (check_keys or {}).get(
+                update_values['id'],
+                (update_values.get('jurisdiction'), update_values.get('check_type'))
+            )
+            record_criminal_check_outcome(check_type, update_values['status'], update_values['result'])
+            checks.append({
+                'id': update_values['id'],
+                'jurisdiction': jurisdiction,
+                'check_type': check_type,
+                'status': update_values['status'],
+                'result': update_values['result'],
+                'records_found': update_values['records_found']
+            })
+        
+        publish_workflow_event(background_check_id, 'criminal_checks', {'checks': checks})
+    
     def _simulate_criminal_search(self, candidate, jurisdiction, check_type):
         """
         Simulate criminal record search
@@ -205,11 +366,15 @@ class CriminalBackgroundService:
     
     def _generate_criminal_check_summary(self, results):
         """Generate summary of criminal check results"""
-        total_checks = len(results)
-        clear_checks = sum(1 for r in results if r.get('result') == 'clear')
-        records_found = sum(1 for r in results if r.get('records_found', False))
-        failed_checks = sum(1 for r in results if 'error' in r)
-        
+        return self._summarize_check_counts(
+            total_checks=len(results),
+            clear_checks=sum(1 for r in results if r.get('result') == 'clear'),
+            records_found=sum(1 for r in results if r.get('records_found', False)),
+            failed_checks=sum(1 for r in results if 'error' in r)
+        )
+    
+    def _summarize_check_counts(self, total_checks, clear_checks, records_found, failed_checks):
+        """Build the criminal check summary from result counts"""
         return {
             'total_checks': total_checks,
             'clear_results': clear_checks,
@@ -260,41 +425,89 @@ class CriminalBackgroundService:
             background_check.candidate
         )
     
-    def get_criminal_check_status(self, background_check_id):
+    def get_criminal_check_status(self, background_check_id, include_checks=True, page=None, per_page=None):
         """
         Get status of all criminal checks for a background check
         
+        Counts and the summary come from a single GROUP BY query; individual
+        checks are only loaded when include_checks is set, all of them unless
+        a page is asked for.
+        
         Args:
             background_check_id (int): Background check ID
+            include_checks (bool): Include the individual checks
+            page (int): Page number of the checks list, starting at 1 (optional)
+            per_page (int): Number of checks per page (optional, 50 when only page is given)
             
         Returns:
             dict: Criminal check status summary
         """
-        criminal_checks = CriminalCheck.query.filter_by(
-            background_check_id=background_check_id
+        rows = db.session.query(
+            CriminalCheck.status,
+            CriminalCheck.result,
+            CriminalCheck.records_found,
+            func.count(CriminalCheck.id)
+        ).filter(
+            CriminalCheck.background_check_id == background_check_id
+        ).group_by(
+            CriminalCheck.status,
+            CriminalCheck.result,
+            CriminalCheck.records_found
         ).all()
         
-        if not criminal_checks:
+        if not rows:
             return {
                 'background_check_id': background_check_id,
                 'status': 'not_started',
                 'checks': []
             }
         
-        completed_checks = [c for c in criminal_checks if c.status == 'completed']
-        pending_checks = [c for c in criminal_checks if c.status == 'pending']
-        failed_checks = [c for c in criminal_checks if c.status == 'failed']
+        status_counts = {}
+        completed_clear = 0
+        completed_with_records = 0
         
-        overall_status = 'completed' if len(completed_checks) == len(criminal_checks) else 'in_progress'
+        for status, result, records_found, count in rows:
+            status_counts[status] = status_counts.get(status, 0) + count
+            if status == 'completed':
+                if result == 'clear':
+                    completed_clear += count
+                if records_found:
+                    completed_with_records += count
         
-        return {
+        total_checks = sum(status_counts.values())
+        completed = status_counts.get('completed', 0)
+        overall_status = 'completed' if completed == total_checks else 'in_progress'
+        
+        status = {
             'background_check_id': background_check_id,
             'status': overall_status,
-            'total_checks': len(criminal_checks),
-            'completed': len(completed_checks),
-            'pending': len(pending_checks),
-            'failed': len(failed_checks),
-            'checks': [check.to_dict() for check in criminal_checks],
-            'summary': self._generate_criminal_check_summary([c.to_dict() for c in completed_checks])
+            'total_checks': total_checks,
+            'completed': completed,
+            'pending': status_counts.get('pending', 0),
+            'failed': status_counts.get('failed', 0),
+            # Stored checks never carry an error key, so none count as failed here
+            'summary': self._summarize_check_counts(completed, completed_clear, completed_with_records, 0)
         }
+        
+        if include_checks:
+            serializer = get_serializer(CriminalCheck)
+            query = serializer.select(CriminalCheck.query.filter_by(
+                background_check_id=background_check_id
+            )).order_by(CriminalCheck.id)
+            
+            if page is None and per_page is None:
+                status['checks'] = serializer.encode_all(query.all())
+                return status
+            
+            page = page or 1
+            per_page = per_page or 50
+            status['checks'] = serializer.encode_all(query.offset((page - 1) * per_page).limit(per_page).all())
+            status['pagination'] = {
+                'page': page,
+                'per_page': per_page,
+                'total': total_checks,
+                'pages': (total_checks + per_page - 1) // per_page
+            }
+        
+        return status
 
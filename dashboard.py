@@ -0,0 +1,12 @@
+from flask import Blueprint, request, jsonify
+from src.services.dashboard_stats import get_dashboard_stats
+from src.services.db_routing import read_only
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+@dashboard_bp.route('/dashboard/stats', methods=['GET'])
+@read_only
+def dashboard_stats():
+    """Get dashboard counters and monthly check totals"""
+    months = min(max(request.args.get('months', 6, type=int), 1), 24)
+    return jsonify(get_dashboard_stats(months))
@@ -0,0 +1,196 @@
+import random
+from datetime import datetime
+from sqlalchemy import delete, event, extract, func, inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.user import db
+from src.models.candidate import Candidate
+from src.models.background_check import BackgroundCheck
+from src.models.stats import StatCounter, MonthlyCheckRollup
+
+COUNTER_SLOTS = 8
+
+counters = StatCounter.__table__
+rollups = MonthlyCheckRollup.__table__
+
+def _month(created_at):
+    return (created_at or datetime.utcnow()).strftime('%Y-%m')
+
+def _increment(connection, table, keys, deltas):
+    """
+    Add deltas to the row identified by keys, creating it when missing
+
+    Runs on the flushing connection, so the change commits or rolls back
+    together with the write that caused it.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    increments = {column: table.c[column] + delta for column, delta in deltas.items()}
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        statement = mysql_insert(table).values(**keys, **deltas, updated_at=now)
+        connection.execute(statement.on_duplicate_key_update(**increments, updated_at=now))
+    elif dialect == 'sqlite':
+        statement = sqlite_insert(table).values(**keys, **deltas, updated_at=now)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_=dict(increments, updated_at=now)
+        ))
+    else:
+        result = connection.execute(
+            update(table).where(*[table.c[key] == value for key, value in keys.items()]).values(**increments, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**keys, **deltas, updated_at=now))
+
+def _record_check(connection, created_at, old_status, new_status, checks_delta=0):
+    """Move one check between status counters and adjust its month's rollup"""
+    slot = random.randrange(COUNTER_SLOTS)
+
+    if old_status is not None:
+        _increment(connection, counters, {'name': f'checks.{old_status}', 'slot': slot}, {'value': -1})
+    if new_status is not None:
+        _increment(connection, counters, {'name': f'checks.{new_status}', 'slot': slot}, {'value': 1})
+
+    _increment(connection, rollups, {'month': _month(created_at), 'slot': slot}, {
+        'checks': checks_delta,
+        'completed': (new_status == 'completed') - (old_status == 'completed'),
+        'failed': (new_status == 'failed') - (old_status == 'failed')
+    })
+
+@event.listens_for(BackgroundCheck, 'after_insert')
+def _background_check_inserted(mapper, connection, target):
+    _record_check(connection, target.created_at, None, target.status, checks_delta=1)
+
+@event.listens_for(BackgroundCheck, 'after_update')
+def _background_check_updated(mapper, connection, target):
+    history = inspect(target).attrs.status.history
+    if not history.has_changes():
+        return
+
+    old_status = history.deleted[0] if history.deleted else None
+    new_status = history.added[0] if history.added else None
+    if old_status != new_status:
+        _record_check(connection, target.created_at, old_status, new_status)
+
+@event.listens_for(BackgroundCheck, 'before_delete')
+def _background_check_deleted(mapper, connection, target):
+    # before_delete so expired attributes can still be loaded from the row
+    _record_check(connection, target.created_at, target.status, None, checks_delta=-1)
+
+@event.listens_for(Candidate, 'after_insert')
+def _candidate_inserted(mapper, connection, target):
+    _increment(connection, counters, {'name': 'candidates', 'slot': random.randrange(COUNTER_SLOTS)}, {'value': 1})
+
+@event.listens_for(Candidate, 'after_delete')
+def _candidate_deleted(mapper, connection, target):
+    _increment(connection, counters, {'name': 'candidates', 'slot': random.randrange(COUNTER_SLOTS)}, {'value': -1})
+
+def rebuild_dashboard_stats(connection):
+    """
+    Recompute all counters and rollups from the source tables
+
+    Used to backfill existing data and to repair drift after writes that bypass
+    the ORM (bulk UPDATE/DELETE statements). Run it while checks are not being written.
+
+    Args:
+        connection: SQLAlchemy connection inside a transaction
+    """
+    now = datetime.utcnow()
+    checks = BackgroundCheck.__table__
+
+    connection.execute(delete(counters))
+    connection.execute(delete(rollups))
+
+    candidate_total = connection.execute(select(func.count()).select_from(Candidate.__table__)).scalar()
+    counter_rows = [{'name': 'candidates', 'slot': 0, 'value': candidate_total, 'updated_at': now}]
+
+    year = extract('year', checks.c.created_at)
+    month = extract('month', checks.c.created_at)
+    status_totals = {}
+    month_totals = {}
+
+    for row_year, row_month, status, count in connection.execute(
+        select(year, month, checks.c.status, func.count()).group_by(year, month, checks.c.status)
+    ):
+        status_totals[status] = status_totals.get(status, 0) + count
+
+        key = f'{int(row_year):04d}-{int(row_month):02d}' if row_year is not None else _month(None)
+        totals = month_totals.setdefault(key, {'checks': 0, 'completed': 0, 'failed': 0})
+        totals['checks'] += count
+        if status in ('completed', 'failed'):
+            totals[status] += count
+
+    counter_rows.extend(
+        {'name': f'checks.{status}', 'slot': 0, 'value': count, 'updated_at': now}
+        for status, count in status_totals.items()
+    )
+    connection.execute(counters.insert(), counter_rows)
+
+    if month_totals:
+        connection.execute(rollups.insert(), [
+            dict(totals, month=key, slot=0, updated_at=now) for key, totals in month_totals.items()
+        ])
+
+def _recent_months(count):
+    today = datetime.utcnow()
+    year, month = today.year, today.month
+    months = []
+    for _ in range(count):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return list(reversed(months))
+
+def get_dashboard_stats(months=6):
+    """
+    Dashboard counters and monthly chart data
+
+    Reads only the counter and rollup rows, so the cost does not grow with the
+    number of candidates or background checks.
+
+    Args:
+        months (int): Number of months of chart data, ending with the current month
+
+    Returns:
+        dict: Counters and chart data in the shape Dashboard.jsx uses
+    """
+    totals = dict(db.session.query(StatCounter.name, func.sum(StatCounter.value)).group_by(StatCounter.name).all())
+
+    periods = _recent_months(months)
+    monthly = {
+        month: (checks, completed, failed)
+        for month, checks, completed, failed in db.session.query(
+            MonthlyCheckRollup.month,
+            func.sum(MonthlyCheckRollup.checks),
+            func.sum(MonthlyCheckRollup.completed),
+            func.sum(MonthlyCheckRollup.failed)
+        ).filter(
+            MonthlyCheckRollup.month >= periods[0]
+        ).group_by(MonthlyCheckRollup.month).all()
+    }
+
+    chart_data = []
+    for period in periods:
+        checks, completed, failed = monthly.get(period, (0, 0, 0))
+        chart_data.append({
+            'period': period,
+            'month': datetime.strptime(period, '%Y-%m').strftime('%b'),
+            'checks': int(checks or 0),
+            'completed': int(completed or 0),
+            'failed': int(failed or 0)
+        })
+
+    return {
+        'stats': {
+            'totalCandidates': int(totals.get('candidates') or 0),
+            'activeChecks': int(totals.get('checks.in_progress') or 0),
+            'completedChecks': int(totals.get('checks.completed') or 0),
+            'pendingChecks': int(totals.get('checks.pending') or 0),
+            'failedChecks': int(totals.get('checks.failed') or 0)
+        },
+        'chartData': chart_data
+    }
@@ -0,0 +1,98 @@
+import os
+import random
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import CompoundSelect, Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+class RoutingSession(Session):
+    """
+    Session that sends reads from read-only endpoints to a replica bind
+
+    Everything else goes to the primary: requests not marked read_only, work
+    outside a request (workers, thread pools), and any statement that is not a
+    plain SELECT. Once the session writes, it stays on the primary for the rest
+    of the request so the request reads its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._wrote = False
+        self._replica_key = None
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self._wrote = True
+            elif self._use_replica(clause):
+                return self._db.engines[self._replica_key]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if self._wrote or not has_app_context() or not g.get('db_read_only'):
+            return False
+        if clause is not None and not isinstance(clause, (Select, CompoundSelect)):
+            return False
+
+        if self._replica_key is None:
+            replica_keys = [key for key in self._db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if not replica_keys:
+                return False
+            # One replica per session keeps reads within a request consistent
+            self._replica_key = random.choice(replica_keys)
+
+        return True
+
+def read_only(view):
+    """Mark a view as read-only so its queries may be served by a replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+def engine_options(prefix='DB'):
+    """
+    Connection pool options from the environment
+
+    Reads {prefix}_POOL_SIZE, {prefix}_MAX_OVERFLOW, {prefix}_POOL_TIMEOUT,
+    {prefix}_POOL_RECYCLE and {prefix}_POOL_PRE_PING, falling back to the
+    DB_* values and then to defaults.
+    """
+    def setting(name, default):
+        return os.getenv(f'{prefix}_{name}', os.getenv(f'DB_{name}', default))
+
+    return {
+        'pool_size': int(setting('POOL_SIZE', '10')),
+        'max_overflow': int(setting('MAX_OVERFLOW', '20')),
+        'pool_timeout': int(setting('POOL_TIMEOUT', '30')),
+        # Below MySQL's default wait_timeout so idle connections are recycled first
+        'pool_recycle': int(setting('POOL_RECYCLE', '1800')),
+        'pool_pre_ping': setting('POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    }
+
+def replica_binds(build_uri):
+    """
+    SQLALCHEMY_BINDS entries for the replicas listed in DB_REPLICA_HOSTS
+
+    Args:
+        build_uri (callable): Returns a database URI for (host, port)
+
+    Returns:
+        dict: Bind key -> engine config, using the DB_REPLICA_* pool options
+    """
+    binds = {}
+    hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+
+    for index, host in enumerate(hosts):
+        host, _, port = host.partition(':')
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = dict(
+            engine_options('DB_REPLICA'),
+            url=build_uri(host, port or os.getenv('DB_PORT', '3306'))
+        )
+
+    return binds
@@ -1,23 +1,44 @@
-import requests
-import time
 from datetime import datetime
 from src.models.user import db
 from src.models.candidate import EducationRecord
 from src.models.background_check import VerificationResult
+from src.services.concurrency import AppContextExecutor, get_pool_size, in_pool_thread
+from src.services.entity_registry import get_institution_registry
+from src.services.fuzzy_matcher import get_institution_matcher
+from src.services.rate_limiter import rate_limiters
+from src.services.config_service import config_service
+from src.services.verification_cache import verification_cache
+from src.services.event_bus import publish_workflow_event
+from src.services.metrics import record_verification_outcome, time_provider_request
 
 class EducationVerificationService:
     """Service for verifying education records"""
     
     def __init__(self):
-        self.verification_sources = {
+        self.verification_sources = config_service.setting('education.verification_sources', {
             'national_student_clearinghouse': {
                 'url': 'https://api.studentclearinghouse.org/verify',
-                'api_key': 'your_api_key_here'
+                'api_key': 'your_api_key_here',
+                'rate_limit': {'rate': 5, 'burst': 10, 'max_concurrency': 4},
+                'cache': {'ttl': 7 * 24 * 60 * 60, 'negative_ttl': 60 * 60}
             },
             'manual_verification': {
                 'enabled': True
             }
-        }
+        })
+        config_service.subscribe('education.verification_sources', self._apply_verification_sources)
+        
+        # Cap on concurrent provider calls made by the bulk verification methods
+        self.bulk_max_in_flight = get_pool_size('BULK_VERIFICATION_MAX_IN_FLIGHT', 5)
+        rate_limiters.configure_sources(self.verification_sources)
+        
+        # Minimum n-gram similarity for a fuzzy institution match to be accepted or suggested to the reviewer
+        self.fuzzy_match_threshold = 0.6
+    
+    def _apply_verification_sources(self, verification_sources):
+        """Take verification source settings changed in Configuration"""
+        self.verification_sources = verification_sources
+        rate_limiters.configure_sources(verification_sources)
     
     def verify_education_record(self, education_record_id, background_check_id):
         """
@@ -74,14 +95,27 @@ class EducationVerificationService:
                 verification_result.verification_method = 'manual_required'
             
             db.session.commit()
+            self._publish_result(verification_result)
             return verification_result.to_dict()
             
         except Exception as e:
             verification_result.status = 'failed'
             verification_result.details = f'Verification error: {str(e)}'
             db.session.commit()
+            self._publish_result(verification_result)
             return {'error': str(e)}
     
+    def _publish_result(self, verification_result):
+        """Publish a committed verification result to the background check's progress stream"""
+        record_verification_outcome(verification_result.verification_type, verification_result.status)
+        publish_workflow_event(verification_result.background_check_id, 'verification_result', {
+            'verification_result_id': verification_result.id,
+            'verification_type': verification_result.verification_type,
+            'record_id': verification_result.record_id,
+            'status': verification_result.status,
+            'result': verification_result.result
+        })
+    
     def _automated_verification(self, education_record):
         """
         Perform automated verification using external services
@@ -104,12 +138,41 @@ class EducationVerificationService:
             'date_of_birth': education_record.candidate.date_of_birth.isoformat() if education_record.candidate.date_of_birth else None
         }
         
+        # Re-screens of the same record are served from the cache without a provider call
+        source = 'national_student_clearinghouse'
+        cached_result = verification_cache.get(source, verification_data)
+        if cached_result is not None:
+            return cached_result
+        
+        result = self._query_verification_source(education_record, verification_data)
+        verification_cache.set(source, verification_data, result, self.verification_sources[source])
+        return result
+    
+    def _query_verification_source(self, education_record, verification_data):
+        """
+        Query the verification source for an education record
+        
+        Args:
+            education_record: EducationRecord object
+            verification_data (dict): Data sent to the verification source
+            
+        Returns:
+            dict: Verification result
+        """
         # Simulate verification logic
-        if self._is_valid_institution(education_record.institution_name):
-            if self._check_degree_records(verification_data):
+        institution_match = self._match_institution(education_record.institution_name)
+        if institution_match:
+            with rate_limiters.limit('national_student_clearinghouse'), time_provider_request('national_student_clearinghouse'):
+                degree_found = self._check_degree_records(verification_data)
+            
+            if degree_found:
+                details = f'Degree verified: {education_record.degree_type} in {education_record.field_of_study} from {education_record.institution_name}'
+                if institution_match['score'] < 1:
+                    details += f" (matched to {institution_match['canonical_name']}, similarity {institution_match['score']})"
+                
                 return {
                     'status': 'verified',
-                    'details': f'Degree verified: {education_record.degree_type} in {education_record.field_of_study} from {education_record.institution_name}',
+                    'details': details,
                     'verified_by': 'National Student Clearinghouse'
                 }
             else:
@@ -118,22 +181,46 @@ class EducationVerificationService:
                     'details': 'No matching degree records found in institutional database'
                 }
         else:
+            details = 'Institution not found in verification database - manual verification required'
+            candidates = self._suggest_institutions(education_record.institution_name)
+            if candidates:
+                details += '; similar registered institutions: ' + ', '.join(
+                    f"{candidate['canonical_name']} (similarity {candidate['score']})" for candidate in candidates
+                )
+            
             return {
                 'status': 'inconclusive',
-                'details': 'Institution not found in verification database - manual verification required'
+                'details': details
             }
     
     def _is_valid_institution(self, institution_name):
         """Check if institution is in our database of valid institutions"""
-        # Simulate institution validation
-        valid_institutions = [
-            'Harvard University', 'Stanford University', 'MIT', 'University of California',
-            'Yale University', 'Princeton University', 'Columbia University', 'University of Chicago',
-            'University of Pennsylvania', 'Northwestern University', 'Duke University',
-            'Johns Hopkins University', 'Dartmouth College', 'Brown University', 'Vanderbilt University'
-        ]
-        
-        return any(valid_inst.lower() in institution_name.lower() for valid_inst in valid_institutions)
+        return self._match_institution(institution_name) is not None
+    
+    def _match_institution(self, institution_name):
+        """
+        Match an institution name to the registry, falling back to fuzzy matching
+        
+        A fuzzy match is only accepted when the name is a misspelling of
+        exactly one registered name (see FuzzyMatcher.best_match); other
+        similar names go to manual review.
+        
+        Args:
+            institution_name (str): Institution name as entered by the candidate
+            
+        Returns:
+            dict: canonical_name and score (1.0 for exact matches), or None
+        """
+        canonical_name = get_institution_registry().match(institution_name)
+        if canonical_name:
+            return {'canonical_name': canonical_name, 'score': 1.0}
+        
+        return get_institution_matcher().best_match(institution_name, self.fuzzy_match_threshold)
+    
+    def _suggest_institutions(self, institution_name, limit=3):
+        """Registered institutions with names similar to an unmatched one, for the manual reviewer"""
+        # Without a time budget, so the list cached with the result does not depend on timing
+        return get_institution_matcher().top_k(institution_name, k=limit, min_score=self.fuzzy_match_threshold, budget_ms=None)
     
     def _check_degree_records(self, verification_data):
         """Simulate checking degree records"""
@@ -171,25 +258,34 @@ class EducationVerificationService:
             'task': verification_task
         }
     
-    def bulk_verify_education_records(self, education_record_ids, background_check_id):
+    def bulk_verify_education_records(self, education_record_ids, background_check_id, max_in_flight=None):
         """
         Verify multiple education records in bulk
         
         Args:
             education_record_ids (list): List of education record IDs
             background_check_id (int): ID of the background check
+            max_in_flight (int): Maximum number of concurrent verifications, capped at bulk_max_in_flight; one inside a pool task (optional)
             
         Returns:
             dict: Bulk verification results
         """
         results = []
         
-        for record_id in education_record_ids:
-            result = self.verify_education_record(record_id, background_check_id)
-            results.append(result)
+        if in_pool_thread():
+            # Already a pool task, e.g. a workflow step: more threads with their own sessions would hold
+            # extra connections while this task keeps its own, so verify one record at a time here
+            results = [self.verify_education_record(record_id, background_check_id) for record_id in education_record_ids]
+        elif education_record_ids:
+            # Callers may lower the bound, never raise it past bulk_max_in_flight
+            max_in_flight = max(1, min(max_in_flight or self.bulk_max_in_flight, self.bulk_max_in_flight, len(education_record_ids)))
             
-            # Add delay to avoid overwhelming external services
-            time.sleep(1)
+            # Each record is verified in its own app context; map() keeps results in input order
+            with AppContextExecutor(max_workers=max_in_flight, thread_name_prefix='bulk-education') as executor:
+                results = list(executor.map(
+                    lambda record_id: self.verify_education_record(record_id, background_check_id),
+                    education_record_ids
+                ))
         
         return {
             'total_records': len(education_record_ids),
@@ -1,23 +1,44 @@
-import requests
-import time
 from datetime import datetime
 from src.models.user import db
 from src.models.candidate import EmploymentRecord
 from src.models.background_check import VerificationResult
+from src.services.concurrency import AppContextExecutor, get_pool_size, in_pool_thread
+from src.services.entity_registry import get_company_registry
+from src.services.fuzzy_matcher import get_company_matcher
+from src.services.rate_limiter import rate_limiters
+from src.services.config_service import config_service
+from src.services.verification_cache import verification_cache
+from src.services.event_bus import publish_workflow_event
+from src.services.metrics import record_verification_outcome, time_provider_request
 
 class EmploymentVerificationService:
     """Service for verifying employment records"""
     
     def __init__(self):
-        self.verification_sources = {
+        self.verification_sources = config_service.setting('employment.verification_sources', {
             'work_number': {
                 'url': 'https://api.theworknumber.com/verify',
-                'api_key': 'your_api_key_here'
+                'api_key': 'your_api_key_here',
+                'rate_limit': {'rate': 5, 'burst': 10, 'max_concurrency': 4},
+                'cache': {'ttl': 7 * 24 * 60 * 60, 'negative_ttl': 60 * 60}
             },
             'manual_verification': {
                 'enabled': True
             }
-        }
+        })
+        config_service.subscribe('employment.verification_sources', self._apply_verification_sources)
+        
+        # Cap on concurrent provider calls made by the bulk verification methods
+        self.bulk_max_in_flight = get_pool_size('BULK_VERIFICATION_MAX_IN_FLIGHT', 5)
+        rate_limiters.configure_sources(self.verification_sources)
+        
+        # Minimum n-gram similarity for a fuzzy company match to be accepted or suggested to the reviewer
+        self.fuzzy_match_threshold = 0.6
+    
+    def _apply_verification_sources(self, verification_sources):
+        """Take verification source settings changed in Configuration"""
+        self.verification_sources = verification_sources
+        rate_limiters.configure_sources(verification_sources)
     
     def verify_employment_record(self, employment_record_id, background_check_id):
         """
@@ -74,14 +95,27 @@ class EmploymentVerificationService:
                 verification_result.verification_method = 'manual_required'
             
             db.session.commit()
+            self._publish_result(verification_result)
             return verification_result.to_dict()
             
         except Exception as e:
             verification_result.status = 'failed'
             verification_result.details = f'Verification error: {str(e)}'
             db.session.commit()
+            self._publish_result(verification_result)
             return {'error': str(e)}
     
+    def _publish_result(self, verification_result):
+        """Publish a committed verification result to the background check's progress stream"""
+        record_verification_outcome(verification_result.verification_type, verification_result.status)
+        publish_workflow_event(verification_result.background_check_id, 'verification_result', {
+            'verification_result_id': verification_result.id,
+            'verification_type': verification_result.verification_type,
+            'record_id': verification_result.record_id,
+            'status': verification_result.status,
+            'result': verification_result.result
+        })
+    
     def _automated_verification(self, employment_record):
         """
         Perform automated verification using external services
@@ -102,9 +136,32 @@ class EmploymentVerificationService:
             'current_position': employment_record.current_position
         }
         
+        # Re-screens of the same record are served from the cache without a provider call
+        source = 'work_number'
+        cached_result = verification_cache.get(source, verification_data)
+        if cached_result is not None:
+            return cached_result
+        
+        result = self._query_verification_source(employment_record, verification_data)
+        verification_cache.set(source, verification_data, result, self.verification_sources[source])
+        return result
+    
+    def _query_verification_source(self, employment_record, verification_data):
+        """
+        Query the verification source for an employment record
+        
+        Args:
+            employment_record: EmploymentRecord object
+            verification_data (dict): Data sent to the verification source
+            
+        Returns:
+            dict: Verification result
+        """
         # Simulate verification logic
-        if self._is_valid_company(employment_record.company_name):
-            verification_result = self._check_employment_records(verification_data)
+        company_match = self._match_company(employment_record.company_name)
+        if company_match:
+            with rate_limiters.limit('work_number'), time_provider_request('work_number'):
+                verification_result = self._check_employment_records(verification_data)
             
             if verification_result['found']:
                 details = f"Employment verified: {employment_record.job_title} at {employment_record.company_name}"
@@ -114,6 +171,8 @@ class EmploymentVerificationService:
                     details += f" to {employment_record.end_date}"
                 elif employment_record.current_position:
                     details += " (current position)"
+                if company_match['score'] < 1:
+                    details += f" (matched to {company_match['canonical_name']}, similarity {company_match['score']})"
                 
                 return {
                     'status': 'verified',
@@ -126,21 +185,46 @@ class EmploymentVerificationService:
                     'details': 'No matching employment records found'
                 }
         else:
+            details = 'Company not found in verification database - manual verification required'
+            candidates = self._suggest_companies(employment_record.company_name)
+            if candidates:
+                details += '; similar registered companies: ' + ', '.join(
+                    f"{candidate['canonical_name']} (similarity {candidate['score']})" for candidate in candidates
+                )
+            
             return {
                 'status': 'inconclusive',
-                'details': 'Company not found in verification database - manual verification required'
+                'details': details
             }
     
     def _is_valid_company(self, company_name):
         """Check if company is in our database of valid companies"""
-        # Simulate company validation
-        valid_companies = [
-            'Google', 'Microsoft', 'Apple', 'Amazon', 'Facebook', 'Tesla', 'Netflix',
-            'IBM', 'Oracle', 'Salesforce', 'Adobe', 'Intel', 'Cisco', 'HP',
-            'Dell', 'Uber', 'Airbnb', 'Twitter', 'LinkedIn', 'PayPal'
-        ]
+        return self._match_company(company_name) is not None
+    
+    def _match_company(self, company_name):
+        """
+        Match a company name to the registry, falling back to fuzzy matching
+        
+        A fuzzy match is only accepted when the name is a misspelling of
+        exactly one registered name (see FuzzyMatcher.best_match); other
+        similar names go to manual review.
         
-        return any(valid_company.lower() in company_name.lower() for valid_company in valid_companies)
+        Args:
+            company_name (str): Company name as entered by the candidate
+            
+        Returns:
+            dict: canonical_name and score (1.0 for exact matches), or None
+        """
+        canonical_name = get_company_registry().match(company_name)
+        if canonical_name:
+            return {'canonical_name': canonical_name, 'score': 1.0}
+        
+        return get_company_matcher().best_match(company_name, self.fuzzy_match_threshold)
+    
+    def _suggest_companies(self, company_name, limit=3):
+        """Registered companies with names similar to an unmatched one, for the manual reviewer"""
+        # Without a time budget, so the list cached with the result does not depend on timing
+        return get_company_matcher().top_k(company_name, k=limit, min_score=self.fuzzy_match_threshold, budget_ms=None)
     
     def _check_employment_records(self, verification_data):
         """Simulate checking employment records"""
@@ -236,25 +320,34 @@ class EmploymentVerificationService:
             'task': verification_task
         }
     
-    def bulk_verify_employment_records(self, employment_record_ids, background_check_id):
+    def bulk_verify_employment_records(self, employment_record_ids, background_check_id, max_in_flight=None):
         """
         Verify multiple employment records in bulk
         
         Args:
             employment_record_ids (list): List of employment record IDs
             background_check_id (int): ID of the background check
+            max_in_flight (int): Maximum number of concurrent verifications, capped at bulk_max_in_flight; one inside a pool task (optional)
             
         Returns:
             dict: Bulk verification results
         """
         results = []
         
-        for record_id in employment_record_ids:
-            result = self.verify_employment_record(record_id, background_check_id)
-            results.append(result)
+        if in_pool_thread():
+            # Already a pool task, e.g. a workflow step: more threads with their own sessions would hold
+            # extra connections while this task keeps its own, so verify one record at a time here
+            results = [self.verify_employment_record(record_id, background_check_id) for record_id in employment_record_ids]
+        elif employment_record_ids:
+            # Callers may lower the bound, never raise it past bulk_max_in_flight
+            max_in_flight = max(1, min(max_in_flight or self.bulk_max_in_flight, self.bulk_max_in_flight, len(employment_record_ids)))
             
-            # Add delay to avoid overwhelming external services
-            time.sleep(1)
+            # Each record is verified in its own app context; map() keeps results in input order
+            with AppContextExecutor(max_workers=max_in_flight, thread_name_prefix='bulk-employment') as executor:
+                results = list(executor.map(
+                    lambda record_id: self.verify_employment_record(record_id, background_check_id),
+                    employment_record_ids
+                ))
         
         return {
             'total_records': len(employment_record_ids),
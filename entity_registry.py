@@ -0,0 +1,219 @@
+import os
+import pickle
+import re
+import threading
+import unicodedata
+
+# Bump when the index layout or normalization changes so persisted indexes are rebuilt
+INDEX_VERSION = 1
+
+# Token expansions applied to registry names and lookups alike
+DEFAULT_ABBREVIATIONS = {
+    'univ': 'university',
+    'uni': 'university',
+    'coll': 'college',
+    'inst': 'institute',
+    'intl': 'international',
+    'natl': 'national',
+    'corp': 'corporation',
+    'inc': 'incorporated',
+    'co': 'company',
+    'ltd': 'limited',
+    'mfg': 'manufacturing',
+    'svcs': 'services',
+    'mt': 'mount',
+    '&': 'and'
+}
+
+# Built-in registries used when no registry file is configured, as (canonical name, aliases)
+DEFAULT_INSTITUTIONS = [
+    ('Harvard University', []),
+    ('Stanford University', []),
+    ('MIT', ['Massachusetts Institute of Technology']),
+    ('University of California', ['UC Berkeley', 'UCLA', 'UC San Diego', 'UC Davis']),
+    ('Yale University', []),
+    ('Princeton University', []),
+    ('Columbia University', []),
+    ('University of Chicago', ['UChicago']),
+    ('University of Pennsylvania', ['UPenn']),
+    ('Northwestern University', []),
+    ('Duke University', []),
+    ('Johns Hopkins University', []),
+    ('Dartmouth College', []),
+    ('Brown University', []),
+    ('Vanderbilt University', [])
+]
+
+DEFAULT_COMPANIES = [
+    ('Google', ['Alphabet']),
+    ('Microsoft', []),
+    ('Apple', []),
+    ('Amazon', ['AWS']),
+    ('Facebook', ['Meta Platforms']),
+    ('Tesla', []),
+    ('Netflix', []),
+    ('IBM', ['International Business Machines']),
+    ('Oracle', []),
+    ('Salesforce', []),
+    ('Adobe', []),
+    ('Intel', []),
+    ('Cisco', ['Cisco Systems']),
+    ('HP', ['Hewlett-Packard', 'Hewlett Packard']),
+    ('Dell', []),
+    ('Uber', []),
+    ('Airbnb', []),
+    ('Twitter', []),
+    ('LinkedIn', []),
+    ('PayPal', [])
+]
+
+class EntityRegistry:
+    """
+    Registry of known institutions or companies backed by a normalized-token trie
+
+    A name matches when any registered name or alias appears in it as a run of
+    whole tokens, so "Google LLC" matches "Google" but "Chipotle" does not match "HP".
+    """
+
+    _terminal = '$'
+
+    def __init__(self, abbreviations=None):
+        self.abbreviations = dict(DEFAULT_ABBREVIATIONS if abbreviations is None else abbreviations)
+        self._trie = {}
+        self.entities = {}  # canonical name -> list of aliases
+
+    def normalize_tokens(self, name):
+        """Split a name into lowercase ASCII tokens with abbreviations expanded"""
+        name = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii').lower()
+        name = name.replace('&', ' & ')
+        name = re.sub(r'(?<=\w)\.(?=\w)', '', name)  # U.C.L.A -> ucla
+        tokens = re.findall(r'[a-z0-9]+|&', name)
+        return [self.abbreviations.get(token, token) for token in tokens]
+
+    def add(self, canonical_name, aliases=()):
+        """Register an entity under its canonical name and aliases"""
+        self.entities[canonical_name] = list(aliases)
+
+        for name in [canonical_name, *aliases]:
+            tokens = self.normalize_tokens(name)
+            if not tokens:
+                continue
+
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[self._terminal] = canonical_name
+
+    def match(self, name):
+        """
+        Find the registered entity mentioned in a name
+
+        Args:
+            name (str): Institution or company name as entered by the candidate
+
+        Returns:
+            str: Canonical name of the longest matching entity, or None
+        """
+        tokens = self.normalize_tokens(name)
+        best_match = None
+        best_length = 0
+
+        for start in range(len(tokens)):
+            node = self._trie
+            for position in range(start, len(tokens)):
+                node = node.get(tokens[position])
+                if node is None:
+                    break
+                if self._terminal in node and position - start + 1 > best_length:
+                    best_match = node[self._terminal]
+                    best_length = position - start + 1
+
+        return best_match
+
+    def __contains__(self, name):
+        return self.match(name) is not None
+
+    def __len__(self):
+        return len(self.entities)
+
+    @classmethod
+    def from_entries(cls, entries, abbreviations=None):
+        registry = cls(abbreviations)
+        for canonical_name, aliases in entries:
+            registry.add(canonical_name, aliases)
+        return registry
+
+    @classmethod
+    def from_file(cls, path, index_path=None, abbreviations=None):
+        """
+        Load a registry file, reusing its persisted index when it is up to date
+
+        The file has one entity per line as "Canonical Name|Alias|Alias";
+        blank lines and lines starting with # are ignored.
+
+        Args:
+            path (str): Registry file path
+            index_path (str): Where to persist the built index (defaults to path + '.idx')
+            abbreviations (dict): Token expansions (optional)
+
+        Returns:
+            EntityRegistry: The loaded registry
+        """
+        index_path = index_path or f'{path}.idx'
+        stat = os.stat(path)
+        registry = cls(abbreviations)
+        signature = (INDEX_VERSION, stat.st_size, stat.st_mtime_ns, sorted(registry.abbreviations.items()))
+
+        try:
+            with open(index_path, 'rb') as index_file:
+                index = pickle.load(index_file)
+            if index['signature'] == signature:
+                registry._trie = index['trie']
+                registry.entities = index['entities']
+                return registry
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+
+        with open(path, encoding='utf-8') as registry_file:
+            for line in registry_file:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                canonical_name, *aliases = [part.strip() for part in line.split('|')]
+                registry.add(canonical_name, [alias for alias in aliases if alias])
+
+        # Write then rename so concurrently starting workers never read a partial index
+        temp_path = f'{index_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as index_file:
+                pickle.dump({
+                    'signature': signature,
+                    'trie': registry._trie,
+                    'entities': registry.entities
+                }, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, index_path)
+        except OSError:
+            pass
+
+        return registry
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def _get_registry(kind, env_var, default_entries):
+    with _registries_lock:
+        if kind not in _registries:
+            path = os.getenv(env_var)
+            if path:
+                _registries[kind] = EntityRegistry.from_file(path)
+            else:
+                _registries[kind] = EntityRegistry.from_entries(default_entries)
+        return _registries[kind]
+
+def get_institution_registry():
+    """Institution registry loaded from INSTITUTION_REGISTRY_PATH, or the built-in list"""
+    return _get_registry('institutions', 'INSTITUTION_REGISTRY_PATH', DEFAULT_INSTITUTIONS)
+
+def get_company_registry():
+    """Company registry loaded from COMPANY_REGISTRY_PATH, or the built-in list"""
+    return _get_registry('companies', 'COMPANY_REGISTRY_PATH', DEFAULT_COMPANIES)
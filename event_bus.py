@@ -0,0 +1,286 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+def workflow_channel(background_check_id):
+    """Channel carrying the progress events of one background check"""
+    return f'background_check:{background_check_id}'
+
+def format_sse(event_type, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+class Subscription:
+    """Queue of events for one subscriber of a channel"""
+
+    def __init__(self, bus, channel, max_queued=1000):
+        self.bus = bus
+        self.channel = channel
+        self.last_id = 0
+        # Set when events were dropped because the subscriber fell behind
+        self.overflowed = False
+        self._queue = queue.Queue(max_queued)
+
+    def get(self, timeout=None):
+        """Return the next event, or None if none arrived within the timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _deliver(self, event):
+        # Replayed and polled events can overlap, ids keep delivery exactly once
+        if event['id'] <= self.last_id:
+            return
+        try:
+            self._queue.put_nowait(event)
+            self.last_id = event['id']
+        except queue.Full:
+            self.overflowed = True
+
+class LocalEventBroker:
+    """Keeps recent events in memory, visible only to subscribers in this process"""
+
+    delivers_locally = True
+
+    def __init__(self, history_size=100, max_channels=1000):
+        self.history_size = history_size
+        self.max_channels = max_channels
+        self._ids = itertools.count(1)
+        self._history = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event_type, data):
+        with self._lock:
+            event = {
+                'id': next(self._ids),
+                'channel': channel,
+                'type': event_type,
+                'data': data,
+                'timestamp': time.time()
+            }
+
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.history_size)
+            history.append(event)
+            self._history.move_to_end(channel)
+
+            while len(self._history) > self.max_channels:
+                self._history.popitem(last=False)
+
+            return event
+
+    def replay(self, channel, after_id):
+        """Events of a channel published after an event id"""
+        with self._lock:
+            return [event for event in self._history.get(channel, ()) if event['id'] > after_id]
+
+class SQLiteEventBroker:
+    """
+    Stand-in message broker shared by all processes on one host through a SQLite file
+
+    Publishers insert rows; each subscribing process runs one poller that reads
+    new rows for every channel at once and fans them out to its subscribers.
+    """
+
+    delivers_locally = False
+
+    def __init__(self, path, retention_seconds=3600, prune_every=500):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self.prune_every = prune_every
+        self._published = itertools.count(1)
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS events '
+                '(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, event_type TEXT NOT NULL, '
+                'data TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_events_channel_id ON events (channel, id)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channel, event_type, data):
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO events (channel, event_type, data, created_at) VALUES (?, ?, ?, ?)',
+                (channel, event_type, json.dumps(data, default=str), now)
+            )
+            if next(self._published) % self.prune_every == 0:
+                conn.execute('DELETE FROM events WHERE created_at < ?', (now - self.retention_seconds,))
+
+        return {'id': cursor.lastrowid, 'channel': channel, 'type': event_type, 'data': data, 'timestamp': now}
+
+    def replay(self, channel, after_id):
+        rows = self._connection().execute(
+            'SELECT id, channel, event_type, data, created_at FROM events WHERE channel = ? AND id > ? ORDER BY id',
+            (channel, after_id)
+        ).fetchall()
+        return [self._to_event(row) for row in rows]
+
+    def read_after(self, last_id, limit=1000):
+        """Events of every channel published after an event id"""
+        rows = self._connection().execute(
+            'SELECT id, channel, event_type, data, created_at FROM events WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, limit)
+        ).fetchall()
+        return [self._to_event(row) for row in rows]
+
+    def latest_id(self):
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    def _to_event(self, row):
+        event_id, channel, event_type, data, created_at = row
+        return {'id': event_id, 'channel': channel, 'type': event_type, 'data': json.loads(data), 'timestamp': created_at}
+
+class EventBus:
+    """Publish/subscribe of workflow progress events, keyed by channel"""
+
+    # Seconds between reads of a broker that does not deliver locally
+    poll_interval = 0.2
+
+    def __init__(self, broker=None):
+        self._broker = broker
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._poller = None
+
+    @property
+    def broker(self):
+        # Created lazily so EVENT_BROKER_PATH is read when events are first used
+        with self._lock:
+            if self._broker is None:
+                # Shared by default, workflows run in worker.py processes; an empty path keeps events in process
+                path = os.getenv('EVENT_BROKER_PATH', os.path.join(os.getcwd(), 'event_broker.db'))
+                if path:
+                    self._broker = SQLiteEventBroker(path)
+                else:
+                    logger.error(
+                        'EVENT_BROKER_PATH is empty: events published by other processes, such as '
+                        'workflows run by worker.py, never reach this one'
+                    )
+                    self._broker = LocalEventBroker()
+            return self._broker
+
+    def publish(self, channel, event_type, data=None):
+        """
+        Publish an event to a channel
+
+        Failures are logged rather than raised, so progress reporting can never
+        fail the work being reported on.
+
+        Returns:
+            dict: The published event, or None if publishing failed
+        """
+        broker = self.broker
+        try:
+            if not broker.delivers_locally:
+                return broker.publish(channel, event_type, data or {})
+
+            # Assign the id and deliver under one lock so subscribers see ids in order
+            with self._lock:
+                event = broker.publish(channel, event_type, data or {})
+                self._deliver([event])
+            return event
+        except Exception:
+            logger.exception('Failed to publish %s event to %s', event_type, channel)
+            return None
+
+    def subscribe(self, channel, last_event_id=None):
+        """
+        Subscribe to a channel
+
+        Args:
+            channel (str): Channel name
+            last_event_id (int): Replay retained events published after this id (optional)
+
+        Returns:
+            Subscription: Close it when done, or use it as a context manager
+        """
+        broker = self.broker
+        subscription = Subscription(self, channel)
+
+        with self._lock:
+            if not broker.delivers_locally and self._poller is None:
+                # Read the start position before replaying so nothing falls in between
+                self._poller = threading.Thread(
+                    target=self._poll_loop,
+                    args=(broker, broker.latest_id()),
+                    name='event-bus-poller',
+                    daemon=True
+                )
+                self._poller.start()
+
+            # Replay while holding the lock so no newer event is dispatched in between
+            if last_event_id is not None:
+                for event in broker.replay(channel, last_event_id):
+                    subscription._deliver(event)
+            self._subscribers.setdefault(channel, set()).add(subscription)
+
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def _deliver(self, events):
+        # Callers hold self._lock
+        for event in events:
+            for subscription in self._subscribers.get(event['channel'], ()):
+                subscription._deliver(event)
+
+    def _poll_loop(self, broker, last_id):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                events = broker.read_after(last_id)
+            except Exception:
+                logger.exception('Failed to read events from broker')
+                continue
+
+            if events:
+                last_id = events[-1]['id']
+                with self._lock:
+                    self._deliver(events)
+
+# Shared by every service instance in the process
+event_bus = EventBus()
+
+def publish_workflow_event(background_check_id, event_type, data=None):
+    """Publish a progress event on a background check's channel"""
+    return event_bus.publish(workflow_channel(background_check_id), event_type, data)
@@ -0,0 +1,203 @@
+import threading
+import time
+from src.services.entity_registry import get_company_registry, get_institution_registry
+
+class FuzzyMatcher:
+    """
+    Approximate name matcher over a character n-gram inverted index
+
+    Candidates are scored with the Dice coefficient of their n-gram sets,
+    2 * |shared| / (|query| + |candidate|), computed for all candidates at once.
+    """
+
+    def __init__(self, entries, normalize, n=3):
+        """
+        Args:
+            entries (list): (name, canonical_name) pairs to index
+            normalize (callable): Returns the token list for a name
+            n (int): N-gram size
+        """
+        self.n = n
+        self.normalize = normalize
+        self.names = []
+        self.canonical_names = []
+
+        vocabulary = {}
+        gram_ids = []
+        name_ids = []
+
+        for name, canonical_name in entries:
+            grams = self._ngrams(name)
+            if not grams:
+                continue
+
+            name_id = len(self.names)
+            self.names.append(name)
+            self.canonical_names.append(canonical_name)
+
+            for gram in grams:
+                gram_ids.append(vocabulary.setdefault(gram, len(vocabulary)))
+                name_ids.append(name_id)
+
+        self.vocabulary = vocabulary
+
+        # Imported here so numpy loads with the first index, not at startup
+        import numpy as np
+
+        # Postings stored CSR style: names containing gram g are
+        # posting_names[posting_offsets[g]:posting_offsets[g + 1]]
+        gram_ids = np.asarray(gram_ids, dtype=np.int64)
+        name_ids = np.asarray(name_ids, dtype=np.int32)
+        order = np.argsort(gram_ids, kind='stable')
+        self.posting_names = name_ids[order]
+        self.posting_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(vocabulary)), out=self.posting_offsets[1:])
+        self.gram_counts = np.bincount(name_ids, minlength=len(self.names))
+
+    @classmethod
+    def from_registry(cls, registry, n=3):
+        """Index every canonical name and alias of an EntityRegistry"""
+        entries = [
+            (name, canonical_name)
+            for canonical_name, aliases in registry.entities.items()
+            for name in [canonical_name, *aliases]
+        ]
+        return cls(entries, registry.normalize_tokens, n)
+
+    def top_k(self, query, k=5, min_score=0.0, budget_ms=5.0):
+        """
+        Return the best matching entities for a query
+
+        Rare n-grams are read first; once the latency budget is spent the
+        remaining (most common, least selective) postings are skipped.
+
+        Args:
+            query (str): Name to look up
+            k (int): Maximum number of entities to return
+            min_score (float): Minimum Dice score between 0 and 1
+            budget_ms (float): Time budget for reading postings (optional)
+
+        Returns:
+            list: Dicts with canonical_name, matched_name and score, best first
+        """
+        import numpy as np
+
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms else None
+        query_grams = self._ngrams(query)
+
+        ids = [self.vocabulary[gram] for gram in query_grams if gram in self.vocabulary]
+        if not ids:
+            return []
+        ids.sort(key=lambda gram_id: self.posting_offsets[gram_id + 1] - self.posting_offsets[gram_id])
+
+        postings = []
+        for gram_id in ids:
+            postings.append(self.posting_names[self.posting_offsets[gram_id]:self.posting_offsets[gram_id + 1]])
+            if deadline and time.perf_counter() > deadline:
+                break
+
+        candidates, shared = np.unique(np.concatenate(postings), return_counts=True)
+        scores = 2.0 * shared / (len(query_grams) + self.gram_counts[candidates])
+
+        keep = scores >= min_score
+        candidates, scores = candidates[keep], scores[keep]
+
+        # Over-fetch so aliases of the same entity do not crowd out other entities
+        limit = min(len(scores), k * 4)
+        if limit == 0:
+            return []
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind='stable')]
+
+        matches = []
+        seen = set()
+        for index in best:
+            name_id = int(candidates[index])
+            canonical_name = self.canonical_names[name_id]
+            if canonical_name in seen:
+                continue
+            seen.add(canonical_name)
+            matches.append({
+                'canonical_name': canonical_name,
+                'matched_name': self.names[name_id],
+                'score': round(float(scores[index]), 3)
+            })
+            if len(matches) == k:
+                break
+
+        return matches
+
+    def best_match(self, query, min_score, k=5):
+        """
+        Return the one entity a query is a misspelling of, or None
+
+        A similar name is not necessarily the same entity ("Northeastern
+        University" scores high against "Northwestern University"), so a match
+        is only returned when its name has the query's tokens in order, each
+        at most one typo away (exact for tokens shorter than five characters),
+        and no other candidate passes the same test. All postings are read, so
+        the result does not depend on timing and may be cached.
+
+        Args:
+            query (str): Name to look up
+            min_score (float): Minimum Dice score between 0 and 1
+            k (int): Candidates checked for a second, ambiguous match
+
+        Returns:
+            dict: canonical_name, matched_name and score, or None
+        """
+        query_tokens = self.normalize(query)
+        matches = [
+            match for match in self.top_k(query, k=k, min_score=min_score, budget_ms=None)
+            if _tokens_agree(query_tokens, self.normalize(match['matched_name']))
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+    def _ngrams(self, name):
+        text = f" {' '.join(self.normalize(name))} "
+        if len(text) <= 2:
+            return set()
+        return {text[i:i + self.n] for i in range(max(1, len(text) - self.n + 1))}
+
+# Shorter tokens must match exactly, one edit turns them into other words too easily
+MIN_TYPO_TOKEN_LENGTH = 5
+
+def _tokens_agree(query_tokens, name_tokens):
+    return len(query_tokens) == len(name_tokens) and all(
+        query_token == name_token or (len(name_token) >= MIN_TYPO_TOKEN_LENGTH and _one_edit_apart(query_token, name_token))
+        for query_token, name_token in zip(query_tokens, name_tokens)
+    )
+
+def _one_edit_apart(a, b):
+    """Whether b is a with one character inserted, deleted or replaced, or two adjacent characters swapped"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    a, b = a[prefix:], b[prefix:]
+
+    if len(a) > len(b):
+        return a[1:] == b
+    if len(a) < len(b):
+        return a == b[1:]
+    return a[1:] == b[1:] or (a[:2] == b[1::-1] and a[2:] == b[2:])
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+def _get_matcher(registry):
+    with _matchers_lock:
+        matcher = _matchers.get(id(registry))
+        if matcher is None:
+            matcher = _matchers[id(registry)] = FuzzyMatcher.from_registry(registry)
+        return matcher
+
+def get_institution_matcher():
+    """Fuzzy matcher over the institution registry"""
+    return _get_matcher(get_institution_registry())
+
+def get_company_matcher():
+    """Fuzzy matcher over the company registry"""
+    return _get_matcher(get_company_registry())
@@ -0,0 +1,11 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# gunicorn -c src/gunicorn.conf.py src.main:app
+from src.services.metrics import mark_process_dead
+
+def child_exit(server, worker):
+    """Drop an exited worker's live gauges so workflows_in_progress stops counting them"""
+    mark_process_dead(worker.pid)
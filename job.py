@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+from src.models.user import db
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(100), nullable=False)  # 'background_check_workflow'
+    payload = db.Column(db.Text, nullable=True)  # JSON encoded handler arguments
+    status = db.Column(db.String(50), default='queued')  # 'queued', 'running', 'completed', 'failed'
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # Earliest time the job may be claimed
+    locked_by = db.Column(db.String(200), nullable=True)  # Worker currently holding the job
+    locked_until = db.Column(db.DateTime, nullable=True)  # Visibility timeout of the current claim
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_available_at', 'status', 'available_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} - {self.job_type} - {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'payload': json.loads(self.payload) if self.payload else None,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'locked_until': self.locked_until.isoformat() if self.locked_until else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
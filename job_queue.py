@@ -0,0 +1,176 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from src.models.user import db
+from src.models.job import Job
+
+# Handlers run by the worker, keyed by job type
+job_handlers = {}
+
+def register_job_handler(job_type):
+    """Register a function as the handler for a job type"""
+    def decorator(func):
+        job_handlers[job_type] = func
+        return func
+    return decorator
+
+class JobQueue:
+    """Durable job queue stored in the jobs table, with at-least-once delivery"""
+
+    def __init__(self, visibility_timeout=300, retry_delay=30):
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+
+    def enqueue(self, job_type, payload, max_attempts=3):
+        """
+        Add a job to the queue, reusing an identical job that is still active
+
+        Args:
+            job_type (str): Type of job, used to select the handler
+            payload (dict): JSON serializable handler arguments
+            max_attempts (int): Number of times the job is tried before it fails
+
+        Returns:
+            Job: The queued (or already active) job
+        """
+        encoded_payload = json.dumps(payload, sort_keys=True)
+
+        active_job = Job.query.filter(
+            Job.job_type == job_type,
+            Job.payload == encoded_payload,
+            Job.status.in_(['queued', 'running'])
+        ).first()
+        if active_job:
+            return active_job
+
+        job = Job(
+            job_type=job_type,
+            payload=encoded_payload,
+            status='queued',
+            attempts=0,
+            max_attempts=max_attempts,
+            available_at=datetime.utcnow()
+        )
+
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def claim(self, worker_id, job_types=None):
+        """
+        Claim the next available job for a worker
+
+        A job is available when it is queued and due, or when a worker's claim on
+        it has passed its visibility timeout without completing.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker
+            job_types (list): Restrict to these job types (optional)
+
+        Returns:
+            Job: The claimed job, or None if nothing is available
+        """
+        now = datetime.utcnow()
+        self._fail_exhausted_jobs(now)
+
+        claimable = or_(
+            and_(Job.status == 'queued', Job.available_at <= now),
+            and_(Job.status == 'running', Job.locked_until < now)
+        )
+
+        query = db.session.query(Job.id).filter(claimable, Job.attempts < Job.max_attempts)
+        if job_types:
+            query = query.filter(Job.job_type.in_(job_types))
+        candidate_ids = [job_id for job_id, in query.order_by(Job.available_at, Job.id).limit(10)]
+
+        for job_id in candidate_ids:
+            # Conditional update so only one worker wins the job
+            claimed = Job.query.filter(Job.id == job_id, claimable).update({
+                'status': 'running',
+                'locked_by': worker_id,
+                'locked_until': now + timedelta(seconds=self.visibility_timeout),
+                'attempts': Job.attempts + 1,
+                'updated_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+
+            if claimed:
+                return Job.query.get(job_id)
+
+        return None
+
+    def extend(self, job_id, worker_id):
+        """Push back the visibility timeout of a job the worker still holds"""
+        now = datetime.utcnow()
+        extended = Job.query.filter_by(id=job_id, locked_by=worker_id, status='running').update({
+            'locked_until': now + timedelta(seconds=self.visibility_timeout),
+            'updated_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        return bool(extended)
+
+    def complete(self, job_id, worker_id, result=None):
+        """Mark a job as completed"""
+        now = datetime.utcnow()
+        completed = Job.query.filter_by(id=job_id, locked_by=worker_id).update({
+            'status': 'completed',
+            'result': json.dumps(result) if result is not None else None,
+            'error': None,
+            'locked_until': None,
+            'completed_at': now,
+            'updated_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        return bool(completed)
+
+    def fail(self, job_id, worker_id, error, retry=True):
+        """
+        Record a failed attempt, requeueing the job with a backoff while attempts remain
+
+        Args:
+            job_id (int): ID of the job
+            worker_id (str): Identifier of the worker holding the job
+            error (str): Error message
+            retry (bool): Whether the job may be retried
+        """
+        job = Job.query.get(job_id)
+        if not job or job.locked_by != worker_id:
+            return False
+
+        now = datetime.utcnow()
+        job.error = error
+        job.locked_until = None
+        job.updated_at = now
+
+        if retry and job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.available_at = now + timedelta(seconds=self.retry_delay * job.attempts)
+        else:
+            job.status = 'failed'
+            job.completed_at = now
+
+        db.session.commit()
+        return True
+
+    def get_job(self, job_id):
+        job = Job.query.get(job_id)
+        if not job:
+            return {'error': 'Job not found'}
+
+        return job.to_dict()
+
+    def _fail_exhausted_jobs(self, now):
+        """Fail jobs whose last claim expired after using up all attempts"""
+        exhausted = Job.query.filter(
+            Job.status == 'running',
+            Job.locked_until < now,
+            Job.attempts >= Job.max_attempts
+        ).update({
+            'status': 'failed',
+            'error': 'Visibility timeout expired on final attempt',
+            'completed_at': now,
+            'updated_at': now
+        }, synchronize_session=False)
+
+        if exhausted:
+            db.session.commit()
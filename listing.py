@@ -0,0 +1,108 @@
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.models.background_check import BackgroundCheck
+from src.models.candidate import Candidate
+from src.services.pagination import keyset_paginate
+from src.services.db_routing import read_only
+from src.services.serialization import get_serializer, json_response, stream_json_array
+
+listing_bp = Blueprint('listing', __name__)
+
+def _parse_page_args():
+    """Read the cursor, page size and created_at range shared by the listing endpoints"""
+    limit = min(max(request.args.get('limit', 25, type=int), 1), 100)
+    created_from = request.args.get('created_from')
+    created_to = request.args.get('created_to')
+
+    return {
+        'cursor': request.args.get('cursor'),
+        'limit': limit,
+        'created_from': datetime.fromisoformat(created_from) if created_from else None,
+        'created_to': datetime.fromisoformat(created_to) if created_to else None
+    }
+
+def _filter_created_range(query, model, page_args):
+    if page_args['created_from']:
+        query = query.filter(model.created_at >= page_args['created_from'])
+    if page_args['created_to']:
+        query = query.filter(model.created_at < page_args['created_to'])
+    return query
+
+def _background_check_query(page_args):
+    query = _filter_created_range(BackgroundCheck.query, BackgroundCheck, page_args)
+
+    if request.args.get('status'):
+        query = query.filter(BackgroundCheck.status == request.args['status'])
+    if request.args.get('priority'):
+        query = query.filter(BackgroundCheck.priority == request.args['priority'])
+
+    return query
+
+def _page_response(query, model, page_args):
+    """One keyset page of column-projected rows"""
+    serializer = get_serializer(model)
+
+    try:
+        rows, next_cursor = keyset_paginate(serializer.select(query), model, page_args['cursor'], page_args['limit'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return json_response({
+        'items': serializer.encode_all(rows),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+def _export_response(query, model):
+    """Every matching row, newest first, streamed as one JSON array"""
+    serializer = get_serializer(model)
+    rows = serializer.select(query).order_by(model.created_at.desc(), model.id.desc()).yield_per(1000)
+
+    return Response(
+        stream_with_context(stream_json_array(rows, serializer.encode)),
+        mimetype='application/json'
+    )
+
+@listing_bp.route('/listing/background-checks', methods=['GET'])
+@read_only
+def list_background_checks():
+    """List background checks newest first, filtered by status, priority and date"""
+    try:
+        page_args = _parse_page_args()
+    except ValueError:
+        return jsonify({'error': 'created_from and created_to must be ISO dates'}), 400
+
+    return _page_response(_background_check_query(page_args), BackgroundCheck, page_args)
+
+@listing_bp.route('/listing/background-checks/export', methods=['GET'])
+@read_only
+def export_background_checks():
+    """Stream all background checks matching the listing filters"""
+    try:
+        page_args = _parse_page_args()
+    except ValueError:
+        return jsonify({'error': 'created_from and created_to must be ISO dates'}), 400
+
+    return _export_response(_background_check_query(page_args), BackgroundCheck)
+
+@listing_bp.route('/listing/candidates', methods=['GET'])
+@read_only
+def list_candidates():
+    """List candidates newest first, filtered by date"""
+    try:
+        page_args = _parse_page_args()
+    except ValueError:
+        return jsonify({'error': 'created_from and created_to must be ISO dates'}), 400
+
+    return _page_response(_filter_created_range(Candidate.query, Candidate, page_args), Candidate, page_args)
+
+@listing_bp.route('/listing/candidates/export', methods=['GET'])
+@read_only
+def export_candidates():
+    """Stream all candidates matching the listing filters"""
+    try:
+        page_args = _parse_page_args()
+    except ValueError:
+        return jsonify({'error': 'created_from and created_to must be ISO dates'}), 400
+
+    return _export_response(_filter_created_range(Candidate.query, Candidate, page_args), Candidate)
@@ -6,53 +6,111 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.services.db_routing import engine_options, replica_binds
 from src.routes.user import user_bp
 from src.routes.candidate import candidate_bp
 from src.routes.background_check import background_check_bp
 from src.routes.verification import verification_bp
 from src.routes.report import report_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Enable CORS for all routes
-CORS(app)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(candidate_bp, url_prefix='/api')
-app.register_blueprint(background_check_bp, url_prefix='/api')
-app.register_blueprint(verification_bp, url_prefix='/api')
-app.register_blueprint(report_bp, url_prefix='/api')
-
-# Enable database functionality
-app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{os.getenv('DB_USERNAME', 'root')}:{os.getenv('DB_PASSWORD', 'password')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'mydb')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+from src.routes.listing import listing_bp
+from src.routes.dashboard import dashboard_bp
+from src.routes.audit import audit_bp
+from src.routes.monitoring import monitoring_bp
 
 # Import all models to ensure they are registered with SQLAlchemy
 from src.models.candidate import Candidate, EducationRecord, EmploymentRecord
 from src.models.background_check import BackgroundCheck, VerificationResult, CriminalCheck, CreditCheck
 from src.models.report import Report, AuditLog, Configuration
+from src.models.job import Job
+from src.models.stats import StatCounter, MonthlyCheckRollup
+from src.migrations import register_commands, upgrade
+from src.services.audit_log import audit_writer
+from src.services.config_service import config_service
+from src.services.metrics import init_metrics
+from src.services.profiler import request_profiler
+
+def database_uri(host, port):
+    return f"mysql+pymysql://{os.getenv('DB_USERNAME', 'root')}:{os.getenv('DB_PASSWORD', 'password')}@{host}:{port}/{os.getenv('DB_NAME', 'mydb')}"
+
+def create_app(config=None):
+    """
+    Build the application without touching the database
+
+    The schema is created by `flask db-upgrade` (src/migrations.py), not on
+    startup. Settings can be overridden with FLASK_* environment variables,
+    e.g. FLASK_SQLALCHEMY_DATABASE_URI, or by the config dict.
+
+    Args:
+        config (dict): Config values applied last (optional)
+
+    Returns:
+        Flask: The application
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+
+    # Enable CORS for all routes
+    CORS(app)
 
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(candidate_bp, url_prefix='/api')
+    app.register_blueprint(background_check_bp, url_prefix='/api')
+    app.register_blueprint(verification_bp, url_prefix='/api')
+    app.register_blueprint(report_bp, url_prefix='/api')
+    app.register_blueprint(listing_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(audit_bp, url_prefix='/api')
+    # Scraped by Prometheus at /metrics, outside the API prefix
+    app.register_blueprint(monitoring_bp)
+
+    # Enable database functionality; engines connect on first use
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(os.getenv('DB_HOST', 'localhost'), os.getenv('DB_PORT', '3306'))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
+    # Read replicas from DB_REPLICA_HOSTS, used by views marked read_only
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(database_uri)
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.from_prefixed_env()
+    app.config.update(config or {})
+    db.init_app(app)
+
+    register_commands(app)
+
+    # Audit entries are buffered and bulk-inserted by a background thread (src/services/audit_log.py)
+    audit_writer.init_app(app)
+
+    # Configuration rows are cached in process and re-checked before requests (src/services/config_service.py)
+    config_service.init_app(app)
+
+    # Workflow, provider and commit metrics for /metrics (src/services/metrics.py)
+    init_metrics()
+
+    # Opt-in cProfile and slow statement log, enabled by PROFILE_TOKEN or PROFILE_SAMPLE_RATE (src/services/profiler.py)
+    request_profiler.init_app(app)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+
+    return app
+
+# For `gunicorn src.main:app` and the worker; `gunicorn 'src.main:create_app()'` also works
+app = create_app()
 
 
 if __name__ == '__main__':
+    # The development server brings the schema up to date itself
+    with app.app_context():
+        upgrade()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,157 @@
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    # Optional, metrics are not collected without it
+    prometheus_client = None
+
+# Workflow steps range from a cache hit to minutes of provider calls
+STEP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+PROVIDER_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class _NoopMetric:
+    """Stands in for every metric when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def observe(self, amount):
+        pass
+
+def _metric(kind, name, documentation, labelnames, **kwargs):
+    """Create a prometheus_client metric of the given kind ('Counter', 'Gauge', 'Histogram')"""
+    if prometheus_client is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+# Values live in PROMETHEUS_MULTIPROC_DIR when it is set, so /metrics in any
+# gunicorn worker reports the sum over web and job worker processes
+WORKFLOW_STEP_SECONDS = _metric(
+    'Histogram', 'workflow_step_duration_seconds', 'Duration of background check workflow steps',
+    ['step', 'status'], buckets=STEP_BUCKETS
+)
+WORKFLOW_SECONDS = _metric(
+    'Histogram', 'workflow_duration_seconds', 'Duration of whole background check workflows',
+    ['check_type', 'status'], buckets=STEP_BUCKETS
+)
+WORKFLOWS_IN_PROGRESS = _metric(
+    'Gauge', 'workflows_in_progress', 'Background check workflows currently executing',
+    ['check_type'], multiprocess_mode='livesum'
+)
+PROVIDER_REQUEST_SECONDS = _metric(
+    'Histogram', 'verification_provider_request_duration_seconds', 'Duration of verification provider requests',
+    ['source'], buckets=PROVIDER_BUCKETS
+)
+PROVIDER_REQUESTS = _metric(
+    'Counter', 'verification_provider_requests_total', 'Verification provider requests',
+    ['source', 'result']
+)
+VERIFICATION_OUTCOMES = _metric(
+    'Counter', 'verification_outcomes_total', 'Education and employment verification outcomes',
+    ['verification_type', 'outcome']
+)
+CRIMINAL_CHECK_OUTCOMES = _metric(
+    'Counter', 'criminal_check_outcomes_total', 'Criminal check outcomes',
+    ['check_type', 'outcome']
+)
+DB_COMMITS = _metric(
+    'Counter', 'db_commits_total', 'Database transactions committed',
+    []
+)
+
+@contextmanager
+def time_provider_request(source):
+    """
+    Time a request to a verification provider
+
+    Args:
+        source (str): Verification source, as named in the rate limiter settings
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        PROVIDER_REQUESTS.labels(source, 'error').inc()
+        raise
+    else:
+        PROVIDER_REQUESTS.labels(source, 'ok').inc()
+    finally:
+        PROVIDER_REQUEST_SECONDS.labels(source).observe(time.perf_counter() - started)
+
+@contextmanager
+def workflow_in_progress(check_type):
+    """Count a workflow as in progress while the block runs"""
+    WORKFLOWS_IN_PROGRESS.labels(check_type).inc()
+    try:
+        yield
+    finally:
+        WORKFLOWS_IN_PROGRESS.labels(check_type).dec()
+
+def observe_workflow(check_type, status, step_entries, duration_ms):
+    """
+    Record a finished workflow and its steps
+
+    Args:
+        check_type (str): Background check type
+        status (str): Background check status after the workflow
+        step_entries (list): Step entries returned by WorkflowEngine.execute
+        duration_ms (float): Wall time of the whole workflow
+    """
+    for entry in step_entries:
+        WORKFLOW_STEP_SECONDS.labels(entry['step'], entry['status']).observe((entry.get('duration_ms') or 0) / 1000)
+    WORKFLOW_SECONDS.labels(check_type, status).observe(duration_ms / 1000)
+
+def record_verification_outcome(verification_type, outcome):
+    """Count a committed verification result (verified, failed, inconclusive, ...)"""
+    VERIFICATION_OUTCOMES.labels(verification_type, outcome).inc()
+
+def record_criminal_check_outcome(check_type, status, result):
+    """Count a committed criminal check: its result (clear, records_found) or 'failed'"""
+    CRIMINAL_CHECK_OUTCOMES.labels(check_type, result if status == 'completed' else status).inc()
+
+def _count_commit(connection):
+    DB_COMMITS.inc()
+
+def init_metrics():
+    """Count commits of every engine; safe to call more than once"""
+    if prometheus_client is not None and not event.contains(Engine, 'commit', _count_commit):
+        event.listen(Engine, 'commit', _count_commit)
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text format
+
+    Returns:
+        tuple: (body bytes, content type), or None when prometheus_client is not installed
+    """
+    if prometheus_client is None:
+        return None
+
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid):
+    """
+    Drop the live gauge values of an exited process
+
+    gunicorn.conf.py calls this from child_exit for web workers and
+    worker.py calls it for itself on the way out
+    """
+    if prometheus_client is not None and os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
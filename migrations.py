@@ -0,0 +1,202 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import click
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from src.models.user import db
+from src.models.candidate import Candidate, EducationRecord, EmploymentRecord
+from src.models.background_check import BackgroundCheck, VerificationResult, CriminalCheck, CreditCheck
+from src.models.report import Report
+from src.services.dashboard_stats import rebuild_dashboard_stats
+from src.services.audit_store import archive_partitions, migrate_legacy_audit_logs
+
+# Kept out of db.metadata so db.create_all() never treats it as a model table
+schema_migrations = Table(
+    'schema_migrations',
+    MetaData(),
+    Column('version', String(100), primary_key=True),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+def _find_index(model, name):
+    for index in model.__table__.indexes:
+        if index.name == name:
+            return index
+    raise LookupError(f'{model.__name__} declares no index named {name}')
+
+def create_indexes(*model_indexes):
+    """
+    Build a migration that creates model-declared indexes missing from the database
+
+    Indexes that already exist (for example on databases created by
+    db.create_all() from the current models) are skipped.
+
+    Args:
+        model_indexes: (model, index name) pairs
+
+    Returns:
+        callable: Migration taking a connection
+    """
+    def migrate(connection):
+        inspector = inspect(connection)
+        for model, name in model_indexes:
+            index = _find_index(model, name)
+            existing = {ix['name'] for ix in inspector.get_indexes(index.table.name)}
+            if name not in existing:
+                index.create(connection)
+    return migrate
+
+def add_columns(*model_columns):
+    """
+    Build a migration that adds model-declared columns missing from the database
+
+    Columns are added as nullable, without defaults.
+
+    Args:
+        model_columns: (model, column name) pairs
+
+    Returns:
+        callable: Migration taking a connection
+    """
+    def migrate(connection):
+        inspector = inspect(connection)
+        quote = connection.dialect.identifier_preparer.quote
+        for model, name in model_columns:
+            table = model.__table__
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            if name not in existing:
+                column_type = table.c[name].type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(name)} {column_type}'))
+    return migrate
+
+def add_criminal_check_batch_token(connection):
+    add_columns((CriminalCheck, 'batch_token'))(connection)
+    create_indexes((CriminalCheck, 'ix_criminal_checks_batch_token'))(connection)
+
+# Applied in order; never edit or reorder an entry that has shipped, append a new one.
+# Each must be safe to run again after a partial run: skip what exists, do DDL before copying data.
+MIGRATIONS = [
+    ('0001_keyset_listing_indexes', 'Keyset pagination indexes for listings', create_indexes(
+        (BackgroundCheck, 'ix_background_checks_created_at_id'),
+        (BackgroundCheck, 'ix_background_checks_status_created_at_id'),
+        (BackgroundCheck, 'ix_background_checks_priority_created_at_id'),
+        (Candidate, 'ix_candidates_created_at_id')
+    )),
+    ('0002_hot_query_path_indexes', 'Indexes for verification, criminal check and report lookups', create_indexes(
+        (VerificationResult, 'ix_verification_results_bg_type_status'),
+        (VerificationResult, 'ix_verification_results_type_record_created_at'),
+        (CriminalCheck, 'ix_criminal_checks_bg_status_result'),
+        (CriminalCheck, 'ix_criminal_checks_bg_created_at'),
+        (CreditCheck, 'ix_credit_checks_background_check_id'),
+        (EducationRecord, 'ix_education_records_candidate_id'),
+        (EmploymentRecord, 'ix_employment_records_candidate_id'),
+        (Report, 'ix_reports_background_check_id_created_at')
+    )),
+    ('0003_dashboard_stats_backfill', 'Backfill dashboard counters and monthly rollups', rebuild_dashboard_stats),
+    ('0004_partition_audit_logs', 'Move audit_logs rows into monthly partitions', migrate_legacy_audit_logs),
+    ('0005_criminal_check_batch_token', 'Batch token column for bulk-inserted criminal checks', add_criminal_check_batch_token)
+]
+
+def applied_migrations(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return {row.version for row in connection.execute(select(schema_migrations.c.version))}
+
+def pending_migrations(engine=None):
+    """Versions of the migrations not yet applied to the database"""
+    engine = engine or db.engine
+    with engine.begin() as connection:
+        applied = applied_migrations(connection)
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
+
+def upgrade(engine=None):
+    """
+    Create missing tables, then apply pending migrations in order
+
+    Each migration runs in its own transaction and is recorded in
+    schema_migrations, so an interrupted upgrade resumes with the migration
+    it stopped in. MySQL commits DDL statements implicitly, so that migration
+    may be partly applied and runs again from the start; every migration is
+    written to be safe to run again.
+
+    Args:
+        engine: SQLAlchemy engine (defaults to db.engine of the current app)
+
+    Returns:
+        list: Versions applied by this run
+    """
+    engine = engine or db.engine
+
+    with engine.begin() as connection:
+        db.metadata.create_all(connection)
+        applied = applied_migrations(connection)
+
+    newly_applied = []
+    for version, _, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+        newly_applied.append(version)
+
+    return newly_applied
+
+def register_commands(app):
+    """Add `flask db-upgrade`, `flask db-status`, `flask db-rebuild-stats` and `flask audit-archive` commands to the app"""
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Apply pending schema migrations"""
+        _print_upgrade(upgrade())
+
+    @app.cli.command('db-status')
+    def db_status_command():
+        """List pending schema migrations"""
+        _print_status(pending_migrations())
+
+    @app.cli.command('db-rebuild-stats')
+    def db_rebuild_stats_command():
+        """Recompute dashboard counters and rollups from the source tables"""
+        with db.engine.begin() as connection:
+            rebuild_dashboard_stats(connection)
+        print('Dashboard stats rebuilt')
+
+    @app.cli.command('audit-archive')
+    @click.option('--keep-months', type=int, default=None, help='Months kept in hot partitions (default AUDIT_HOT_MONTHS or 3)')
+    def audit_archive_command(keep_months):
+        """Move audit partitions older than the hot window into the compressed archive"""
+        months = archive_partitions(keep_months)
+        for year, month in months:
+            print(f'Archived audit logs of {year:04d}-{month:02d}')
+        if not months:
+            print('No audit partitions to archive')
+
+def _print_upgrade(versions):
+    for version in versions:
+        print(f'Applied {version}')
+    if not versions:
+        print('Database is up to date')
+
+def _print_status(pending):
+    descriptions = {version: description for version, description, _ in MIGRATIONS}
+    for version in pending:
+        print(f'Pending {version}: {descriptions[version]}')
+    if not pending:
+        print('Database is up to date')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply schema migrations')
+    parser.add_argument('command', choices=['upgrade', 'status'])
+    args = parser.parse_args()
+
+    from src.main import app
+
+    with app.app_context():
+        if args.command == 'upgrade':
+            _print_upgrade(upgrade())
+        else:
+            _print_status(pending_migrations())
@@ -0,0 +1,14 @@
+from flask import Blueprint, Response, jsonify
+from src.services.metrics import render_metrics
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+@monitoring_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Workflow, provider and database metrics in the Prometheus text format"""
+    rendered = render_metrics()
+    if rendered is None:
+        return jsonify({'error': 'prometheus_client is not installed'}), 503
+
+    body, content_type = rendered
+    return Response(body, content_type=content_type)
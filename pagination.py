@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+def encode_cursor(created_at, record_id):
+    """Opaque cursor pointing just after a (created_at, id) position"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def keyset_paginate(query, model, cursor=None, limit=25):
+    """
+    Page through a query newest first, ordered by (created_at, id)
+
+    Each page continues from the last row of the previous one instead of using
+    OFFSET, so deep pages cost the same as the first page when the query is
+    backed by an index ending in (created_at, id).
+
+    Args:
+        query: Query over model, with any filters applied
+        model: Model class with created_at and id columns
+        cursor (str): Cursor returned with the previous page (optional)
+        limit (int): Page size
+
+    Returns:
+        tuple: (rows, next cursor or None when this is the last page)
+    """
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < cursor_created_at,
+            and_(model.created_at == cursor_created_at, model.id < cursor_id)
+        ))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, next_cursor
@@ -0,0 +1,336 @@
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+SUMMARY_HEADER = 'X-Profile-Summary'
+
+# Profiles older than PROFILE_MAX_AGE_SECONDS are looked for at most this often
+AGE_PRUNE_INTERVAL = 300
+
+# Run that statements executed in this context are attributed to
+_current_run = ContextVar('profile_run', default=None)
+
+class ProfileRun:
+    """cProfile data and SQL statement timings of one profiled request or job"""
+
+    def __init__(self, label, slow_query_ms):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.slow_query_ms = slow_query_ms
+        self.started_at = datetime.utcnow()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slow_statements = []
+        self.wall_seconds = None
+        self.profile = cProfile.Profile()
+        self._started = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+            except ValueError:
+                # Another profiler is active (one per process from Python 3.12), keep only the SQL log
+                self.profile = None
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self.wall_seconds is not None:
+            return
+        self.wall_seconds = time.perf_counter() - self._started
+        if self.profile is not None:
+            self.profile.disable()
+
+    def record_statement(self, statement, seconds):
+        """Count a statement; called from pool threads too"""
+        with self._lock:
+            self.statements += 1
+            self.db_seconds += seconds
+            if seconds * 1000 >= self.slow_query_ms:
+                self.slow_statements.append({'duration_ms': round(seconds * 1000, 2), 'statement': statement[:2000]})
+
+    def summary(self):
+        """Short form for the X-Profile-Summary header"""
+        return '; '.join([
+            f'id={self.id}',
+            f'wall_ms={self.wall_seconds * 1000:.1f}',
+            f'db_ms={self.db_seconds * 1000:.1f}',
+            f'statements={self.statements}',
+            f'slow_statements={len(self.slow_statements)}',
+            f"cprofile={'yes' if self.profile is not None else 'busy'}"
+        ])
+
+    def save(self, directory, top=30):
+        """
+        Write <name>.json (timings, slow statements, top functions) and, with cProfile data, <name>.prof
+
+        Args:
+            directory (str): Output directory, created if missing
+            top (int): Functions listed in the JSON, by cumulative time
+
+        Returns:
+            str: Path of the JSON file
+        """
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', self.label).strip('_')[:80]
+        base = os.path.join(directory, f"{self.started_at.strftime('%Y%m%dT%H%M%S')}-{slug}-{self.id}")
+
+        report = {
+            'id': self.id,
+            'label': self.label,
+            'started_at': self.started_at.isoformat(),
+            'wall_ms': round(self.wall_seconds * 1000, 2),
+            'db_ms': round(self.db_seconds * 1000, 2),
+            'statements': self.statements,
+            'slow_query_ms': self.slow_query_ms,
+            'slow_statements': self.slow_statements,
+            'top_functions': []
+        }
+
+        if self.profile is not None:
+            self.profile.dump_stats(f'{base}.prof')
+            stats = pstats.Stats(self.profile).stats
+            # Values are (primitive calls, calls, own time, cumulative time, callers)
+            for (filename, line, function), (_, calls, own, cumulative, _) in sorted(
+                stats.items(), key=lambda item: item[1][3], reverse=True
+            )[:top]:
+                report['top_functions'].append({
+                    'function': f'{filename}:{line}({function})',
+                    'calls': calls,
+                    'own_ms': round(own * 1000, 2),
+                    'cumulative_ms': round(cumulative * 1000, 2)
+                })
+
+        with open(f'{base}.json', 'w') as f:
+            json.dump(report, f, indent=2)
+        return f'{base}.json'
+
+class RequestProfiler:
+    """
+    Opt-in cProfile and SQL statement log for requests and jobs
+
+    A request is profiled when its X-Profile header equals PROFILE_TOKEN, or
+    at random with probability PROFILE_SAMPLE_RATE (which also samples jobs
+    run through profile_job). Results are written to PROFILE_DIR and profiled
+    responses carry an X-Profile-Summary header. Statements slower than
+    PROFILE_SLOW_QUERY_MS are listed and logged. Saving a run prunes
+    PROFILE_DIR down to PROFILE_MAX_FILES runs and drops runs older than
+    PROFILE_MAX_AGE_SECONDS, oldest first (0 disables either limit).
+
+    With neither a token nor a sample rate, init_app registers nothing, so
+    requests and queries pay no cost at all. cProfile covers the calling
+    thread only; statements of AppContextExecutor tasks are counted towards
+    the run that submitted them. For streamed responses only the view itself
+    is covered, not the generation of the body.
+    """
+
+    def __init__(self, token=None, sample_rate=None, directory=None, slow_query_ms=None, max_files=None, max_age_seconds=None):
+        self.token = token if token is not None else os.getenv('PROFILE_TOKEN', '')
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.directory = directory or os.getenv('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'profiles')
+        self.slow_query_ms = slow_query_ms if slow_query_ms is not None else float(os.getenv('PROFILE_SLOW_QUERY_MS', '100'))
+        self.max_files = max_files if max_files is not None else int(os.getenv('PROFILE_MAX_FILES', '500'))
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else float(os.getenv('PROFILE_MAX_AGE_SECONDS', str(7 * 24 * 60 * 60)))
+        self._count = None
+        self._pruned_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def init_app(self, app):
+        """Register the request hooks and SQL listeners, only when profiling is configured"""
+        if not self.enabled:
+            return
+
+        _listen()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._abandon_request)
+        logger.info('Request profiling enabled (sample rate %s, header %s), writing to %s',
+                    self.sample_rate, 'on' if self.token else 'off', self.directory)
+
+    def profile_job(self, label):
+        """Context manager profiling a sampled job, e.g. a queued workflow run"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return nullcontext()
+        return self._profile(label)
+
+    @contextmanager
+    def _profile(self, label):
+        run = ProfileRun(label, self.slow_query_ms)
+        token = _current_run.set(run)
+        run.start()
+        try:
+            yield run
+        finally:
+            run.stop()
+            _current_run.reset(token)
+            self._save(run)
+
+    def _requested(self):
+        header = request.headers.get(PROFILE_HEADER)
+        if header and self.token and hmac.compare_digest(header.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start_request(self):
+        if not self._requested():
+            return
+
+        run = ProfileRun(f'{request.method} {request.path}', self.slow_query_ms)
+        g._profile_run = run
+        g._profile_token = _current_run.set(run)
+        run.start()
+
+    def _finish_request(self, response):
+        run = g.pop('_profile_run', None)
+        if run is None:
+            return response
+
+        run.stop()
+        _current_run.reset(g.pop('_profile_token'))
+        self._save(run)
+        response.headers[SUMMARY_HEADER] = run.summary()
+        return response
+
+    def _abandon_request(self, exc):
+        # after_request did not run, e.g. another after_request hook raised
+        run = g.pop('_profile_run', None)
+        if run is not None:
+            run.stop()
+            _current_run.reset(g.pop('_profile_token'))
+
+    def _save(self, run):
+        for statement in run.slow_statements:
+            logger.warning('Slow statement (%.1f ms) in %s: %s', statement['duration_ms'], run.label, statement['statement'])
+        try:
+            run.save(self.directory)
+        except OSError:
+            logger.exception('Failed to write profile %s', run.id)
+            return
+        self._track()
+
+    def prune(self, max_files=None):
+        """
+        Delete runs older than max_age_seconds, then the oldest runs until at most max_files remain
+
+        A run is its .json file and, if any, its .prof file.
+
+        Args:
+            max_files (int): Runs to keep, defaults to self.max_files
+        """
+        max_files = self.max_files if max_files is None else max_files
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds > 0 else None
+
+        runs = {}
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            base, extension = os.path.splitext(name)
+            if extension not in ('.json', '.prof'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            paths, newest = runs.get(base, ([], 0))
+            paths.append(path)
+            runs[base] = (paths, max(newest, mtime))
+
+        ordered = sorted(runs.values(), key=lambda item: item[1])
+        excess = len(ordered) - max_files if max_files > 0 else 0
+        kept = len(ordered)
+        for index, (paths, mtime) in enumerate(ordered):
+            if index >= excess and (cutoff is None or mtime >= cutoff):
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            kept -= 1
+
+        with self._lock:
+            self._count = kept
+            self._pruned_at = time.monotonic()
+
+    def _track(self):
+        with self._lock:
+            if self._count is not None:
+                self._count += 1
+            over_count = self._count is not None and self.max_files > 0 and self._count > self.max_files
+            needs_pruning = (
+                self._count is None
+                or over_count
+                or (self.max_age_seconds > 0 and time.monotonic() - self._pruned_at >= AGE_PRUNE_INTERVAL)
+            )
+
+        if needs_pruning:
+            # Prune to 90% so every save past the limit does not trigger a full scan
+            self.prune(int(self.max_files * 0.9) if over_count else None)
+
+def current_run():
+    """Profile run of the current context, or None"""
+    return _current_run.get()
+
+@contextmanager
+def attach_run(run):
+    """Attribute statements executed in the block (e.g. on a pool thread) to run"""
+    if run is None:
+        yield
+        return
+
+    token = _current_run.set(run)
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_run.get() is not None:
+        conn.info.setdefault('profile_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    run = _current_run.get()
+    started = conn.info.get('profile_query_started')
+    if run is not None and started:
+        run.record_statement(statement, time.perf_counter() - started.pop())
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('profile_query_started'):
+        connection.info['profile_query_started'].pop()
+
+def _listen():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+# Shared by every service instance in the process
+request_profiler = RequestProfiler()
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+class RateLimitTimeout(Exception):
+    """Raised when a rate limit slot cannot be acquired before the timeout"""
+
+class LocalTokenStore:
+    """Token bucket and concurrency state shared by the threads of one process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._leases = {}
+
+    def take_token(self, name, rate, burst):
+        """Take a token, returning 0 on success or the seconds to wait for the next one"""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(name, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+
+            self._buckets[name] = (tokens, now)
+            return wait
+
+    def acquire_slot(self, name, max_concurrency, lease_seconds):
+        """Acquire a concurrency slot, returning a lease id or None if all slots are taken"""
+        with self._lock:
+            leases = self._leases.setdefault(name, set())
+            if len(leases) >= max_concurrency:
+                return None
+
+            lease_id = uuid.uuid4().hex
+            leases.add(lease_id)
+            return lease_id
+
+    def release_slot(self, name, lease_id):
+        with self._lock:
+            self._leases.get(name, set()).discard(lease_id)
+
+class SQLiteTokenStore:
+    """Token bucket and concurrency state shared by all worker processes on one host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        with self._transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_buckets '
+                '(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_leases '
+                '(lease_id TEXT PRIMARY KEY, name TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in an immediate (write-locked) transaction"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def take_token(self, name, rate, burst):
+        """Take a token, returning 0 on success or the seconds to wait for the next one"""
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute(
+                'SELECT tokens, updated_at FROM rate_limit_buckets WHERE name = ?', (name,)
+            ).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limit_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                (name, tokens, now)
+            )
+            return wait
+
+    def acquire_slot(self, name, max_concurrency, lease_seconds):
+        """Acquire a concurrency slot, returning a lease id or None if all slots are taken"""
+        with self._transaction() as conn:
+            now = time.time()
+            # Leases left behind by crashed processes expire instead of leaking slots
+            conn.execute('DELETE FROM rate_limit_leases WHERE expires_at < ?', (now,))
+            in_use = conn.execute(
+                'SELECT COUNT(*) FROM rate_limit_leases WHERE name = ?', (name,)
+            ).fetchone()[0]
+            if in_use >= max_concurrency:
+                return None
+
+            lease_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO rate_limit_leases (lease_id, name, expires_at) VALUES (?, ?, ?)',
+                (lease_id, name, now + lease_seconds)
+            )
+            return lease_id
+
+    def release_slot(self, name, lease_id):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM rate_limit_leases WHERE lease_id = ?', (lease_id,))
+
+class RateLimiter:
+    """Token bucket with a concurrency cap for a single verification source"""
+
+    # Poll interval while waiting for a concurrency slot
+    slot_poll_interval = 0.05
+
+    def __init__(self, name, store, rate, burst=None, max_concurrency=None, lease_seconds=300):
+        self.name = name
+        self.store = store
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.max_concurrency = max_concurrency
+        self.lease_seconds = lease_seconds
+
+    @contextmanager
+    def limit(self, timeout=None):
+        """
+        Block until a concurrency slot and a token are available
+
+        Args:
+            timeout (float): Maximum seconds to wait (optional)
+
+        Raises:
+            RateLimitTimeout: If the limit could not be acquired in time
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        lease_id = None
+        if self.max_concurrency:
+            lease_id = self._acquire_slot(deadline)
+
+        try:
+            self._take_token(deadline)
+            yield
+        finally:
+            if lease_id:
+                self.store.release_slot(self.name, lease_id)
+
+    def _acquire_slot(self, deadline):
+        while True:
+            lease_id = self.store.acquire_slot(self.name, self.max_concurrency, self.lease_seconds)
+            if lease_id:
+                return lease_id
+            self._wait(self.slot_poll_interval, deadline)
+
+    def _take_token(self, deadline):
+        while True:
+            wait = self.store.take_token(self.name, self.rate, self.burst)
+            if wait <= 0:
+                return
+            self._wait(wait, deadline)
+
+    def _wait(self, seconds, deadline):
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitTimeout(f'Rate limit wait timed out for source: {self.name}')
+            seconds = min(seconds, remaining)
+        time.sleep(seconds)
+
+class RateLimiterRegistry:
+    """Rate limiters keyed by verification source name"""
+
+    def __init__(self, store=None):
+        self._store = store
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        # Created lazily so RATE_LIMIT_STORE_PATH is read when limiters are first used
+        with self._lock:
+            if self._store is None:
+                path = os.getenv('RATE_LIMIT_STORE_PATH')
+                self._store = SQLiteTokenStore(path) if path else LocalTokenStore()
+            return self._store
+
+    def configure(self, name, rate, burst=None, max_concurrency=None):
+        """Create or update the limiter for a source"""
+        limiter = RateLimiter(name, self.store, rate, burst, max_concurrency)
+        with self._lock:
+            self._limiters[name] = limiter
+        return limiter
+
+    def configure_sources(self, verification_sources):
+        """Configure limiters from a service's verification_sources dict"""
+        for name, source in verification_sources.items():
+            if 'rate_limit' in source:
+                self.configure(name, **source['rate_limit'])
+
+    def get(self, name):
+        return self._limiters.get(name)
+
+    def limit(self, name, timeout=30):
+        """Context manager enforcing the limit for a source, a no-op for unknown sources"""
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            return nullcontext()
+        return limiter.limit(timeout)
+
+# Shared by every service instance in the process
+rate_limiters = RateLimiterRegistry()
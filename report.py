@@ -20,6 +20,10 @@ class Report(db.Model):
     background_check = db.relationship('BackgroundCheck', backref='reports', lazy=True)
     generator = db.relationship('User', backref='generated_reports', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_reports_background_check_id_created_at', 'background_check_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Report {self.id} - {self.report_type}>'
     
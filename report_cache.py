@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import logging
+import threading
+from datetime import datetime
+from flask import has_app_context
+from sqlalchemy import update
+from src.models.user import db
+from src.models.report import Report
+from src.services.report_renderers import get_renderer
+from src.services.audit_log import record_audit
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever report_generator.py layouts change so old artifacts stop matching
+REPORT_TEMPLATE_VERSION = 1
+
+class ReportCache:
+    """
+    Content-addressed, size-bounded store of rendered report artifacts
+
+    Artifacts are named by a hash of the normalized report data, report type,
+    format and template version, so unchanged checks always map to the same file.
+    """
+
+    def __init__(self, directory=None, max_bytes=None, on_evict=None):
+        self.directory = directory or os.getenv('REPORT_CACHE_DIR', os.path.join(os.getcwd(), 'report_cache'))
+        self.max_bytes = max_bytes or int(os.getenv('REPORT_CACHE_MAX_BYTES', str(1024 ** 3)))
+        self.on_evict = on_evict
+        self._size = None
+        self._lock = threading.Lock()
+
+    def cache_key(self, background_check_data, report_type, fmt='pdf'):
+        """Stable hash of the normalized report inputs"""
+        normalized = json.dumps(background_check_data, sort_keys=True, separators=(',', ':'), default=str)
+        key_source = f'{REPORT_TEMPLATE_VERSION}:{report_type}:{fmt}:{normalized}'
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def artifact_path(self, key, fmt='pdf'):
+        return os.path.join(self.directory, key[:2], f'{key}.{fmt}')
+
+    def get(self, key, fmt='pdf'):
+        """Return the artifact path for a key, or None if it is not cached"""
+        path = self.artifact_path(key, fmt)
+        try:
+            # Touch the artifact so eviction treats it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_render(self, background_check_data, report_type, render, fmt='pdf'):
+        """
+        Return a cached artifact, rendering it only on a miss
+
+        Args:
+            background_check_data (dict): Report payload
+            report_type (str): 'comprehensive' or 'summary'
+            render (callable): Called as render(background_check_data, output_path) on a miss
+            fmt (str): Artifact format / file extension
+
+        Returns:
+            tuple: (artifact path, whether it was a cache hit)
+        """
+        key = self.cache_key(background_check_data, report_type, fmt)
+        path = self.get(key, fmt)
+        if path:
+            return path, True
+
+        path = self.artifact_path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Render to a private file then rename, so readers never see a partial artifact
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            render(background_check_data, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self._track(os.path.getsize(path))
+        return path, False
+
+    def evict(self, target_bytes=None):
+        """
+        Delete least recently used artifacts until the cache fits in target_bytes
+
+        Returns:
+            list: Paths of the deleted artifacts, also passed to on_evict
+        """
+        target_bytes = self.max_bytes if target_bytes is None else target_bytes
+
+        artifacts = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in artifacts)
+        removed = []
+        for _, size, path in sorted(artifacts):
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        with self._lock:
+            self._size = total
+
+        if removed and self.on_evict:
+            self.on_evict(removed)
+        return removed
+
+    def _track(self, added_bytes):
+        with self._lock:
+            if self._size is not None:
+                self._size += added_bytes
+            needs_eviction = self._size is None or self._size > self.max_bytes
+
+        if needs_eviction:
+            # Evict to 90% so every write past the limit does not trigger a full scan
+            self.evict(int(self.max_bytes * 0.9) if self._size is not None else None)
+
+def _clear_report_paths(paths, batch_size=500):
+    """Clear Report.file_path on rows whose artifact was evicted, so no row points at a missing file"""
+    if not has_app_context():
+        logger.warning('Evicted %d report artifacts outside an app context; their Report rows keep stale file paths', len(paths))
+        return
+
+    # Own transaction, so eviction in the middle of a request never commits the caller's session
+    with db.engine.begin() as connection:
+        for start in range(0, len(paths), batch_size):
+            connection.execute(
+                update(Report.__table__)
+                .where(Report.__table__.c.file_path.in_(paths[start:start + batch_size]))
+                .values(file_path=None)
+            )
+
+_report_cache = None
+_lock = threading.Lock()
+
+def get_report_cache():
+    global _report_cache
+    with _lock:
+        if _report_cache is None:
+            _report_cache = ReportCache(on_evict=_clear_report_paths)
+        return _report_cache
+
+def get_cached_report(background_check_data, report_type='comprehensive', fmt='pdf'):
+    """
+    Path of the report for unchanged data, rendering it only when not cached
+
+    Returns:
+        tuple: (artifact path, whether it was a cache hit)
+    """
+    renderer = get_renderer(fmt)
+    return get_report_cache().get_or_render(
+        background_check_data,
+        report_type,
+        lambda data, output_path: renderer.render_to_file(data, output_path, report_type),
+        fmt
+    )
+
+def create_cached_report(background_check_id, background_check_data, report_type='comprehensive', fmt='pdf', generated_by=None):
+    """
+    Create a Report row whose file_path points at the cached artifact
+
+    Evicting the artifact clears file_path on the rows that point at it;
+    call this again to re-render (unchanged data maps to the same path).
+
+    Returns:
+        dict: Report record
+    """
+    file_path, _ = get_cached_report(background_check_data, report_type, fmt)
+
+    report = Report(
+        background_check_id=background_check_id,
+        report_type=report_type,
+        format=fmt,
+        status='generated',
+        file_path=file_path,
+        generated_by=generated_by,
+        generated_at=datetime.utcnow()
+    )
+
+    db.session.add(report)
+    db.session.commit()
+    
+    record_audit(
+        'report_generated',
+        'report',
+        report.id,
+        user_id=generated_by,
+        details={'background_check_id': background_check_id, 'report_type': report_type, 'format': fmt}
+    )
+    return report.to_dict()
@@ -4,8 +4,10 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 import os
+from src.services.concurrency import get_pool_size
 
 class BackgroundCheckReportGenerator:
     def __init__(self):
@@ -362,3 +364,58 @@ class BackgroundCheckReportGenerator:
         doc.build(story)
         return output_path
 
+# Generator owned by a report worker process, built once by _init_report_worker
+_worker_generator = None
+
+def _init_report_worker():
+    """Build the stylesheet and custom styles once per worker process"""
+    global _worker_generator
+    _worker_generator = BackgroundCheckReportGenerator()
+
+def _render_report(report_type, background_check_data, output_path):
+    if report_type == 'summary':
+        return _worker_generator.generate_summary_report(background_check_data, output_path)
+    return _worker_generator.generate_comprehensive_report(background_check_data, output_path)
+
+def generate_reports_batch(report_jobs, max_workers=None):
+    """
+    Render many reports across a process pool, yielding results as they complete
+    
+    At most a few jobs per worker are queued at a time, so very large batches
+    are not all held in memory.
+    
+    Args:
+        report_jobs (iterable): Dicts with 'background_check_data', 'output_path' and
+            an optional 'report_type' ('comprehensive' or 'summary')
+        max_workers (int): Number of worker processes (defaults to REPORT_MAX_WORKERS or the CPU count)
+        
+    Yields:
+        dict: output_path, report_type, status ('generated' or 'failed') and error
+    """
+    max_workers = max_workers or get_pool_size('REPORT_MAX_WORKERS', os.cpu_count() or 1)
+    max_queued = max_workers * 4
+    report_jobs = iter(report_jobs)
+    running = {}
+    
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_report_worker) as executor:
+        while True:
+            for job in report_jobs:
+                report_type = job.get('report_type', 'comprehensive')
+                future = executor.submit(_render_report, report_type, job['background_check_data'], job['output_path'])
+                running[future] = (report_type, job['output_path'])
+                if len(running) >= max_queued:
+                    break
+            
+            if not running:
+                return
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                report_type, output_path = running.pop(future)
+                error = future.exception()
+                yield {
+                    'output_path': output_path,
+                    'report_type': report_type,
+                    'status': 'failed' if error else 'generated',
+                    'error': str(error) if error else None
+                }
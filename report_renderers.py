@@ -0,0 +1,306 @@
+import json
+import threading
+from datetime import datetime
+from html import escape
+from string import Template
+
+def build_report_sections(background_check_data, report_type='comprehensive'):
+    """
+    Build the report content as plain data, mirroring the PDF report sections
+
+    Args:
+        background_check_data (dict): Report payload
+        report_type (str): 'comprehensive' or 'summary'
+
+    Returns:
+        dict: Report sections
+    """
+    candidate = background_check_data.get('candidate', {})
+    verification_results = background_check_data.get('verificationResults', [])
+    criminal_checks = background_check_data.get('criminalChecks', [])
+    credit_check = background_check_data.get('creditCheck', {})
+
+    verification_passed = all(r.get('result') == 'pass' for r in verification_results if r.get('result'))
+    criminal_clear = all(c.get('result') == 'clear' for c in criminal_checks if c.get('result'))
+    full_name = f"{candidate.get('firstName', '')} {candidate.get('lastName', '')}"
+
+    if report_type == 'summary':
+        education_verified = sum(1 for r in verification_results if r.get('type') == 'education' and r.get('result') == 'pass')
+        employment_verified = sum(1 for r in verification_results if r.get('type') == 'employment' and r.get('result') == 'pass')
+        criminal_clear_count = sum(1 for c in criminal_checks if c.get('result') == 'clear')
+
+        return {
+            'title': 'BACKGROUND CHECK SUMMARY',
+            'report_type': 'summary',
+            'basic_information': {
+                'candidate': full_name,
+                'report_id': background_check_data['id'],
+                'date': datetime.now().strftime('%B %d, %Y'),
+                'status': background_check_data.get('status', 'Unknown').title()
+            },
+            'results_summary': {
+                'education_verification': f"{education_verified} verified" if education_verified > 0 else "Not verified",
+                'employment_verification': f"{employment_verified} verified" if employment_verified > 0 else "Not verified",
+                'criminal_background': f"{criminal_clear_count} jurisdictions clear" if criminal_clear_count > 0 else "Pending/Issues found",
+                'credit_check': credit_check.get('status', 'Not performed').title()
+            },
+            'recommendation': {
+                'status': 'APPROVED' if verification_passed and criminal_clear else 'REVIEW REQUIRED',
+                'text': 'Candidate has passed all background checks.' if verification_passed and criminal_clear
+                        else 'Please review detailed findings before proceeding.'
+            }
+        }
+
+    if verification_passed and criminal_clear:
+        overall_status = 'CLEARED'
+        recommendation = 'The candidate has successfully passed all background verification checks. No adverse findings were discovered during the screening process.'
+    else:
+        overall_status = 'REQUIRES REVIEW'
+        recommendation = 'Some verification checks require further review. Please examine the detailed results above before making a hiring decision.'
+
+    return {
+        'title': 'BACKGROUND CHECK REPORT',
+        'report_type': 'comprehensive',
+        'report_information': {
+            'report_id': background_check_data['id'],
+            'generated': datetime.now().strftime('%B %d, %Y at %I:%M %p'),
+            'report_type': background_check_data.get('checkType', 'Comprehensive').title(),
+            'status': background_check_data.get('status', 'Unknown').title()
+        },
+        'candidate_information': {
+            'full_name': full_name,
+            'email': candidate.get('email', 'N/A'),
+            'phone': candidate.get('phone', 'N/A'),
+            'address': candidate.get('address', 'N/A')
+        },
+        'verification_results': [
+            {
+                'type': result.get('type', '').title(),
+                'status': result.get('status', '').title(),
+                'result': result.get('result', 'N/A').title(),
+                'details': result.get('details', 'No details available')
+            }
+            for result in verification_results
+        ],
+        'criminal_checks': [
+            {
+                'jurisdiction': check.get('jurisdiction', 'N/A'),
+                'type': check.get('checkType', '').title(),
+                'status': check.get('status', '').title(),
+                'result': check.get('result', 'N/A').title(),
+                'details': check.get('details', 'No details available')
+            }
+            for check in criminal_checks
+        ],
+        'credit_check': {
+            'status': credit_check.get('status', 'Not performed'),
+            'credit_score': credit_check.get('creditScore'),
+            'credit_rating': credit_check.get('creditRating'),
+            'details': credit_check.get('details')
+        },
+        'summary': {
+            'overall_status': overall_status,
+            'recommendation': recommendation
+        }
+    }
+
+class JSONReportRenderer:
+    """Serializes the report sections as JSON"""
+
+    format = 'json'
+    content_type = 'application/json'
+
+    def render(self, background_check_data, report_type='comprehensive'):
+        return json.dumps(build_report_sections(background_check_data, report_type))
+
+    def render_to_file(self, background_check_data, output_path, report_type='comprehensive'):
+        with open(output_path, 'w', encoding='utf-8') as output_file:
+            output_file.write(self.render(background_check_data, report_type))
+        return output_path
+
+# Templates are compiled once at import and only substituted per report
+_PAGE = Template('''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; margin: 48px; color: #222; }
+h1 { color: darkblue; text-align: center; }
+h2 { color: darkblue; border: 1px solid darkblue; padding: 5px; margin-top: 28px; }
+table { border-collapse: collapse; width: 100%; font-size: 13px; }
+th { background: $header_color; color: whitesmoke; text-align: left; }
+th, td { border: 1px solid #ccc; padding: 6px; vertical-align: top; }
+td.label { font-weight: bold; width: 30%; }
+.status { text-align: center; font-size: 20px; font-weight: bold; color: $status_color; }
+footer { text-align: center; font-size: 11px; color: grey; margin-top: 36px; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+$body
+<footer>$footer</footer>
+</body>
+</html>
+''')
+_SECTION = Template('<h2>$heading</h2>\n$content\n')
+_FIELD_ROW = Template('<tr><td class="label">$label</td><td>$value</td></tr>')
+_FIELDS_TABLE = Template('<table>$rows</table>')
+_DATA_TABLE = Template('<table><tr>$header</tr>$rows</table>')
+_EMPTY = Template('<p>$message</p>')
+
+class HTMLReportRenderer:
+    """Renders the report sections with precompiled HTML templates"""
+
+    format = 'html'
+    content_type = 'text/html'
+
+    def render(self, background_check_data, report_type='comprehensive'):
+        sections = build_report_sections(background_check_data, report_type)
+
+        if report_type == 'summary':
+            body, status_color = self._summary_body(sections)
+            footer = 'For detailed results, please refer to the comprehensive report.'
+        else:
+            body, status_color = self._comprehensive_body(sections)
+            footer = 'This report is confidential and intended solely for the use of authorized personnel.'
+
+        return _PAGE.substitute(
+            title=escape(sections['title']),
+            header_color='darkblue',
+            status_color=status_color,
+            body=body,
+            footer=f"{escape(footer)}<br>Generated by BackgroundCheck Pro on {datetime.now().strftime('%B %d, %Y')}"
+        )
+
+    def render_to_file(self, background_check_data, output_path, report_type='comprehensive'):
+        with open(output_path, 'w', encoding='utf-8') as output_file:
+            output_file.write(self.render(background_check_data, report_type))
+        return output_path
+
+    def _comprehensive_body(self, sections):
+        info = sections['report_information']
+        candidate = sections['candidate_information']
+        credit = sections['credit_check']
+        summary = sections['summary']
+
+        parts = [
+            self._fields([
+                ('Report ID:', f"#{info['report_id']}"),
+                ('Generated:', info['generated']),
+                ('Report Type:', info['report_type']),
+                ('Status:', info['status'])
+            ]),
+            _SECTION.substitute(heading='CANDIDATE INFORMATION', content=self._fields([
+                ('Full Name:', candidate['full_name']),
+                ('Email Address:', candidate['email']),
+                ('Phone Number:', candidate['phone']),
+                ('Address:', candidate['address'])
+            ])),
+            _SECTION.substitute(heading='VERIFICATION RESULTS', content=self._table(
+                ['Type', 'Status', 'Result', 'Details'],
+                [[r['type'], r['status'], r['result'], r['details']] for r in sections['verification_results']],
+                'No verification results available.'
+            )),
+            _SECTION.substitute(heading='CRIMINAL BACKGROUND CHECKS', content=self._table(
+                ['Jurisdiction', 'Type', 'Status', 'Result', 'Details'],
+                [[c['jurisdiction'], c['type'], c['status'], c['result'], c['details']] for c in sections['criminal_checks']],
+                'No criminal background checks performed.'
+            ))
+        ]
+
+        if credit['status'] == 'completed':
+            credit_content = self._fields([
+                ('Credit Score:', str(credit['credit_score'] or 'N/A')),
+                ('Credit Rating:', credit['credit_rating'] or 'N/A'),
+                ('Details:', credit['details'] or 'No details available')
+            ])
+        else:
+            credit_content = _EMPTY.substitute(message=escape(f"Credit check status: {credit['status'].title()}"))
+            if credit['details']:
+                credit_content += _EMPTY.substitute(message=escape(credit['details']))
+        parts.append(_SECTION.substitute(heading='CREDIT CHECK', content=credit_content))
+
+        parts.append(_SECTION.substitute(
+            heading='SUMMARY AND RECOMMENDATIONS',
+            content=f"<p class=\"status\">OVERALL STATUS: {escape(summary['overall_status'])}</p>"
+                    f"{_EMPTY.substitute(message=escape(summary['recommendation']))}"
+        ))
+
+        status_color = 'green' if summary['overall_status'] == 'CLEARED' else 'orange'
+        return '\n'.join(parts), status_color
+
+    def _summary_body(self, sections):
+        info = sections['basic_information']
+        results = sections['results_summary']
+        recommendation = sections['recommendation']
+
+        parts = [
+            self._fields([
+                ('Candidate:', info['candidate']),
+                ('Report ID:', f"#{info['report_id']}"),
+                ('Date:', info['date']),
+                ('Status:', info['status'])
+            ]),
+            _SECTION.substitute(heading='RESULTS SUMMARY', content=self._table(
+                ['Check Type', 'Status'],
+                [
+                    ['Education Verification', results['education_verification']],
+                    ['Employment Verification', results['employment_verification']],
+                    ['Criminal Background', results['criminal_background']],
+                    ['Credit Check', results['credit_check']]
+                ],
+                ''
+            )),
+            _SECTION.substitute(
+                heading='RECOMMENDATION',
+                content=f"<p class=\"status\">{escape(recommendation['status'])} - {escape(recommendation['text'])}</p>"
+            )
+        ]
+
+        status_color = 'green' if recommendation['status'] == 'APPROVED' else 'orange'
+        return '\n'.join(parts), status_color
+
+    def _fields(self, fields):
+        rows = ''.join(_FIELD_ROW.substitute(label=escape(label), value=escape(str(value))) for label, value in fields)
+        return _FIELDS_TABLE.substitute(rows=rows)
+
+    def _table(self, header, rows, empty_message):
+        if not rows:
+            return _EMPTY.substitute(message=escape(empty_message))
+        return _DATA_TABLE.substitute(
+            header=''.join(f'<th>{escape(cell)}</th>' for cell in header),
+            rows=''.join('<tr>' + ''.join(f'<td>{escape(str(cell))}</td>' for cell in row) + '</tr>' for row in rows)
+        )
+
+class PDFReportRenderer:
+    """Renders PDF reports through ReportLab, imported only when first used"""
+
+    format = 'pdf'
+    content_type = 'application/pdf'
+
+    def __init__(self):
+        self._generator = None
+        self._lock = threading.Lock()
+
+    def render_to_file(self, background_check_data, output_path, report_type='comprehensive'):
+        with self._lock:
+            if self._generator is None:
+                from src.services.report_generator import BackgroundCheckReportGenerator
+                self._generator = BackgroundCheckReportGenerator()
+
+        if report_type == 'summary':
+            return self._generator.generate_summary_report(background_check_data, output_path)
+        return self._generator.generate_comprehensive_report(background_check_data, output_path)
+
+_renderers = {
+    'json': JSONReportRenderer(),
+    'html': HTMLReportRenderer(),
+    'pdf': PDFReportRenderer()
+}
+
+def get_renderer(fmt):
+    """Return the renderer for a Report.format value ('pdf', 'html' or 'json')"""
+    if fmt not in _renderers:
+        raise ValueError(f'Unsupported report format: {fmt}')
+    return _renderers[fmt]
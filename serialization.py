@@ -0,0 +1,251 @@
+import json
+from flask import Response
+from src.models.candidate import Candidate, EducationRecord, EmploymentRecord
+from src.models.background_check import BackgroundCheck, VerificationResult, CriminalCheck, CreditCheck
+from src.models.report import Report, AuditLog, Configuration
+
+try:
+    import orjson
+except ImportError:
+    # Optional, the standard json module is used without it
+    orjson = None
+
+class Field:
+    """An output value computed from one or more columns by an expression template"""
+
+    def __init__(self, template, *columns):
+        self.template = template
+        self.columns = columns
+
+def iso(column):
+    return Field('({0}.isoformat() if {0} else None)', column)
+
+def float_or_none(column):
+    return Field('(float({0}) if {0} else None)', column)
+
+def masked(column, flag_column):
+    return Field("('[ENCRYPTED]' if {1} else {0})", column, flag_column)
+
+class ModelSerializer:
+    """
+    Serializes column-projected rows of a model to the same dicts as its to_dict()
+
+    The spec maps output keys to column names, Fields or nested specs. It is
+    compiled once into a function that builds the dict straight from a row
+    tuple, so no ORM objects are hydrated.
+    """
+
+    def __init__(self, model, spec):
+        self.model = model
+        self.column_names = []
+        body = self._compile_spec(spec)
+
+        source = f'def encode(row):\n    return {body}\n'
+        namespace = {}
+        exec(compile(source, f'<serializer {model.__name__}>', 'exec'), namespace)
+        self.encode = namespace['encode']
+
+        self.columns = [getattr(model, name) for name in self.column_names]
+
+    def _column_ref(self, name):
+        if name not in self.column_names:
+            self.column_names.append(name)
+        return f'row[{self.column_names.index(name)}]'
+
+    def _compile_spec(self, spec):
+        items = []
+        for key, value in spec.items():
+            if isinstance(value, dict):
+                expression = self._compile_spec(value)
+            elif isinstance(value, Field):
+                expression = value.template.format(*[self._column_ref(column) for column in value.columns])
+            else:
+                expression = self._column_ref(value)
+            items.append(f'{key!r}: {expression}')
+        return '{' + ', '.join(items) + '}'
+
+    def select(self, query):
+        """Restrict a query over the model to the serialized columns"""
+        return query.with_entities(*self.columns)
+
+    def encode_all(self, rows):
+        encode = self.encode
+        return [encode(row) for row in rows]
+
+# Key order follows each model's to_dict()
+serializers = {
+    Candidate: ModelSerializer(Candidate, {
+        'id': 'id',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'email': 'email',
+        'phone': 'phone',
+        'date_of_birth': iso('date_of_birth'),
+        'address': {
+            'line1': 'address_line1',
+            'line2': 'address_line2',
+            'city': 'city',
+            'state': 'state',
+            'zip_code': 'zip_code',
+            'country': 'country'
+        },
+        'created_at': iso('created_at'),
+        'updated_at': iso('updated_at')
+    }),
+    EducationRecord: ModelSerializer(EducationRecord, {
+        'id': 'id',
+        'candidate_id': 'candidate_id',
+        'institution_name': 'institution_name',
+        'degree_type': 'degree_type',
+        'field_of_study': 'field_of_study',
+        'graduation_date': iso('graduation_date'),
+        'gpa': 'gpa',
+        'verified': 'verified',
+        'verification_date': iso('verification_date'),
+        'verification_notes': 'verification_notes',
+        'created_at': iso('created_at')
+    }),
+    EmploymentRecord: ModelSerializer(EmploymentRecord, {
+        'id': 'id',
+        'candidate_id': 'candidate_id',
+        'company_name': 'company_name',
+        'job_title': 'job_title',
+        'start_date': iso('start_date'),
+        'end_date': iso('end_date'),
+        'current_position': 'current_position',
+        'supervisor_name': 'supervisor_name',
+        'supervisor_contact': 'supervisor_contact',
+        'salary': float_or_none('salary'),
+        'reason_for_leaving': 'reason_for_leaving',
+        'verified': 'verified',
+        'verification_date': iso('verification_date'),
+        'verification_notes': 'verification_notes',
+        'created_at': iso('created_at')
+    }),
+    BackgroundCheck: ModelSerializer(BackgroundCheck, {
+        'id': 'id',
+        'candidate_id': 'candidate_id',
+        'requester_id': 'requester_id',
+        'check_type': 'check_type',
+        'status': 'status',
+        'priority': 'priority',
+        'consent_given': 'consent_given',
+        'consent_date': iso('consent_date'),
+        'started_at': iso('started_at'),
+        'completed_at': iso('completed_at'),
+        'created_at': iso('created_at'),
+        'updated_at': iso('updated_at')
+    }),
+    VerificationResult: ModelSerializer(VerificationResult, {
+        'id': 'id',
+        'background_check_id': 'background_check_id',
+        'verification_type': 'verification_type',
+        'record_id': 'record_id',
+        'status': 'status',
+        'result': 'result',
+        'details': 'details',
+        'verification_method': 'verification_method',
+        'verified_by': 'verified_by',
+        'verification_date': iso('verification_date'),
+        'created_at': iso('created_at')
+    }),
+    CriminalCheck: ModelSerializer(CriminalCheck, {
+        'id': 'id',
+        'background_check_id': 'background_check_id',
+        'jurisdiction': 'jurisdiction',
+        'check_type': 'check_type',
+        'status': 'status',
+        'result': 'result',
+        'records_found': 'records_found',
+        'record_details': 'record_details',
+        'search_date': iso('search_date'),
+        'created_at': iso('created_at')
+    }),
+    CreditCheck: ModelSerializer(CreditCheck, {
+        'id': 'id',
+        'background_check_id': 'background_check_id',
+        'credit_bureau': 'credit_bureau',
+        'credit_score': 'credit_score',
+        'credit_rating': 'credit_rating',
+        'bankruptcies': 'bankruptcies',
+        'liens': 'liens',
+        'judgments': 'judgments',
+        'collections': 'collections',
+        'status': 'status',
+        'report_date': iso('report_date'),
+        'created_at': iso('created_at')
+    }),
+    Report: ModelSerializer(Report, {
+        'id': 'id',
+        'background_check_id': 'background_check_id',
+        'report_type': 'report_type',
+        'format': 'format',
+        'status': 'status',
+        'file_path': 'file_path',
+        'generated_by': 'generated_by',
+        'generated_at': iso('generated_at'),
+        'delivered_at': iso('delivered_at'),
+        'created_at': iso('created_at')
+    }),
+    AuditLog: ModelSerializer(AuditLog, {
+        'id': 'id',
+        'user_id': 'user_id',
+        'action': 'action',
+        'resource_type': 'resource_type',
+        'resource_id': 'resource_id',
+        'details': 'details',
+        'ip_address': 'ip_address',
+        'user_agent': 'user_agent',
+        'timestamp': iso('timestamp')
+    }),
+    Configuration: ModelSerializer(Configuration, {
+        'id': 'id',
+        'key': 'key',
+        'value': masked('value', 'is_encrypted'),
+        'description': 'description',
+        'category': 'category',
+        'is_encrypted': 'is_encrypted',
+        'created_at': iso('created_at'),
+        'updated_at': iso('updated_at')
+    })
+}
+
+def get_serializer(model):
+    return serializers[model]
+
+def dumps(obj):
+    """Encode to JSON bytes with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Like jsonify(), using the fast JSON backend"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+def stream_json_array(rows, encode, chunk_size=500):
+    """
+    Yield a JSON array of encoded rows in chunks, without building the whole list
+
+    Args:
+        rows: Iterable of row tuples, ideally a query using yield_per
+        encode (callable): Row encoder, usually ModelSerializer.encode
+        chunk_size (int): Rows encoded per JSON call
+
+    Yields:
+        bytes: Pieces of the JSON document
+    """
+    yield b'['
+    first = True
+    chunk = []
+
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + dumps(chunk)[1:-1]
+            first = False
+            chunk = []
+
+    if chunk:
+        yield (b'' if first else b',') + dumps(chunk)[1:-1]
+    yield b']'
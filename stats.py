@@ -0,0 +1,34 @@
+from datetime import datetime
+from src.models.user import db
+
+class StatCounter(db.Model):
+    """
+    One slot of a dashboard counter such as 'candidates' or 'checks.completed'
+
+    A counter's value is the sum of its slots; writers pick a random slot so
+    concurrent transactions rarely wait on the same row.
+    """
+    __tablename__ = 'stat_counters'
+
+    name = db.Column(db.String(100), primary_key=True)
+    slot = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StatCounter {self.name}[{self.slot}] = {self.value}>'
+
+class MonthlyCheckRollup(db.Model):
+    """One slot of the per-month check totals, keyed by the month checks were created in"""
+    __tablename__ = 'monthly_check_rollups'
+
+    month = db.Column(db.String(7), primary_key=True)  # 'YYYY-MM'
+    slot = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    checks = db.Column(db.BigInteger, nullable=False, default=0)
+    completed = db.Column(db.BigInteger, nullable=False, default=0)
+    failed = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MonthlyCheckRollup {self.month}[{self.slot}]>'
+
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
+from src.services.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -1,18 +1,56 @@
-from flask import Blueprint, request, jsonify
-from src.services.education_verification import EducationVerificationService
-from src.services.employment_verification import EmploymentVerificationService
-from src.services.criminal_background import CriminalBackgroundService
-from src.services.workflow_automation import BackgroundCheckWorkflow
+import os
+import threading
+import time
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.models.user import db
+from src.services.job_queue import JobQueue
+from src.services.verification_cache import verification_cache
+from src.services.db_routing import read_only
+from src.services.audit_log import audited
+from src.services.event_bus import event_bus, format_sse, workflow_channel
 
 verification_bp = Blueprint('verification', __name__)
 
-# Initialize services
-education_service = EducationVerificationService()
-employment_service = EmploymentVerificationService()
-criminal_service = CriminalBackgroundService()
-workflow_service = BackgroundCheckWorkflow()
+job_queue = JobQueue()
+
+# Workflow event streams re-read the status from the database this often (seconds), so missed events
+# cannot leave a stream open forever
+STREAM_STATUS_INTERVAL = float(os.getenv('WORKFLOW_STREAM_STATUS_INTERVAL', '15'))
+# Streams are closed after this many seconds; EventSource reconnects and resumes from Last-Event-ID
+STREAM_MAX_SECONDS = float(os.getenv('WORKFLOW_STREAM_MAX_SECONDS', '300'))
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Services are built on first use, so importing the blueprint stays cheap
+_services = {}
+_services_lock = threading.Lock()
+
+def _get_service(name, build):
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = build()
+    return service
+
+def education_service():
+    from src.services.education_verification import EducationVerificationService
+    return _get_service('education', EducationVerificationService)
+
+def employment_service():
+    from src.services.employment_verification import EmploymentVerificationService
+    return _get_service('employment', EmploymentVerificationService)
+
+def criminal_service():
+    from src.services.criminal_background import CriminalBackgroundService
+    return _get_service('criminal', CriminalBackgroundService)
+
+def workflow_service():
+    from src.services.workflow_automation import BackgroundCheckWorkflow
+    return _get_service('workflow', BackgroundCheckWorkflow)
 
 @verification_bp.route('/verification/education/<int:education_record_id>', methods=['POST'])
+@audited('education_verified', 'education_record', 'education_record_id')
 def verify_education_record(education_record_id):
     """Verify a specific education record"""
     data = request.get_json()
@@ -21,7 +59,7 @@ def verify_education_record(education_record_id):
     if not background_check_id:
         return jsonify({'error': 'background_check_id is required'}), 400
     
-    result = education_service.verify_education_record(education_record_id, background_check_id)
+    result = education_service().verify_education_record(education_record_id, background_check_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -29,6 +67,7 @@ def verify_education_record(education_record_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/education/bulk', methods=['POST'])
+@audited('education_bulk_verified', 'education_record')
 def bulk_verify_education():
     """Verify multiple education records in bulk"""
     data = request.get_json()
@@ -38,14 +77,20 @@ def bulk_verify_education():
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    result = education_service.bulk_verify_education_records(
+    max_in_flight = data.get('max_in_flight')
+    if max_in_flight is not None and (isinstance(max_in_flight, bool) or not isinstance(max_in_flight, int) or max_in_flight < 1):
+        return jsonify({'error': 'max_in_flight must be a positive integer'}), 400
+    
+    result = education_service().bulk_verify_education_records(
         data['education_record_ids'], 
-        data['background_check_id']
+        data['background_check_id'],
+        max_in_flight=max_in_flight
     )
     
     return jsonify(result)
 
 @verification_bp.route('/verification/employment/<int:employment_record_id>', methods=['POST'])
+@audited('employment_verified', 'employment_record', 'employment_record_id')
 def verify_employment_record(employment_record_id):
     """Verify a specific employment record"""
     data = request.get_json()
@@ -54,7 +99,7 @@ def verify_employment_record(employment_record_id):
     if not background_check_id:
         return jsonify({'error': 'background_check_id is required'}), 400
     
-    result = employment_service.verify_employment_record(employment_record_id, background_check_id)
+    result = employment_service().verify_employment_record(employment_record_id, background_check_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -62,6 +107,7 @@ def verify_employment_record(employment_record_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/employment/<int:employment_record_id>/supervisor', methods=['POST'])
+@audited('employment_supervisor_verified', 'employment_record', 'employment_record_id')
 def verify_with_supervisor(employment_record_id):
     """Initiate supervisor verification for employment record"""
     data = request.get_json()
@@ -70,7 +116,7 @@ def verify_with_supervisor(employment_record_id):
     if not background_check_id:
         return jsonify({'error': 'background_check_id is required'}), 400
     
-    result = employment_service.verify_with_supervisor(employment_record_id, background_check_id)
+    result = employment_service().verify_with_supervisor(employment_record_id, background_check_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -78,6 +124,7 @@ def verify_with_supervisor(employment_record_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/employment/bulk', methods=['POST'])
+@audited('employment_bulk_verified', 'employment_record')
 def bulk_verify_employment():
     """Verify multiple employment records in bulk"""
     data = request.get_json()
@@ -87,20 +134,26 @@ def bulk_verify_employment():
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    result = employment_service.bulk_verify_employment_records(
+    max_in_flight = data.get('max_in_flight')
+    if max_in_flight is not None and (isinstance(max_in_flight, bool) or not isinstance(max_in_flight, int) or max_in_flight < 1):
+        return jsonify({'error': 'max_in_flight must be a positive integer'}), 400
+    
+    result = employment_service().bulk_verify_employment_records(
         data['employment_record_ids'], 
-        data['background_check_id']
+        data['background_check_id'],
+        max_in_flight=max_in_flight
     )
     
     return jsonify(result)
 
 @verification_bp.route('/verification/criminal/<int:background_check_id>', methods=['POST'])
+@audited('criminal_check_conducted', 'background_check', 'background_check_id')
 def conduct_criminal_check(background_check_id):
     """Conduct criminal background check"""
     data = request.get_json() or {}
     jurisdictions = data.get('jurisdictions')
     
-    result = criminal_service.conduct_criminal_check(background_check_id, jurisdictions)
+    result = criminal_service().conduct_criminal_check(background_check_id, jurisdictions)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -108,9 +161,10 @@ def conduct_criminal_check(background_check_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/criminal/<int:background_check_id>/federal', methods=['POST'])
+@audited('federal_criminal_check_conducted', 'background_check', 'background_check_id')
 def conduct_federal_criminal_check(background_check_id):
     """Conduct federal criminal background check"""
-    result = criminal_service.get_federal_criminal_check(background_check_id)
+    result = criminal_service().get_federal_criminal_check(background_check_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -118,9 +172,10 @@ def conduct_federal_criminal_check(background_check_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/criminal/<int:background_check_id>/sex-offender', methods=['POST'])
+@audited('sex_offender_check_conducted', 'background_check', 'background_check_id')
 def conduct_sex_offender_check(background_check_id):
     """Conduct sex offender registry check"""
-    result = criminal_service.get_sex_offender_check(background_check_id)
+    result = criminal_service().get_sex_offender_check(background_check_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -128,36 +183,159 @@ def conduct_sex_offender_check(background_check_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/criminal/<int:background_check_id>/status', methods=['GET'])
+@read_only
 def get_criminal_check_status(background_check_id):
-    """Get status of criminal checks for a background check"""
-    result = criminal_service.get_criminal_check_status(background_check_id)
+    """
+    Get status of criminal checks for a background check
+    
+    All checks are listed unless page or per_page is given; then only that
+    page is, and the response carries a 'pagination' object.
+    """
+    include_checks = request.args.get('include_checks', 'true').lower() not in ('0', 'false', 'no')
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    if page is not None:
+        page = max(page, 1)
+    if per_page is not None:
+        per_page = min(max(per_page, 1), 200)
+    
+    result = criminal_service().get_criminal_check_status(
+        background_check_id,
+        include_checks=include_checks,
+        page=page,
+        per_page=per_page
+    )
     
     return jsonify(result)
 
 @verification_bp.route('/workflow/<int:background_check_id>/start', methods=['POST'])
+@audited('workflow_started', 'background_check', 'background_check_id')
 def start_workflow(background_check_id):
-    """Start automated background check workflow"""
-    result = workflow_service.start_background_check_workflow(background_check_id)
+    """Queue the automated background check workflow for a worker to run"""
+    error = workflow_service().validate_workflow_start(background_check_id)
+    
+    if error:
+        return jsonify(error), 400
+    
+    from src.services.workflow_automation import WORKFLOW_JOB_TYPE
+    job = job_queue.enqueue(WORKFLOW_JOB_TYPE, {'background_check_id': background_check_id})
+    
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'background_check_id': background_check_id
+    }), 202
+
+@verification_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get status of a queued job"""
+    result = job_queue.get_job(job_id)
     
     if 'error' in result:
-        return jsonify(result), 400
+        return jsonify(result), 404
     
     return jsonify(result)
 
 @verification_bp.route('/workflow/<int:background_check_id>/status', methods=['GET'])
+@read_only
 def get_workflow_status(background_check_id):
     """Get workflow status for a background check"""
-    result = workflow_service.get_workflow_status(background_check_id)
+    counts_only = request.args.get('counts_only', '').lower() in ('1', 'true', 'yes')
+    result = workflow_service().get_workflow_status(background_check_id, counts_only=counts_only)
     
     if 'error' in result:
         return jsonify(result), 404
     
     return jsonify(result)
 
+@verification_bp.route('/workflow/<int:background_check_id>/events', methods=['GET'])
+@read_only
+def stream_workflow_events(background_check_id):
+    """
+    Stream workflow progress as Server-Sent Events
+    
+    Sends a 'status' snapshot first, then step, verification and criminal check
+    events as they are published. The status is also re-read from the database
+    every STREAM_STATUS_INTERVAL seconds and sent again as 'status' when it
+    changed. The stream ends
+    after 'workflow_finished' or a completed or failed 'status', so clients
+    should close their EventSource on either. Streams are closed after
+    STREAM_MAX_SECONDS; the EventSource then reconnects with Last-Event-ID.
+    """
+    # Subscribe before taking the snapshot so no event falls in between
+    subscription = event_bus.subscribe(
+        workflow_channel(background_check_id),
+        request.headers.get('Last-Event-ID', type=int)
+    )
+    
+    snapshot = _workflow_status_snapshot(background_check_id)
+    
+    if 'error' in snapshot:
+        subscription.close()
+        return jsonify(snapshot), 404
+    
+    def generate():
+        with subscription:
+            last_status = snapshot
+            yield format_sse('status', last_status)
+            if last_status['status'] in ('completed', 'failed'):
+                return
+            
+            deadline = time.monotonic() + STREAM_MAX_SECONDS
+            next_check = time.monotonic() + STREAM_STATUS_INTERVAL
+            last_sent = time.monotonic()
+            
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return
+                
+                event = subscription.get(timeout=max(0, min(last_sent + STREAM_KEEPALIVE_SECONDS, next_check, deadline) - now))
+                
+                if subscription.overflowed:
+                    # Events were dropped, the client should reload the full status
+                    yield format_sse('resync', {'background_check_id': background_check_id})
+                    return
+                
+                if event is not None:
+                    yield format_sse(event['type'], event['data'], event['id'])
+                    last_sent = time.monotonic()
+                    if event['type'] == 'workflow_finished':
+                        return
+                elif time.monotonic() - last_sent >= STREAM_KEEPALIVE_SECONDS:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    last_sent = time.monotonic()
+                
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + STREAM_STATUS_INTERVAL
+                    status = _workflow_status_snapshot(background_check_id)
+                    if 'error' in status:
+                        return
+                    if status != last_status:
+                        last_status = status
+                        yield format_sse('status', status)
+                        last_sent = time.monotonic()
+                    if status['status'] in ('completed', 'failed'):
+                        return
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _workflow_status_snapshot(background_check_id):
+    snapshot = workflow_service().get_workflow_status(background_check_id, counts_only=True)
+    # The stream can stay open for minutes, give the connection back to the pool now
+    db.session.remove()
+    return snapshot
+
 @verification_bp.route('/verification/education/<int:education_record_id>/manual', methods=['POST'])
+@audited('manual_education_verification_requested', 'education_record', 'education_record_id')
 def request_manual_education_verification(education_record_id):
     """Request manual verification for education record"""
-    result = education_service.manual_verification_required(education_record_id)
+    result = education_service().manual_verification_required(education_record_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -165,9 +343,10 @@ def request_manual_education_verification(education_record_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/employment/<int:employment_record_id>/manual', methods=['POST'])
+@audited('manual_employment_verification_requested', 'employment_record', 'employment_record_id')
 def request_manual_employment_verification(employment_record_id):
     """Request manual verification for employment record"""
-    result = employment_service.manual_verification_required(employment_record_id)
+    result = employment_service().manual_verification_required(employment_record_id)
     
     if 'error' in result:
         return jsonify(result), 400
@@ -175,12 +354,18 @@ def request_manual_employment_verification(employment_record_id):
     return jsonify(result)
 
 @verification_bp.route('/verification/employment/<int:employment_record_id>/status', methods=['GET'])
+@read_only
 def get_employment_verification_status(employment_record_id):
     """Get verification status for employment record"""
-    result = employment_service.get_employment_verification_status(employment_record_id)
+    result = employment_service().get_employment_verification_status(employment_record_id)
     
     if 'error' in result:
         return jsonify(result), 404
     
     return jsonify(result)
 
+
+@verification_bp.route('/verification/cache/stats', methods=['GET'])
+def get_verification_cache_stats():
+    """Get hit/miss counters for the automated verification cache"""
+    return jsonify(verification_cache.stats())
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or an expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': f"{(self.hits / lookups * 100):.1f}%" if lookups else "0%"
+            }
+
+class VerificationCache:
+    """Caches automated verification results by a fingerprint of the verification data"""
+
+    default_ttl = 24 * 60 * 60
+    default_negative_ttl = 60 * 60
+
+    def __init__(self, max_entries=10000):
+        self._cache = TTLCache(max_entries)
+        self._source_stats = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, source, verification_data):
+        """Stable key for verification data, insensitive to case, accents, punctuation and spacing"""
+        normalized = {key: self._normalize(value) for key, value in verification_data.items()}
+        encoded = json.dumps([source, normalized], sort_keys=True)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get(self, source, verification_data):
+        """Return a copy of the cached result for the verification data, or None"""
+        result = self._cache.get(self.fingerprint(source, verification_data))
+        self._count(source, 'hits' if result is not None else 'misses')
+        return dict(result) if result is not None else None
+
+    def set(self, source, verification_data, result, source_config=None):
+        """
+        Cache a verification result using the source's TTLs
+
+        Inconclusive results are cached with the shorter negative TTL so records
+        recently added to the provider are picked up again soon.
+
+        Args:
+            source (str): Verification source name
+            verification_data (dict): Data sent to the source
+            result (dict): Verification result
+            source_config (dict): Entry from the service's verification_sources (optional)
+        """
+        cache_config = (source_config or {}).get('cache', {})
+        if result.get('status') == 'inconclusive':
+            ttl = cache_config.get('negative_ttl', self.default_negative_ttl)
+        else:
+            ttl = cache_config.get('ttl', self.default_ttl)
+
+        if ttl > 0:
+            self._cache.set(self.fingerprint(source, verification_data), dict(result), ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            sources = {source: dict(counts) for source, counts in self._source_stats.items()}
+        return dict(self._cache.stats(), sources=sources)
+
+    def _count(self, source, counter):
+        with self._lock:
+            counts = self._source_stats.setdefault(source, {'hits': 0, 'misses': 0})
+            counts[counter] += 1
+
+    def _normalize(self, value):
+        if not isinstance(value, str):
+            return value
+        value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+        value = re.sub(r'[^\w\s-]', ' ', value.lower())
+        return ' '.join(value.split())
+
+# Shared by every service instance in the process
+verification_cache = VerificationCache()
@@ -0,0 +1,145 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import logging
+import signal
+import socket
+import threading
+from src.main import app
+from src.models.user import db
+from src.services.concurrency import get_pool_size
+from src.services.config_service import refresh_configuration
+from src.services.db_routing import engine_options
+from src.services.job_queue import JobQueue, job_handlers, register_job_handler
+from src.services.metrics import mark_process_dead
+from src.services.profiler import request_profiler
+from src.services.workflow_automation import BackgroundCheckWorkflow, WORKFLOW_JOB_TYPE
+
+logger = logging.getLogger(__name__)
+
+@register_job_handler(WORKFLOW_JOB_TYPE)
+def run_background_check_workflow(job, payload):
+    """Run a queued background check workflow"""
+    # A retried job may find the workflow already in_progress from the interrupted attempt
+    return BackgroundCheckWorkflow().start_background_check_workflow(
+        payload['background_check_id'],
+        resume=job.attempts > 1
+    )
+
+class JobWorker:
+    """Polls the job queue and runs jobs on a fixed number of threads"""
+
+    def __init__(self, app, queue, concurrency=1, poll_interval=1.0):
+        self.app = app
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_name = f'{socket.gethostname()}:{os.getpid()}'
+        self._stopping = threading.Event()
+
+    def run(self):
+        """Start the worker threads and block until stop() is called"""
+        threads = [
+            threading.Thread(target=self._work_loop, args=(f'{self.worker_name}:{index}',), daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        logger.info('Job worker %s started with concurrency %d', self.worker_name, self.concurrency)
+
+        for thread in threads:
+            thread.join()
+
+    def stop(self, *args):
+        """Finish in-flight jobs, then exit"""
+        self._stopping.set()
+
+    def _work_loop(self, worker_id):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    refresh_configuration()
+                    job = self.queue.claim(worker_id, job_types=list(job_handlers))
+                    if job:
+                        self._process(job, worker_id)
+            except Exception:
+                logger.exception('Job worker %s failed to process a job', worker_id)
+                job = None
+            finally:
+                db.session.remove()
+
+            if not job:
+                self._stopping.wait(self.poll_interval)
+
+    def _process(self, job, worker_id):
+        """Run a claimed job, keeping its visibility timeout extended while it runs"""
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job.id, worker_id, finished), daemon=True)
+        heartbeat.start()
+
+        try:
+            # Sampled with PROFILE_SAMPLE_RATE, like requests
+            with request_profiler.profile_job(f'{job.job_type} {job.id}'):
+                result = job_handlers[job.job_type](job, job.to_dict()['payload'])
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Job %s failed', job.id)
+            self.queue.fail(job.id, worker_id, str(e))
+            return
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        if isinstance(result, dict) and 'error' in result:
+            # Handler rejected the job, retrying would give the same answer
+            self.queue.fail(job.id, worker_id, result['error'], retry=False)
+        else:
+            self.queue.complete(job.id, worker_id, result)
+
+    def _heartbeat(self, job_id, worker_id, finished):
+        interval = max(1, self.queue.visibility_timeout / 3)
+        while not finished.wait(interval):
+            with self.app.app_context():
+                try:
+                    self.queue.extend(job_id, worker_id)
+                finally:
+                    db.session.remove()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background check jobs from the job queue')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('WORKER_CONCURRENCY', '2')))
+    parser.add_argument('--visibility-timeout', type=int, default=int(os.getenv('JOB_VISIBILITY_TIMEOUT', '300')))
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # A worker thread keeps its connection while its workflow steps and job heartbeat hold one each
+    pool = engine_options()
+    connections = args.concurrency * (get_pool_size('WORKFLOW_MAX_WORKERS', 4) + 2)
+    if connections > pool['pool_size'] + pool['max_overflow']:
+        logger.warning(
+            'Up to %d connections in use at once, more than DB_POOL_SIZE + DB_MAX_OVERFLOW (%d); '
+            'lower --concurrency or WORKFLOW_MAX_WORKERS, or jobs will hit the pool timeout',
+            connections, pool['pool_size'] + pool['max_overflow']
+        )
+
+    worker = JobWorker(
+        app,
+        JobQueue(visibility_timeout=args.visibility_timeout),
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    try:
+        worker.run()
+    finally:
+        mark_process_dead(os.getpid())
+
+if __name__ == '__main__':
+    main()
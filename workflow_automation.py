@@ -1,9 +1,20 @@
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from sqlalchemy import func
 from src.models.user import db
-from src.models.background_check import BackgroundCheck
+from src.models.background_check import BackgroundCheck, VerificationResult, CriminalCheck
 from src.services.education_verification import EducationVerificationService
 from src.services.employment_verification import EmploymentVerificationService
 from src.services.criminal_background import CriminalBackgroundService
+from src.services.workflow_engine import WorkflowEngine
+from src.services.config_service import config_service
+from src.services.event_bus import publish_workflow_event
+from src.services.metrics import observe_workflow, workflow_in_progress
+from src.services.serialization import get_serializer
+
+# Job queue type used to run workflows outside the request
+WORKFLOW_JOB_TYPE = 'background_check_workflow'
 
 class BackgroundCheckWorkflow:
     """Workflow automation for background check processes"""
@@ -12,8 +23,9 @@ class BackgroundCheckWorkflow:
         self.education_service = EducationVerificationService()
         self.employment_service = EmploymentVerificationService()
         self.criminal_service = CriminalBackgroundService()
+        self.engine = WorkflowEngine()
         
-        self.workflow_steps = {
+        self.workflow_steps = config_service.setting('workflow.steps', {
             'basic': [
                 'verify_education',
                 'verify_employment',
@@ -35,17 +47,49 @@ class BackgroundCheckWorkflow:
                 'sex_offender_check',
                 'credit_check'
             ]
+        })
+        
+        # Estimated time per step in minutes
+        self.step_times = config_service.setting('workflow.step_times', {
+            'verify_education': 5,
+            'verify_employment': 10,
+            'criminal_check_county': 15,
+            'criminal_check_state': 20,
+            'criminal_check_federal': 30,
+            'sex_offender_check': 5,
+            'credit_check': 10
+        })
+        config_service.subscribe('workflow.steps', self._apply_workflow_steps)
+        config_service.subscribe('workflow.step_times', self._apply_step_times)
+        
+        # Steps a step has to wait for; steps without dependencies run concurrently
+        self.step_dependencies = {
+            'verify_education': [],
+            'verify_employment': [],
+            'criminal_check_county': [],
+            'criminal_check_state': [],
+            'criminal_check_federal': [],
+            'sex_offender_check': [],
+            'credit_check': []
         }
     
-    def start_background_check_workflow(self, background_check_id):
+    def _apply_workflow_steps(self, workflow_steps):
+        """Take workflow step lists changed in Configuration"""
+        self.workflow_steps = workflow_steps
+    
+    def _apply_step_times(self, step_times):
+        """Take step time estimates changed in Configuration"""
+        self.step_times = step_times
+    
+    def validate_workflow_start(self, background_check_id):
         """
-        Start the automated background check workflow
+        Check whether the workflow can be started for a background check
         
         Args:
             background_check_id (int): ID of the background check
             
         Returns:
-            dict: Workflow initiation result
+            dict: Error dict if the workflow cannot start, otherwise None
         """
         background_check = BackgroundCheck.query.get(background_check_id)
         if not background_check:
@@ -57,11 +101,32 @@ class BackgroundCheckWorkflow:
         if background_check.status != 'pending':
             return {'error': 'Background check must be in pending status to start workflow'}
         
-        # Update status to in_progress
-        background_check.status = 'in_progress'
-        background_check.started_at = datetime.utcnow()
-        background_check.updated_at = datetime.utcnow()
-        db.session.commit()
+        return None
+    
+    def start_background_check_workflow(self, background_check_id, resume=False):
+        """
+        Start the automated background check workflow
+        
+        Args:
+            background_check_id (int): ID of the background check
+            resume (bool): Re-run a workflow left in_progress by an interrupted job
+            
+        Returns:
+            dict: Workflow initiation result
+        """
+        background_check = BackgroundCheck.query.get(background_check_id)
+        resuming = resume and background_check is not None and background_check.status == 'in_progress'
+        
+        if not resuming:
+            error = self.validate_workflow_start(background_check_id)
+            if error:
+                return error
+            
+            # Update status to in_progress
+            background_check.status = 'in_progress'
+            background_check.started_at = datetime.utcnow()
+            background_check.updated_at = datetime.utcnow()
+            db.session.commit()
         
         # Get workflow steps based on check type
         steps = self.workflow_steps.get(background_check.check_type, self.workflow_steps['standard'])
@@ -101,61 +166,94 @@ class BackgroundCheckWorkflow:
             'pending_steps': []
         }
         
-        candidate = background_check.candidate
-        
-        for step in steps:
-            try:
-                if step == 'verify_education':
-                    education_results = self._verify_all_education_records(background_check.id, candidate)
-                    results['completed_steps'].append({
-                        'step': step,
-                        'status': 'completed',
-                        'results': education_results
-                    })
-                
-                elif step == 'verify_employment':
-                    employment_results = self._verify_all_employment_records(background_check.id, candidate)
-                    results['completed_steps'].append({
-                        'step': step,
-                        'status': 'completed',
-                        'results': employment_results
-                    })
-                
-                elif step.startswith('criminal_check'):
-                    criminal_results = self._execute_criminal_check_step(background_check.id, step)
-                    results['completed_steps'].append({
-                        'step': step,
-                        'status': 'completed',
-                        'results': criminal_results
-                    })
-                
-                elif step == 'credit_check':
-                    # Credit check would be implemented here
-                    results['pending_steps'].append({
-                        'step': step,
-                        'status': 'pending',
-                        'reason': 'Credit check service not yet implemented'
-                    })
-                
-                else:
-                    results['failed_steps'].append({
-                        'step': step,
-                        'status': 'failed',
-                        'reason': f'Unknown step: {step}'
-                    })
-            
-            except Exception as e:
-                results['failed_steps'].append({
-                    'step': step,
-                    'status': 'failed',
-                    'error': str(e)
-                })
+        publish_workflow_event(background_check.id, 'workflow_started', {'steps': steps})
+        
+        # Independent steps run concurrently, each in its own app context and DB session
+        started = time.perf_counter()
+        with workflow_in_progress(background_check.check_type):
+            step_entries = self.engine.execute(
+                steps,
+                partial(self._run_workflow_step, background_check.id),
+                self.step_dependencies,
+                on_event=partial(self._publish_step_event, background_check.id)
+            )
+        
+        for entry in step_entries:
+            results[f"{entry['status']}_steps"].append(entry)
+        
+        results['step_timings'] = {entry['step']: entry['duration_ms'] for entry in step_entries}
+        results['total_duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
         
         # Update background check status based on results
         self._update_background_check_status(background_check, results)
+        observe_workflow(background_check.check_type, background_check.status, step_entries, results['total_duration_ms'])
+        
+        publish_workflow_event(background_check.id, 'workflow_finished', {
+            'status': background_check.status,
+            'completed_steps': len(results['completed_steps']),
+            'failed_steps': len(results['failed_steps']),
+            'pending_steps': len(results['pending_steps']),
+            'total_duration_ms': results['total_duration_ms']
+        })
         
         return results
     
+    def _publish_step_event(self, background_check_id, event_type, entry):
+        """Publish a step event without the step's full results"""
+        publish_workflow_event(background_check_id, event_type, {
+            key: entry[key]
+            for key in ('step', 'status', 'reason', 'error', 'started_at', 'completed_at', 'duration_ms')
+            if key in entry
+        })
+    
+    def _run_workflow_step(self, background_check_id, step):
+        """
+        Run a single workflow step inside a worker thread
+        
+        Args:
+            background_check_id (int): ID of the background check
+            step (str): Workflow step to execute
+            
+        Returns:
+            dict: Step entry with the step status and results
+        """
+        if step == 'verify_education':
+            candidate = BackgroundCheck.query.get(background_check_id).candidate
+            return {
+                'step': step,
+                'status': 'completed',
+                'results': self._verify_all_education_records(background_check_id, candidate)
+            }
+        
+        elif step == 'verify_employment':
+            candidate = BackgroundCheck.query.get(background_check_id).candidate
+            return {
+                'step': step,
+                'status': 'completed',
+                'results': self._verify_all_employment_records(background_check_id, candidate)
+            }
+        
+        elif step.startswith('criminal_check') or step == 'sex_offender_check':
+            return {
+                'step': step,
+                'status': 'completed',
+                'results': self._execute_criminal_check_step(background_check_id, step)
+            }
+        
+        elif step == 'credit_check':
+            # Credit check would be implemented here
+            return {
+                'step': step,
+                'status': 'pending',
+                'reason': 'Credit check service not yet implemented'
+            }
+        
+        return {
+            'step': step,
+            'status': 'failed',
+            'reason': f'Unknown step: {step}'
+        }
+    
     def _verify_all_education_records(self, background_check_id, candidate):
         """Verify all education records for a candidate"""
         education_records = candidate.education_records
@@ -214,80 +312,159 @@ class BackgroundCheckWorkflow:
     
     def _estimate_completion_time(self, steps):
         """Estimate completion time for workflow steps"""
-        # Estimated time per step in minutes
-        step_times = {
-            'verify_education': 5,
-            'verify_employment': 10,
-            'criminal_check_county': 15,
-            'criminal_check_state': 20,
-            'criminal_check_federal': 30,
-            'sex_offender_check': 5,
-            'credit_check': 10
-        }
-        
-        total_minutes = sum(step_times.get(step, 10) for step in steps)
+        total_minutes = sum(self.step_times.get(step, 10) for step in steps)
         
-        estimated_completion = datetime.utcnow()
-        estimated_completion = estimated_completion.replace(
-            minute=estimated_completion.minute + total_minutes
-        )
+        estimated_completion = datetime.utcnow() + timedelta(minutes=total_minutes)
         
         return estimated_completion.isoformat()
     
-    def get_workflow_status(self, background_check_id):
+    def get_workflow_status(self, background_check_id, counts_only=False):
         """
         Get the current status of a background check workflow
         
         Args:
             background_check_id (int): ID of the background check
+            counts_only (bool): Return aggregate counts without loading result rows
             
         Returns:
             dict: Workflow status information
         """
-        background_check = BackgroundCheck.query.get(background_check_id)
+        if counts_only:
+            return self._get_workflow_status_counts(background_check_id)
+        
+        background_check = db.session.query(
+            BackgroundCheck.status,
+            BackgroundCheck.check_type,
+            BackgroundCheck.started_at,
+            BackgroundCheck.completed_at
+        ).filter(BackgroundCheck.id == background_check_id).first()
         if not background_check:
             return {'error': 'Background check not found'}
         
-        # Get verification results
-        verification_results = background_check.verification_results
-        criminal_checks = background_check.criminal_checks
+        # Column-projected rows are counted and serialized without hydrating ORM objects
+        verification_serializer = get_serializer(VerificationResult)
+        criminal_serializer = get_serializer(CriminalCheck)
         
-        # Calculate progress
-        expected_steps = len(self.workflow_steps.get(background_check.check_type, []))
-        completed_verifications = len([vr for vr in verification_results if vr.status == 'verified'])
-        completed_criminal_checks = len([cc for cc in criminal_checks if cc.status == 'completed'])
+        verification_rows = verification_serializer.select(
+            VerificationResult.query.filter_by(background_check_id=background_check_id)
+        ).order_by(VerificationResult.id).all()
+        criminal_rows = criminal_serializer.select(
+            CriminalCheck.query.filter_by(background_check_id=background_check_id)
+        ).order_by(CriminalCheck.id).all()
+        
+        # Single pass over each result set for counts, completed types and serialization
+        verification_counts = {}
+        criminal_counts = {}
+        completed_types = set()
+        verification_results = []
+        criminal_checks = []
+        
+        for vr in verification_rows:
+            verification_counts[vr.status] = verification_counts.get(vr.status, 0) + 1
+            if vr.status == 'verified':
+                completed_types.add(vr.verification_type)
+            verification_results.append(verification_serializer.encode(vr))
+        
+        for cc in criminal_rows:
+            criminal_counts[cc.status] = criminal_counts.get(cc.status, 0) + 1
+            if cc.status == 'completed':
+                completed_types.add(f'criminal_{cc.check_type}')
+            criminal_checks.append(criminal_serializer.encode(cc))
+        
+        status = self._build_workflow_status(
+            background_check_id,
+            background_check.status,
+            background_check.check_type,
+            background_check.started_at,
+            background_check.completed_at,
+            verification_counts,
+            criminal_counts,
+            completed_types
+        )
+        status['verification_results'] = verification_results
+        status['criminal_checks'] = criminal_checks
+        return status
+    
+    def _get_workflow_status_counts(self, background_check_id):
+        """Workflow status computed from SQL aggregates, without hydrating ORM objects"""
+        background_check = db.session.query(
+            BackgroundCheck.status,
+            BackgroundCheck.check_type,
+            BackgroundCheck.started_at,
+            BackgroundCheck.completed_at
+        ).filter(BackgroundCheck.id == background_check_id).first()
+        if not background_check:
+            return {'error': 'Background check not found'}
+        
+        verification_rows = db.session.query(
+            VerificationResult.verification_type,
+            VerificationResult.status,
+            func.count(VerificationResult.id)
+        ).filter(
+            VerificationResult.background_check_id == background_check_id
+        ).group_by(VerificationResult.verification_type, VerificationResult.status).all()
+        
+        criminal_rows = db.session.query(
+            CriminalCheck.check_type,
+            CriminalCheck.status,
+            func.count(CriminalCheck.id)
+        ).filter(
+            CriminalCheck.background_check_id == background_check_id
+        ).group_by(CriminalCheck.check_type, CriminalCheck.status).all()
         
-        total_completed = completed_verifications + completed_criminal_checks
+        verification_counts = {}
+        criminal_counts = {}
+        completed_types = set()
+        
+        for verification_type, status, count in verification_rows:
+            verification_counts[status] = verification_counts.get(status, 0) + count
+            if status == 'verified':
+                completed_types.add(verification_type)
+        
+        for check_type, status, count in criminal_rows:
+            criminal_counts[status] = criminal_counts.get(status, 0) + count
+            if status == 'completed':
+                completed_types.add(f'criminal_{check_type}')
+        
+        return self._build_workflow_status(
+            background_check_id,
+            background_check.status,
+            background_check.check_type,
+            background_check.started_at,
+            background_check.completed_at,
+            verification_counts,
+            criminal_counts,
+            completed_types
+        )
+    
+    def _build_workflow_status(self, background_check_id, status, check_type, started_at, completed_at,
+                               verification_counts, criminal_counts, completed_types):
+        """Assemble the workflow status payload from precomputed counts"""
+        # Calculate progress
+        expected_steps = len(self.workflow_steps.get(check_type, []))
+        total_completed = verification_counts.get('verified', 0) + criminal_counts.get('completed', 0)
         progress_percentage = (total_completed / expected_steps * 100) if expected_steps > 0 else 0
         
         return {
             'background_check_id': background_check_id,
-            'status': background_check.status,
+            'status': status,
             'progress_percentage': round(progress_percentage, 1),
-            'started_at': background_check.started_at.isoformat() if background_check.started_at else None,
-            'completed_at': background_check.completed_at.isoformat() if background_check.completed_at else None,
-            'verification_results': [vr.to_dict() for vr in verification_results],
-            'criminal_checks': [cc.to_dict() for cc in criminal_checks],
-            'next_steps': self._get_next_steps(background_check)
+            'started_at': started_at.isoformat() if started_at else None,
+            'completed_at': completed_at.isoformat() if completed_at else None,
+            'counts': {
+                'verification_results': verification_counts,
+                'criminal_checks': criminal_counts
+            },
+            'next_steps': self._get_next_steps(status, check_type, completed_types)
         }
     
-    def _get_next_steps(self, background_check):
+    def _get_next_steps(self, status, check_type, completed_types):
         """Determine next steps for a background check"""
-        if background_check.status == 'pending':
+        if status == 'pending':
             return ['Obtain candidate consent', 'Start workflow']
-        elif background_check.status == 'in_progress':
+        elif status == 'in_progress':
             # Determine which steps are still pending
-            completed_types = set()
-            
-            for vr in background_check.verification_results:
-                if vr.status == 'verified':
-                    completed_types.add(vr.verification_type)
-            
-            for cc in background_check.criminal_checks:
-                if cc.status == 'completed':
-                    completed_types.add(f'criminal_{cc.check_type}')
-            
-            workflow_steps = self.workflow_steps.get(background_check.check_type, [])
+            workflow_steps = self.workflow_steps.get(check_type, [])
             pending_steps = []
             
             for step in workflow_steps:
@@ -300,8 +477,7 @@ class BackgroundCheckWorkflow:
             
             return pending_steps if pending_steps else ['Generate final report']
         
-        elif background_check.status == 'completed':
+        elif status == 'completed':
             return ['Generate final report', 'Deliver results']
         else:
             return ['Review failed checks', 'Retry or manual intervention required']
-
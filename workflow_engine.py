@@ -0,0 +1,112 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+from src.services.concurrency import AppContextExecutor, get_pool_size
+
+class WorkflowEngine:
+    """Runs workflow steps as a dependency graph on a bounded worker pool"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or get_pool_size('WORKFLOW_MAX_WORKERS', 4)
+
+    def execute(self, steps, step_runner, dependencies=None, on_event=None):
+        """
+        Execute steps concurrently, starting each one as soon as its dependencies complete
+
+        Args:
+            steps (list): Step names in declaration order
+            step_runner (callable): Called as step_runner(step) inside a worker app context,
+                returns a step entry dict with at least 'step' and 'status'
+            dependencies (dict): Mapping of step name to the steps it depends on (optional)
+            on_event (callable): Called as on_event(event_type, entry) from the scheduling
+                thread when a step is 'step_started' or 'step_finished' (optional)
+
+        Returns:
+            list: Step entry dicts in the same order as steps, with timing information
+        """
+        graph = self._build_graph(steps, dependencies or {})
+        notify = on_event or (lambda event_type, entry: None)
+
+        outcomes = {}
+        waiting = dict(graph)
+        running = {}
+
+        with AppContextExecutor(max_workers=self.max_workers, thread_name_prefix='workflow') as executor:
+            while waiting or running:
+                for step in [s for s in steps if s in waiting]:
+                    if not all(dep in outcomes for dep in waiting[step]):
+                        continue
+
+                    blocked_by = [dep for dep in waiting.pop(step) if outcomes[dep]['status'] != 'completed']
+                    if blocked_by:
+                        outcomes[step] = self._blocked_entry(step, blocked_by)
+                        notify('step_finished', outcomes[step])
+                    else:
+                        running[executor.submit(self._run_timed, step_runner, step)] = step
+                        notify('step_started', {'step': step})
+
+                if not running:
+                    # Blocked steps may have unlocked further dependents, schedule again
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    outcomes[step] = future.result()
+                    notify('step_finished', outcomes[step])
+
+        return [outcomes[step] for step in steps]
+
+    def _build_graph(self, steps, dependencies):
+        """Build the dependency graph for the given steps and reject cycles"""
+        graph = {
+            step: [dep for dep in dependencies.get(step, []) if dep in steps]
+            for step in steps
+        }
+
+        visited = set()
+        visiting = set()
+
+        def visit(step):
+            if step in visited:
+                return
+            if step in visiting:
+                raise ValueError(f'Workflow dependency cycle detected at step: {step}')
+            visiting.add(step)
+            for dep in graph[step]:
+                visit(dep)
+            visiting.remove(step)
+            visited.add(step)
+
+        for step in steps:
+            visit(step)
+
+        return graph
+
+    def _run_timed(self, step_runner, step):
+        """Run a single step and record its timings"""
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+
+        try:
+            entry = step_runner(step)
+        except Exception as e:
+            entry = {
+                'step': step,
+                'status': 'failed',
+                'error': str(e)
+            }
+
+        entry['started_at'] = started_at.isoformat()
+        entry['completed_at'] = datetime.utcnow().isoformat()
+        entry['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return entry
+
+    def _blocked_entry(self, step, blocked_by):
+        """Entry for a step that cannot run because a dependency did not complete"""
+        return {
+            'step': step,
+            'status': 'failed',
+            'reason': f"Dependency not completed: {', '.join(blocked_by)}",
+            'duration_ms': 0.0
+        }